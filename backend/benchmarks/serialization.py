@@ -0,0 +1,130 @@
+"""
+Serialization benchmark for large list responses.
+
+Compares three ways of producing the JSON body for N leads:
+
+    response_model  - ORM entities validated into Pydantic models, then dumped
+    jsonable        - ORM entities turned into dicts, then FastAPI's jsonable_encoder
+    fast            - column-tuple query rendered by FastJSONResponse (orjson)
+
+Uses a private in-memory SQLite database, so it doesn't touch DATABASE_URL's
+data (the variable still has to be set for the app modules to import):
+
+    DATABASE_URL=sqlite:// python -m backend.benchmarks.serialization --rows 10000
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+from pydantic import TypeAdapter
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from ..database import Base
+from ..models import Campaign, Lead
+from ..responses import FastJSONResponse, orjson, rows_to_dicts
+from ..schemas import Lead as LeadSchema
+
+
+def seed(db, rows: int) -> int:
+    campaign = Campaign(name="Serialization benchmark")
+    db.add(campaign)
+    db.flush()
+    started = datetime.now() - timedelta(days=30)
+    db.execute(insert(Lead), [
+        {
+            "campaign_id": campaign.id,
+            "email": f"lead{n}@example.com",
+            "full_name": f"Lead {n}",
+            "phone": f"+1555{n:07d}",
+            "status": random.choice(["new", "contacted", "qualified"]),
+            "source": "webhook",
+            "data": {"utm_source": "facebook", "form": "spring"},
+            "created_at": started + timedelta(seconds=n)
+        }
+        for n in range(rows)
+    ])
+    db.commit()
+    return campaign.id
+
+
+def response_model(db, campaign_id: int) -> bytes:
+    leads = db.query(Lead).filter(Lead.campaign_id == campaign_id).all()
+    adapter = TypeAdapter(List[LeadSchema])
+    validated = adapter.validate_python(leads, from_attributes=True)
+    return JSONResponse(adapter.dump_python(validated, mode="json")).body
+
+
+def jsonable(db, campaign_id: int) -> bytes:
+    leads = db.query(Lead).filter(Lead.campaign_id == campaign_id).all()
+    content = [
+        {
+            "id": lead.id,
+            "email": lead.email,
+            "full_name": lead.full_name,
+            "phone": lead.phone,
+            "status": lead.status,
+            "source": lead.source,
+            "created_at": lead.created_at
+        }
+        for lead in leads
+    ]
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def fast(db, campaign_id: int) -> bytes:
+    rows = db.query(
+        Lead.id, Lead.email, Lead.full_name, Lead.phone, Lead.status, Lead.source, Lead.created_at
+    ).filter(Lead.campaign_id == campaign_id).all()
+    return FastJSONResponse(rows_to_dicts(rows)).body
+
+
+MODES = {"response_model": response_model, "jsonable": jsonable, "fast": fast}
+
+
+def measure(fn: Callable, session_factory, campaign_id: int, repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        # A fresh session per run so the identity map doesn't carry entities over
+        db = session_factory()
+        try:
+            started = time.perf_counter()
+            fn(db, campaign_id)
+            timings.append(time.perf_counter() - started)
+        finally:
+            db.close()
+    return timings
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark JSON serialization of large lead lists")
+    parser.add_argument("--rows", type=int, default=10000, help="Leads in the payload")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per mode (median is reported)")
+    args = parser.parse_args(argv)
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+    db = session_factory()
+    campaign_id = seed(db, args.rows)
+    db.close()
+
+    print(f"{args.rows} rows, median of {args.repeat} runs, orjson {'on' if orjson else 'not installed'}")
+    print(f"{'mode':<16} {'median ms':>10} {'bytes':>10} {'speedup':>8}")
+    baseline = None
+    for name, fn in MODES.items():
+        fn(session_factory(), campaign_id)  # warm up
+        median = statistics.median(measure(fn, session_factory, campaign_id, args.repeat))
+        size = len(fn(session_factory(), campaign_id))
+        baseline = baseline or median
+        print(f"{name:<16} {median * 1000:>10.1f} {size:>10} {baseline / median:>7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,155 @@
-from sqlalchemy import create_engine
+import logging
+import threading
+import time
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 import os
 from dotenv import load_dotenv
+from .pool_metrics import (
+    async_pool_metrics, instrumented_pool_class, read_pool_metrics, sync_pool_metrics, track_connection_hold
+)
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
+# Optional read replica for read-only routes
+SQLALCHEMY_READ_DATABASE_URL = os.getenv("DATABASE_READ_URL")
+DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "10"))
+DB_REPLICA_CHECK_SECONDS = float(os.getenv("DB_REPLICA_CHECK_SECONDS", "5"))
+
+# Connection pool sizing, applied to the sync and async engines separately
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+# Async drivers for the same database: asyncpg for PostgreSQL, aiosqlite locally
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def to_async_url(url: str) -> str:
+    """Maps a sync DATABASE_URL onto its async driver"""
+    scheme, sep, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or (
+    to_async_url(SQLALCHEMY_DATABASE_URL) if SQLALCHEMY_DATABASE_URL else None
+)
+
+def pool_options(url, pool_class, metrics) -> dict:
+    """Engine keyword arguments for an instrumented, env-configured QueuePool"""
+    if not url or ":memory:" in url or url.rstrip("/").endswith(("sqlite:", "aiosqlite:")):
+        # In-memory SQLite needs its single shared connection pool
+        return {}
+    return {
+        "poolclass": instrumented_pool_class(pool_class, metrics),
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
 
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL
+    SQLALCHEMY_DATABASE_URL,
+    **pool_options(SQLALCHEMY_DATABASE_URL, QueuePool, sync_pool_metrics)
 )
+track_connection_hold(engine, sync_pool_metrics)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Used by `async def` routes so database I/O doesn't block the event loop
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    **pool_options(ASYNC_DATABASE_URL, AsyncAdaptedQueuePool, async_pool_metrics)
+)
+track_connection_hold(async_engine.sync_engine, async_pool_metrics)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+read_engine = None
+ReadSessionLocal = None
+if SQLALCHEMY_READ_DATABASE_URL:
+    read_engine = create_engine(
+        SQLALCHEMY_READ_DATABASE_URL,
+        **pool_options(SQLALCHEMY_READ_DATABASE_URL, QueuePool, read_pool_metrics)
+    )
+    track_connection_hold(read_engine, read_pool_metrics)
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+class ReplicaGuard:
+    """
+    Decides whether reads may go to the replica. Replication lag is measured
+    at most every DB_REPLICA_CHECK_SECONDS; while the replica lags more than
+    DB_REPLICA_MAX_LAG_SECONDS or can't be reached, reads go to the primary.
+    """
+
+    def __init__(self, engine, max_lag: float = DB_REPLICA_MAX_LAG_SECONDS,
+                 check_interval: float = DB_REPLICA_CHECK_SECONDS):
+        self.engine = engine
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.lag = None
+        self.healthy = False
+        self.error = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def is_usable(self) -> bool:
+        with self._lock:
+            if self._checked_at is None or time.monotonic() - self._checked_at >= self.check_interval:
+                self._check()
+            return self.healthy
+
+    def mark_down(self, error: Exception):
+        """Called when a query on the replica fails, so following requests use the primary"""
+        with self._lock:
+            self.healthy = False
+            self.error = str(error)
+            self._checked_at = time.monotonic()
+        logger.warning(f"Read replica marked down: {str(error)}")
+
+    def status(self) -> dict:
+        return {"healthy": self.healthy, "lag_seconds": self.lag, "max_lag_seconds": self.max_lag, "error": self.error}
+
+    def _check(self):
+        self._checked_at = time.monotonic()
+        try:
+            self.lag = self._measure_lag()
+            self.error = None
+            self.healthy = self.lag <= self.max_lag
+            if not self.healthy:
+                logger.warning(f"Read replica lagging {self.lag:.1f}s, reading from primary")
+        except Exception as e:
+            self.lag = None
+            self.error = str(e)
+            self.healthy = False
+            logger.warning(f"Read replica unavailable, reading from primary: {str(e)}")
+
+    def _measure_lag(self) -> float:
+        with self.engine.connect() as connection:
+            if connection.dialect.name != "postgresql":
+                # No replication to measure; reachable is good enough
+                connection.execute(text("SELECT 1"))
+                return 0.0
+            # A replica that has replayed everything it received is current even if the primary is idle
+            return float(connection.execute(text(
+                "SELECT CASE WHEN NOT pg_is_in_recovery() "
+                "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                "ELSE coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+            )).scalar())
+
+replica_guard = ReplicaGuard(read_engine) if read_engine is not None else None
+
 Base = declarative_base()
 
 def get_db():
@@ -21,3 +158,34 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def get_read_db():
+    """
+    Session for read-only routes: the replica when one is configured and
+    fresh enough, otherwise the primary. Never write through it.
+    """
+    use_replica = replica_guard is not None and replica_guard.is_usable()
+    db = ReadSessionLocal() if use_replica else SessionLocal()
+    try:
+        yield db
+    except OperationalError as e:
+        if use_replica:
+            replica_guard.mark_down(e)
+        raise
+    finally:
+        db.close()
+
+def is_replica(db) -> bool:
+    """Whether a session from get_read_db is reading from the replica"""
+    return read_engine is not None and db.get_bind() is read_engine
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def upgrade_database(revision: str = "head"):
+    """Applies Alembic migrations up to `revision` (same as `alembic -c backend/alembic.ini upgrade head`)"""
+    from alembic import command
+    from alembic.config import Config
+
+    command.upgrade(Config(os.path.join(os.path.dirname(__file__), "alembic.ini")), revision)
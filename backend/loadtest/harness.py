@@ -0,0 +1,328 @@
+"""
+End-to-end load harness.
+
+Boots the FastAPI app in-process (or targets a running server with
+--base-url) against whatever DATABASE_URL points at, seeds a campaign, and
+drives a weighted mix of traffic from concurrent async clients:
+
+    ingest     - bursts of POST /api/webhooks/incoming/{key}
+    dashboard  - dashboard stats, overview and time series
+    leads      - paging through /api/campaigns/{id}/leads
+    export     - pre-built CSV.gz downloads
+
+Reports throughput, latency percentiles and error rates per route and
+compares them with a stored baseline:
+
+    ENVIRONMENT=development DATABASE_URL=sqlite:////tmp/load.db \\
+        python -m backend.loadtest.harness \\
+        --duration 30 --concurrency 32 --mix ingest=50,dashboard=20,leads=25,export=5
+
+Pass --record to overwrite the baseline with this run's numbers.
+
+In-process runs turn off the receiver's load shedding, since the harness
+measures capacity and a shed delivery is a 503 that would count as an
+error; pass --shed to keep it on and see how the server behaves when
+overloaded. A server targeted with --base-url keeps its own settings.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+import httpx
+from sqlalchemy import insert
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+DEFAULT_MIX = "ingest=50,dashboard=20,leads=25,export=5"
+# Allowed drift from the baseline before a route is reported as a regression
+DEFAULT_TOLERANCE = 0.25
+# Routes with fewer requests than this (in the run or the baseline) are too noisy to compare
+MIN_SAMPLES = 100
+
+
+class Recorder:
+    """Latencies and outcomes per route label"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def record(self, route: str, seconds: float, ok: bool):
+        self.samples.setdefault(route, []).append(seconds)
+        if not ok:
+            self.errors[route] = self.errors.get(route, 0) + 1
+
+    def summary(self, elapsed: float) -> Dict[str, Dict[str, float]]:
+        report = {}
+        for route, latencies in sorted(self.samples.items()):
+            latencies = sorted(latencies)
+            report[route] = {
+                "requests": len(latencies),
+                "rps": round(len(latencies) / elapsed, 2),
+                "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+                "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+                "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+                "max_ms": round(latencies[-1] * 1000, 2),
+                "error_rate": round(self.errors.get(route, 0) / len(latencies), 4)
+            }
+        return report
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    # Nearest-rank percentile
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+# ============ Fixtures ============
+
+def seed(leads: int) -> Dict[str, Any]:
+    """Creates a campaign with `leads` leads, a webhook endpoint and a public link"""
+    from ..database import Base, SessionLocal, engine
+    from ..models import Campaign, Lead, LinkTypeEnum, PublicLink, WebhookEndpoint
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        campaign = Campaign(name=f"Load test {uuid.uuid4().hex[:8]}")
+        db.add(campaign)
+        db.flush()
+        endpoint = WebhookEndpoint(
+            campaign_id=campaign.id, key=str(uuid.uuid4()), secret=uuid.uuid4().hex, name="Load test",
+            # Measure ingest capacity, not the key's rate limit
+            rate_limit_per_minute=0
+        )
+        link = PublicLink(campaign_id=campaign.id, uuid=str(uuid.uuid4()), type=LinkTypeEnum.CSV)
+        db.add_all([endpoint, link])
+        for start in range(0, leads, 5000):
+            db.execute(insert(Lead), [
+                {
+                    "campaign_id": campaign.id,
+                    "email": f"seed{n}@example.com",
+                    "full_name": f"Seed {n}",
+                    "status": random.choice(["new", "contacted", "qualified"]),
+                    "source": "seed"
+                }
+                for n in range(start, min(start + 5000, leads))
+            ])
+        db.commit()
+        return {
+            "campaign_id": campaign.id,
+            "webhook_key": endpoint.key,
+            "webhook_secret": endpoint.secret,
+            "link_uuid": link.uuid,
+            "leads": leads
+        }
+    finally:
+        db.close()
+
+
+# ============ Scenarios ============
+
+async def _request(client: httpx.AsyncClient, recorder: Recorder, route: str, method: str, url: str, **kwargs):
+    started = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+        # Read the body so streamed downloads are timed in full
+        await response.aread()
+        ok = response.status_code < 400
+    except Exception:
+        ok = False
+    recorder.record(route, time.perf_counter() - started, ok)
+
+
+async def ingest(client, recorder, fixture, burst: int):
+    payloads = [
+        {"email": f"load-{uuid.uuid4().hex[:12]}@example.com", "full_name": "Load Test", "phone": "+15550100"}
+        for _ in range(burst)
+    ]
+    await asyncio.gather(*[
+        _request(client, recorder, "POST /api/webhooks/incoming/{key}", "POST",
+                 f"/api/webhooks/incoming/{fixture['webhook_key']}",
+                 params={"secret": fixture["webhook_secret"]}, json=payload)
+        for payload in payloads
+    ])
+
+
+async def dashboard(client, recorder, fixture, burst: int):
+    path = random.choice([
+        "/api/dashboard/stats",
+        "/api/dashboard/campaigns-overview",
+        "/api/dashboard/leads-over-time",
+        f"/api/campaigns/{fixture['campaign_id']}/leads-over-time",
+    ])
+    route = path.replace(f"/{fixture['campaign_id']}/", "/{campaign_id}/")
+    await _request(client, recorder, f"GET {route}", "GET", path)
+
+
+async def leads(client, recorder, fixture, burst: int):
+    skip = random.randrange(0, max(1, fixture["leads"] - 50))
+    await _request(client, recorder, "GET /api/campaigns/{campaign_id}/leads", "GET",
+                   f"/api/campaigns/{fixture['campaign_id']}/leads", params={"skip": skip, "limit": 50})
+
+
+async def export(client, recorder, fixture, burst: int):
+    if random.random() < 0.5:
+        await _request(client, recorder, "GET /api/campaigns/{campaign_id}/exports/{fmt}", "GET",
+                       f"/api/campaigns/{fixture['campaign_id']}/exports/csv.gz")
+    else:
+        await _request(client, recorder, "GET /api/public-links/{uuid}/csv", "GET",
+                       f"/api/public-links/{fixture['link_uuid']}/csv")
+
+
+SCENARIOS = {"ingest": ingest, "dashboard": dashboard, "leads": leads, "export": export}
+
+
+def parse_mix(mix: str) -> List[Tuple[str, float]]:
+    weights = []
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario '{name}', expected one of {', '.join(SCENARIOS)}")
+        weights.append((name, float(weight or 1)))
+    return weights
+
+
+# ============ Runner ============
+
+async def run(duration: float, concurrency: int, mix: List[Tuple[str, float]], burst: int,
+              fixture: Dict[str, Any], base_url: Optional[str] = None, shed: bool = False) -> Dict[str, Any]:
+    if base_url:
+        transport = None
+    else:
+        from ..main import app
+        from ..rate_limit import webhook_rate_limiter
+        # Every in-process request comes from one client address; don't let the per-IP limit cap the run
+        webhook_rate_limiter.ip_per_minute = 0
+        if not shed:
+            # Measure capacity: deliveries queue on the pool instead of being turned away with 503s
+            webhook_rate_limiter.max_in_flight = 0
+            webhook_rate_limiter.shed_pool_waiting = 0
+            webhook_rate_limiter.shed_pool_wait_ms = 0
+        transport = httpx.ASGITransport(app=app)
+
+    recorder = Recorder()
+    names = [name for name, _ in mix]
+    weights = [weight for _, weight in mix]
+    limits = httpx.Limits(max_connections=concurrency * max(1, burst))
+
+    async with httpx.AsyncClient(transport=transport, base_url=base_url or "http://loadtest",
+                                 limits=limits, timeout=60) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                scenario = SCENARIOS[random.choices(names, weights)[0]]
+                await scenario(client, recorder, fixture, burst)
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - started
+
+    total = sum(len(samples) for samples in recorder.samples.values())
+    return {
+        "config": {
+            "duration": duration,
+            "concurrency": concurrency,
+            "burst": burst,
+            "mix": dict(mix),
+            "database": os.getenv("DATABASE_URL", "").split("://")[0],
+            "leads": fixture["leads"],
+            "shed": shed
+        },
+        "total_requests": total,
+        "total_rps": round(total / elapsed, 2),
+        "routes": recorder.summary(elapsed)
+    }
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any], tolerance: float,
+            min_samples: int = MIN_SAMPLES) -> List[str]:
+    """
+    Returns a line per route that regressed beyond `tolerance` against the
+    baseline. Routes with fewer than `min_samples` requests on either side
+    are skipped; print_report() flags them.
+    """
+    regressions = []
+    for route, expected in baseline.get("routes", {}).items():
+        actual = result["routes"].get(route)
+        if not actual or min(actual["requests"], expected["requests"]) < min_samples:
+            continue
+        if actual["p95_ms"] > expected["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{route}: p95 {actual['p95_ms']}ms vs baseline {expected['p95_ms']}ms")
+        if actual["rps"] < expected["rps"] * (1 - tolerance):
+            regressions.append(f"{route}: {actual['rps']} req/s vs baseline {expected['rps']} req/s")
+        if actual["error_rate"] > expected["error_rate"] + 0.01:
+            regressions.append(f"{route}: error rate {actual['error_rate']} vs baseline {expected['error_rate']}")
+    return regressions
+
+
+def print_report(result: Dict[str, Any], baseline: Optional[Dict[str, Any]], min_samples: int = MIN_SAMPLES):
+    print(f"{result['total_requests']} requests, {result['total_rps']} req/s")
+    if baseline and baseline.get("config") != result["config"]:
+        print(f"Note: baseline was recorded with a different config: {json.dumps(baseline.get('config'))}")
+    header = f"{'route':<52} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'err%':>6} {'p95 vs base':>12}"
+    print(header)
+    print("-" * len(header))
+    for route, stats in result["routes"].items():
+        expected = (baseline or {}).get("routes", {}).get(route)
+        delta = f"{(stats['p95_ms'] / expected['p95_ms'] - 1) * 100:+.0f}%" if expected and expected["p95_ms"] else "-"
+        if expected and min(stats["requests"], expected["requests"]) < min_samples:
+            delta = "few samples"
+        print(f"{route:<52} {stats['rps']:>8} {stats['p50_ms']:>8} {stats['p95_ms']:>8} "
+              f"{stats['p99_ms']:>8} {stats['error_rate'] * 100:>6.2f} {delta:>12}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the API with a mix of ingest and read traffic")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent clients")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Scenario weights, e.g. ingest=50,dashboard=20")
+    parser.add_argument("--burst", type=int, default=5, help="Webhook posts sent at once per ingest step")
+    parser.add_argument("--leads", type=int, default=20000, help="Leads to seed into the test campaign")
+    parser.add_argument("--base-url", help="Target a running server instead of booting the app in-process")
+    parser.add_argument("--shed", action="store_true",
+                        help="Keep webhook load shedding on (in-process only); 503s then count as errors")
+    parser.add_argument("--baseline", default=os.path.join(BASELINE_DIR, "sqlite.json"), help="Baseline file")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed drift (0.25 = 25%%)")
+    parser.add_argument("--min-samples", type=int, default=MIN_SAMPLES,
+                        help="Skip routes with fewer requests than this when comparing")
+    parser.add_argument("--record", action="store_true", help="Save this run as the new baseline")
+    parser.add_argument("--output", help="Also write the full result as JSON here")
+    args = parser.parse_args(argv)
+
+    fixture = seed(args.leads)
+    result = asyncio.run(run(args.duration, args.concurrency, parse_mix(args.mix), args.burst, fixture,
+                             args.base_url, args.shed))
+
+    baseline = None
+    if os.path.exists(args.baseline) and not args.record:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(result, baseline, args.min_samples)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.record:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if baseline:
+        regressions = compare(result, baseline, args.tolerance, args.min_samples)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,18 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from database import engine, Base
+import asyncio
+import os
+from .database import async_engine, upgrade_database
+from . import models  # Registers the tables on Base.metadata
+from .metrics import MetricsMiddleware, registry
+from .query_inspector import QueryInspectorMiddleware, SQL_QUERY_INSPECTOR
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+# Schema changes ship as Alembic migrations: alembic -c backend/alembic.ini upgrade head
+DB_AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "false").lower() == "true"
+# Scheduled integration health checks; turn off in workers that shouldn't run them
+INTEGRATION_MONITOR = os.getenv("INTEGRATION_MONITOR", "true").lower() == "true"
+# Incremental Meta lead polling every META_SYNC_INTERVAL_SECONDS; turn off in workers that shouldn't run it
+META_LEAD_SYNC = os.getenv("META_LEAD_SYNC", "true").lower() == "true"
 
 app = FastAPI(title="Campaign Lead Automation API")
 
@@ -14,15 +23,53 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
+if SQL_QUERY_INSPECTOR:
+    # Dev only: logs repeated statements (N+1 loops) per request
+    app.add_middleware(QueryInspectorMiddleware)
+# Outermost, so timings include every other middleware
+app.add_middleware(MetricsMiddleware)
+
+from .services.export_service import export_service
+from .services.meta_service import meta_service
+from .services.event_retention import webhook_event_retention
+from .services.lead_tiering import lead_tiering_service
+from .services.cache_bus import cache_bus
+from .services.audit_log import audit_log
+from .services.integration_monitor import monitor
+from .services.meta_lead_sync import meta_lead_sync
+from .services import config_cache  # Subscribes the config caches to the cache bus
 
 @app.on_event("startup")
 async def startup_event():
-    # In a real app, we would start the monitor here
-    # asyncio.create_task(monitor.start())
-    pass
+    if DB_AUTO_MIGRATE:
+        # Local convenience; with several workers, migrate once before starting them instead
+        await asyncio.to_thread(upgrade_database)
+    if INTEGRATION_MONITOR:
+        asyncio.create_task(monitor.start())
+    if META_LEAD_SYNC:
+        asyncio.create_task(meta_lead_sync.start())
+    asyncio.create_task(export_service.start())
+    asyncio.create_task(webhook_event_retention.start())
+    asyncio.create_task(lead_tiering_service.start())
+    cache_bus.start()
+    audit_log.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    monitor.stop()
+    meta_lead_sync.stop()
+    export_service.stop()
+    webhook_event_retention.stop()
+    lead_tiering_service.stop()
+    cache_bus.stop()
+    await meta_service.close()
+    # Last, so entries logged while the other services wound down are written too
+    await asyncio.to_thread(audit_log.stop)
+    await async_engine.dispose()
 
-from routes import integrations, campaigns, automations, public_links, webhooks, dashboard, campaign_detail
+from .routes import integrations, campaigns, automations, public_links, webhooks, dashboard, campaign_detail, exports, imports, leads, jobs, metrics
 
 app.include_router(integrations.router)
 app.include_router(campaigns.router)
@@ -31,6 +78,11 @@ app.include_router(public_links.router)
 app.include_router(webhooks.router)
 app.include_router(dashboard.router)
 app.include_router(campaign_detail.router)
+app.include_router(exports.router)
+app.include_router(imports.router)
+app.include_router(leads.router)
+app.include_router(jobs.router)
+app.include_router(metrics.router)
 
 @app.get("/")
 def read_root():
@@ -39,3 +91,8 @@ def read_root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Prometheus text exposition of request, SQL, ingest and pool metrics"""
+    return Response(registry.render(), media_type="text/plain; version=0.0.4")
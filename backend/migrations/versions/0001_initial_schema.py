@@ -0,0 +1,229 @@
+"""Initial schema and composite indexes for the hot queries
+
+Databases created by the old `create_all` at startup are brought up to date
+in place: tables and columns that already exist are left alone, missing ones
+are added, and every index is created only if absent. New databases get the
+full schema.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Added to existing tables after they were first created by create_all
+ADDED_COLUMNS = {
+    "campaigns": [
+        lambda: sa.Column("owner", sa.String(), nullable=True),
+        lambda: sa.Column("source", sa.String(), nullable=True),
+        lambda: sa.Column("data_version", sa.Integer(), server_default="0", nullable=False),
+    ],
+    "leads": [
+        lambda: sa.Column("external_id", sa.String(), nullable=True),
+    ],
+}
+
+# (name, table, columns, unique)
+INDEXES = [
+    ("ix_users_id", "users", ["id"], False),
+    ("ix_users_email", "users", ["email"], True),
+    ("ix_campaigns_id", "campaigns", ["id"], False),
+    ("ix_campaigns_name", "campaigns", ["name"], False),
+    ("ix_leads_id", "leads", ["id"], False),
+    ("ix_leads_email", "leads", ["email"], False),
+    ("ix_leads_phone", "leads", ["phone"], False),
+    ("ix_leads_external_id", "leads", ["external_id"], False),
+    ("ix_leads_campaign_created", "leads", ["campaign_id", "created_at"], False),
+    ("ix_leads_campaign_status", "leads", ["campaign_id", "status"], False),
+    ("ix_leads_created_at", "leads", ["created_at"], False),
+    ("ix_lead_status_changes_id", "lead_status_changes", ["id"], False),
+    ("ix_lead_status_changes_batch_id", "lead_status_changes", ["batch_id"], False),
+    ("ix_lead_status_changes_lead_changed", "lead_status_changes", ["lead_id", "changed_at"], False),
+    ("ix_webhook_endpoints_id", "webhook_endpoints", ["id"], False),
+    ("ix_webhook_endpoints_key", "webhook_endpoints", ["key"], True),
+    ("ix_webhook_events_id", "webhook_events", ["id"], False),
+    ("ix_webhook_events_endpoint_created", "webhook_events", ["endpoint_id", "created_at"], False),
+    ("ix_webhook_events_created_at", "webhook_events", ["created_at"], False),
+    ("ix_integrations_id", "integrations", ["id"], False),
+    ("ix_integration_status_id", "integration_status", ["id"], False),
+    ("ix_sync_logs_id", "sync_logs", ["id"], False),
+    ("ix_automations_id", "automations", ["id"], False),
+    ("ix_automations_campaign_trigger_active", "automations", ["campaign_id", "trigger_type", "is_active"], False),
+    ("ix_public_links_id", "public_links", ["id"], False),
+    ("ix_public_links_uuid", "public_links", ["uuid"], True),
+    ("ix_activity_logs_id", "activity_logs", ["id"], False),
+]
+
+
+def _created_at(name="created_at"):
+    return sa.Column(name, sa.DateTime(timezone=True), server_default=sa.func.now())
+
+
+def _tables():
+    """Table definitions in dependency order"""
+    return [
+        ("users", [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("email", sa.String()),
+            sa.Column("hashed_password", sa.String()),
+            sa.Column("full_name", sa.String()),
+            sa.Column("is_active", sa.Boolean()),
+            _created_at(),
+        ]),
+        ("campaigns", [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String()),
+            sa.Column("description", sa.String(), nullable=True),
+            sa.Column("status", sa.String()),
+            sa.Column("owner", sa.String(), nullable=True),
+            sa.Column("source", sa.String(), nullable=True),
+            sa.Column("data_version", sa.Integer(), server_default="0", nullable=False),
+            _created_at(),
+        ]),
+        ("leads", [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("campaign_id", sa.Integer(), sa.ForeignKey("campaigns.id")),
+            sa.Column("email", sa.String(), nullable=True),
+            sa.Column("phone", sa.String(), nullable=True),
+            sa.Column("full_name", sa.String(), nullable=True),
+            sa.Column("status", sa.String()),
+            sa.Column("source", sa.String(), nullable=True),
+            sa.Column("external_id", sa.String(), nullable=True),
+            sa.Column("data", sa.JSON(), nullable=True),
+            _created_at(),
+        ]),
+        ("lead_status_changes", [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("batch_id", sa.String()),
+            sa.Column("lead_id", sa.Integer(), sa.ForeignKey("leads.id")),
+            sa.Column("campaign_id", sa.Integer(), sa.ForeignKey("campaigns.id")),
+            sa.Column("from_status", sa.String(), nullable=True),
+            sa.Column("to_status", sa.String()),
+            _created_at("changed_at"),
+        ]),
+        ("webhook_endpoints", [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("campaign_id", sa.Integer(), sa.ForeignKey("campaigns.id")),
+            sa.Column("key", sa.String()),
+            sa.Column("secret", sa.String()),
+            sa.Column("name", sa.String()),
+            sa.Column("field_mapping", sa.JSON(), nullable=True),
+            sa.Column("is_active", sa.Boolean()),
+            sa.Column("last_received_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("total_received", sa.Integer()),
+            _created_at(),
+        ]),
+        ("webhook_events", [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("endpoint_id", sa.Integer(), sa.ForeignKey("webhook_endpoints.id")),
+            sa.Column("payload", sa.JSON()),
+            sa.Column("normalized_data", sa.JSON()),
+            sa.Column("lead_id", sa.Integer(), sa.ForeignKey("leads.id"), nullable=True),
+            sa.Column("status", sa.String()),
+            sa.Column("error_message", sa.Text(), nullable=True),
+            _created_at(),
+        ]),
+        ("integrations", [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("campaign_id", sa.Integer(), sa.ForeignKey("campaigns.id"), nullable=True),
+            sa.Column("type", sa.String()),
+            sa.Column("name", sa.String()),
+            sa.Column("config", sa.JSON(), nullable=True),
+            sa.Column("is_active", sa.Boolean()),
+            _created_at(),
+        ]),
+        ("integration_status", [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("integration_id", sa.Integer(), sa.ForeignKey("integrations.id"), unique=True),
+            sa.Column("status", sa.Enum("CONNECTED", "DISCONNECTED", "WARNING", name="integrationstatusenum")),
+            sa.Column("status_text", sa.String(), nullable=True),
+            sa.Column("last_sync_time", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("next_sync_time", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("error_count", sa.Integer()),
+            sa.Column("last_error_message", sa.Text(), nullable=True),
+            _created_at("updated_at"),
+        ]),
+        ("sync_logs", [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("integration_id", sa.Integer(), sa.ForeignKey("integrations.id")),
+            sa.Column("status", sa.String()),
+            sa.Column("message", sa.Text(), nullable=True),
+            sa.Column("details", sa.JSON(), nullable=True),
+            _created_at(),
+        ]),
+        ("automations", [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("campaign_id", sa.Integer(), sa.ForeignKey("campaigns.id")),
+            sa.Column("name", sa.String()),
+            sa.Column("trigger_type", sa.String()),
+            sa.Column("trigger_config", sa.JSON(), nullable=True),
+            sa.Column("actions", sa.JSON()),
+            sa.Column("is_active", sa.Boolean()),
+            _created_at(),
+        ]),
+        ("public_links", [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("campaign_id", sa.Integer(), sa.ForeignKey("campaigns.id")),
+            sa.Column("uuid", sa.String()),
+            sa.Column("type", sa.Enum("DASHBOARD", "CSV", name="linktypeenum")),
+            sa.Column("password_hash", sa.String(), nullable=True),
+            sa.Column("expires_at", sa.DateTime(timezone=True), nullable=True),
+            _created_at(),
+        ]),
+        ("activity_logs", [
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+            sa.Column("action", sa.String()),
+            sa.Column("resource_type", sa.String()),
+            sa.Column("resource_id", sa.String(), nullable=True),
+            sa.Column("details", sa.JSON(), nullable=True),
+            _created_at(),
+        ]),
+        ("cache_versions", [
+            sa.Column("topic", sa.String(), primary_key=True),
+            sa.Column("version", sa.Integer(), server_default="0", nullable=False),
+            _created_at("updated_at"),
+        ]),
+    ]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    existing_tables = set(inspector.get_table_names())
+
+    for name, columns in _tables():
+        if name not in existing_tables:
+            op.create_table(name, *columns)
+
+    for table, factories in ADDED_COLUMNS.items():
+        if table not in existing_tables:
+            continue
+        present = {column["name"] for column in inspector.get_columns(table)}
+        missing = [column for column in (factory() for factory in factories) if column.name not in present]
+        if missing:
+            with op.batch_alter_table(table) as batch:
+                for column in missing:
+                    batch.add_column(column)
+
+    inspector = sa.inspect(op.get_bind())
+    for name, table, columns, unique in INDEXES:
+        present = {index["name"] for index in inspector.get_indexes(table)}
+        if name not in present:
+            op.create_index(name, table, columns, unique=unique)
+
+
+def downgrade():
+    for name, table, columns, unique in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
+    for name, columns in reversed(_tables()):
+        op.drop_table(name)
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        sa.Enum(name="linktypeenum").drop(bind, checkfirst=True)
+        sa.Enum(name="integrationstatusenum").drop(bind, checkfirst=True)
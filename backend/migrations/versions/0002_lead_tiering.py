@@ -0,0 +1,86 @@
+"""Cold tier for leads: leads_archive and lead_rollups
+
+Also drops the lead_status_changes.lead_id foreign key, since a recorded
+change can outlive the hot row once the lead is archived.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def _status_changes(lead_fk: bool) -> sa.Table:
+    lead_id = sa.Column("lead_id", sa.Integer(), sa.ForeignKey("leads.id")) if lead_fk else sa.Column("lead_id", sa.Integer())
+    return sa.Table(
+        "lead_status_changes", sa.MetaData(),
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("batch_id", sa.String()),
+        lead_id,
+        sa.Column("campaign_id", sa.Integer(), sa.ForeignKey("campaigns.id")),
+        sa.Column("from_status", sa.String(), nullable=True),
+        sa.Column("to_status", sa.String()),
+        sa.Column("changed_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Index("ix_lead_status_changes_id", "id"),
+        sa.Index("ix_lead_status_changes_batch_id", "batch_id"),
+        sa.Index("ix_lead_status_changes_lead_changed", "lead_id", "changed_at"),
+    )
+
+
+def upgrade():
+    op.create_table(
+        "leads_archive",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("campaign_id", sa.Integer(), sa.ForeignKey("campaigns.id")),
+        sa.Column("email", sa.String(), nullable=True),
+        sa.Column("phone", sa.String(), nullable=True),
+        sa.Column("full_name", sa.String(), nullable=True),
+        sa.Column("status", sa.String()),
+        sa.Column("source", sa.String(), nullable=True),
+        sa.Column("external_id", sa.String(), nullable=True),
+        sa.Column("data", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True)),
+        sa.Column("archived_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_leads_archive_campaign_created", "leads_archive", ["campaign_id", "created_at"])
+
+    op.create_table(
+        "lead_rollups",
+        sa.Column("campaign_id", sa.Integer(), sa.ForeignKey("campaigns.id"), primary_key=True),
+        sa.Column("day", sa.DateTime(timezone=True), primary_key=True),
+        sa.Column("status", sa.String(), primary_key=True),
+        sa.Column("leads", sa.Integer(), server_default="0", nullable=False),
+    )
+
+    bind = op.get_bind()
+    if bind.dialect.name == "sqlite":
+        # SQLite can't drop a constraint in place; rebuild the table without it
+        with op.batch_alter_table(
+            "lead_status_changes", recreate="always", copy_from=_status_changes(lead_fk=False)
+        ):
+            pass
+    else:
+        for fk in sa.inspect(bind).get_foreign_keys("lead_status_changes"):
+            if fk["referred_table"] == "leads" and fk.get("name"):
+                op.drop_constraint(fk["name"], "lead_status_changes", type_="foreignkey")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "sqlite":
+        with op.batch_alter_table(
+            "lead_status_changes", recreate="always", copy_from=_status_changes(lead_fk=True)
+        ):
+            pass
+    else:
+        op.create_foreign_key(
+            "lead_status_changes_lead_id_fkey", "lead_status_changes", "leads", ["lead_id"], ["id"]
+        )
+    op.drop_table("lead_rollups")
+    op.drop_index("ix_leads_archive_campaign_created", table_name="leads_archive")
+    op.drop_table("leads_archive")
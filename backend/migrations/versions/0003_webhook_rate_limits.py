@@ -0,0 +1,25 @@
+"""Per-endpoint rate limits for the webhook receiver
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("webhook_endpoints") as batch:
+        batch.add_column(sa.Column("rate_limit_per_minute", sa.Integer(), nullable=True))
+        batch.add_column(sa.Column("rate_limit_burst", sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("webhook_endpoints") as batch:
+        batch.drop_column("rate_limit_burst")
+        batch.drop_column("rate_limit_per_minute")
@@ -0,0 +1,22 @@
+"""Index lead_status_changes by campaign and time for funnel analytics
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_lead_status_changes_campaign_changed", "lead_status_changes", ["campaign_id", "changed_at"]
+    )
+
+
+def downgrade():
+    op.drop_index("ix_lead_status_changes_campaign_changed", table_name="lead_status_changes")
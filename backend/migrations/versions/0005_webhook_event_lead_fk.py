@@ -0,0 +1,54 @@
+"""Drop the webhook_events.lead_id foreign key
+
+An event keeps pointing at its lead after the lead moves to leads_archive,
+the same as lead_status_changes in 0002.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def _webhook_events(lead_fk: bool) -> sa.Table:
+    lead_id = sa.Column("lead_id", sa.Integer(), sa.ForeignKey("leads.id") if lead_fk else None, nullable=True)
+    return sa.Table(
+        "webhook_events", sa.MetaData(),
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("endpoint_id", sa.Integer(), sa.ForeignKey("webhook_endpoints.id")),
+        sa.Column("payload", sa.JSON()),
+        sa.Column("normalized_data", sa.JSON()),
+        lead_id,
+        sa.Column("status", sa.String()),
+        sa.Column("error_message", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Index("ix_webhook_events_id", "id"),
+        sa.Index("ix_webhook_events_endpoint_created", "endpoint_id", "created_at"),
+        sa.Index("ix_webhook_events_created_at", "created_at"),
+    )
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == "sqlite":
+        # SQLite can't drop a constraint in place; rebuild the table without it
+        with op.batch_alter_table("webhook_events", recreate="always", copy_from=_webhook_events(lead_fk=False)):
+            pass
+    else:
+        for fk in sa.inspect(bind).get_foreign_keys("webhook_events"):
+            if fk["referred_table"] == "leads" and fk.get("name"):
+                op.drop_constraint(fk["name"], "webhook_events", type_="foreignkey")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "sqlite":
+        with op.batch_alter_table("webhook_events", recreate="always", copy_from=_webhook_events(lead_fk=True)):
+            pass
+    else:
+        op.create_foreign_key("webhook_events_lead_id_fkey", "webhook_events", "leads", ["lead_id"], ["id"])
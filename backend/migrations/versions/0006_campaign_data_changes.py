@@ -0,0 +1,44 @@
+"""Move campaign data versions into campaign_data_changes
+
+Bumping campaigns.data_version made every lead write take the campaign row
+lock, serializing concurrent webhook ingest per campaign. Versions are now
+the sum of insert-only rows; existing versions carry over as one row each.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "campaign_data_changes",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("campaign_id", sa.Integer(), sa.ForeignKey("campaigns.id"), nullable=False),
+        sa.Column("changes", sa.Integer(), server_default="1", nullable=False),
+    )
+    op.create_index("ix_campaign_data_changes_campaign", "campaign_data_changes", ["campaign_id", "changes"])
+    op.execute(
+        "INSERT INTO campaign_data_changes (campaign_id, changes) "
+        "SELECT id, data_version FROM campaigns WHERE data_version > 0"
+    )
+    with op.batch_alter_table("campaigns") as batch:
+        batch.drop_column("data_version")
+
+
+def downgrade():
+    with op.batch_alter_table("campaigns") as batch:
+        batch.add_column(sa.Column("data_version", sa.Integer(), server_default="0", nullable=False))
+    op.execute(
+        "UPDATE campaigns SET data_version = coalesce(("
+        "SELECT sum(changes) FROM campaign_data_changes WHERE campaign_data_changes.campaign_id = campaigns.id), 0)"
+    )
+    op.drop_index("ix_campaign_data_changes_campaign", table_name="campaign_data_changes")
+    op.drop_table("campaign_data_changes")
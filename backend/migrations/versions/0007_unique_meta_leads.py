@@ -0,0 +1,33 @@
+"""Make synced Meta leads unique per campaign
+
+Overlapping syncs of one integration could both insert the same Meta leads.
+Duplicates already stored are removed (keeping the first copy) before the
+partial unique index on (campaign_id, source, external_id) is created.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        "DELETE FROM leads WHERE source = 'meta' AND external_id IS NOT NULL AND id NOT IN ("
+        "SELECT MIN(id) FROM leads WHERE source = 'meta' AND external_id IS NOT NULL "
+        "GROUP BY campaign_id, external_id)"
+    )
+    op.create_index(
+        "uq_leads_campaign_source_external_id", "leads", ["campaign_id", "source", "external_id"], unique=True,
+        postgresql_where=sa.text("source = 'meta'"), sqlite_where=sa.text("source = 'meta'")
+    )
+
+
+def downgrade():
+    op.drop_index("uq_leads_campaign_source_external_id", table_name="leads")
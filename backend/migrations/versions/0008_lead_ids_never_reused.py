@@ -0,0 +1,77 @@
+"""Never reuse lead ids on SQLite
+
+Without AUTOINCREMENT, SQLite hands out max(id) + 1, so ids freed when
+tiering moves leads to leads_archive were given to new leads, and the next
+tiering run failed on the archive's primary key. The leads table is rebuilt
+with AUTOINCREMENT and its sequence starts above both tiers. PostgreSQL
+sequences never go back, so nothing changes there.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def _leads(autoincrement: bool) -> sa.Table:
+    return sa.Table(
+        "leads", sa.MetaData(),
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("campaign_id", sa.Integer(), sa.ForeignKey("campaigns.id")),
+        sa.Column("email", sa.String(), nullable=True),
+        sa.Column("phone", sa.String(), nullable=True),
+        sa.Column("full_name", sa.String(), nullable=True),
+        sa.Column("status", sa.String()),
+        sa.Column("source", sa.String(), nullable=True),
+        sa.Column("external_id", sa.String(), nullable=True),
+        sa.Column("data", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sqlite_autoincrement=autoincrement,
+    )
+
+
+# Created one by one after the rebuild: Table.indexes is a set, and SQLite
+# breaks ties between equally good indexes by the order they were created in
+_INDEXES = [
+    ("ix_leads_id", ["id"], {}),
+    ("ix_leads_email", ["email"], {}),
+    ("ix_leads_phone", ["phone"], {}),
+    ("ix_leads_external_id", ["external_id"], {}),
+    ("ix_leads_campaign_created", ["campaign_id", "created_at"], {}),
+    ("ix_leads_campaign_status", ["campaign_id", "status"], {}),
+    ("ix_leads_created_at", ["created_at"], {}),
+    (
+        "uq_leads_campaign_source_external_id", ["campaign_id", "source", "external_id"],
+        {"unique": True, "sqlite_where": sa.text("source = 'meta'")},
+    ),
+]
+
+
+def _rebuild(autoincrement: bool):
+    with op.batch_alter_table("leads", recreate="always", copy_from=_leads(autoincrement)):
+        pass
+    for name, columns, kwargs in _INDEXES:
+        op.create_index(name, "leads", columns, **kwargs)
+
+
+def upgrade():
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    _rebuild(autoincrement=True)
+    op.execute("DELETE FROM sqlite_sequence WHERE name = 'leads'")
+    op.execute(
+        "INSERT INTO sqlite_sequence (name, seq) SELECT 'leads', max(coalesce(max(leads.id), 0), "
+        "(SELECT coalesce(max(id), 0) FROM leads_archive)) FROM leads"
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    _rebuild(autoincrement=False)
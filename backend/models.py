@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Enum, Text, JSON
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Enum, Text, JSON, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -30,6 +30,8 @@ class Campaign(Base):
     name = Column(String, index=True)
     description = Column(String, nullable=True)
     status = Column(String, default="active")
+    owner = Column(String, nullable=True)
+    source = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     leads = relationship("Lead", back_populates="campaign")
@@ -38,6 +40,20 @@ class Campaign(Base):
     public_links = relationship("PublicLink", back_populates="campaign")
     webhook_endpoints = relationship("WebhookEndpoint", back_populates="campaign")
 
+# One row per write to a campaign's leads; the campaign's data version is the sum of `changes`.
+# Writers only insert, so concurrent lead writes never wait on a shared row lock.
+class CampaignDataChange(Base):
+    __tablename__ = "campaign_data_changes"
+
+    id = Column(Integer, primary_key=True)
+    campaign_id = Column(Integer, ForeignKey("campaigns.id"), nullable=False)
+    changes = Column(Integer, default=1, server_default="1", nullable=False)
+
+    __table_args__ = (
+        # Covers the per-campaign sum read on every cached request
+        Index("ix_campaign_data_changes_campaign", "campaign_id", "changes"),
+    )
+
 class Lead(Base):
     __tablename__ = "leads"
 
@@ -48,11 +64,76 @@ class Lead(Base):
     full_name = Column(String, nullable=True)
     status = Column(String, default="new")
     source = Column(String, nullable=True) # e.g., "meta", "webhook", "manual"
+    external_id = Column(String, index=True, nullable=True) # Lead id in the source system, for dedup
     data = Column(JSON, nullable=True) # Flexible field for extra data
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     campaign = relationship("Campaign", back_populates="leads")
 
+    __table_args__ = (
+        # Per-campaign lead lists and time series, newest first
+        Index("ix_leads_campaign_created", "campaign_id", "created_at"),
+        # Per-campaign status breakdowns and status filters
+        Index("ix_leads_campaign_status", "campaign_id", "status"),
+        # Dashboard-wide time windows (leads today, leads over time)
+        Index("ix_leads_created_at", "created_at"),
+        # One row per synced Meta lead, however many syncs overlap; imports may repeat external ids
+        Index(
+            "uq_leads_campaign_source_external_id", "campaign_id", "source", "external_id", unique=True,
+            postgresql_where=text("source = 'meta'"), sqlite_where=text("source = 'meta'")
+        ),
+        # Ids of leads moved to leads_archive must never be handed out again
+        {"sqlite_autoincrement": True},
+    )
+
+class LeadArchive(Base):
+    """Cold tier for leads: same columns and ids, moved here by the lead tiering job"""
+    __tablename__ = "leads_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    campaign_id = Column(Integer, ForeignKey("campaigns.id"))
+    email = Column(String, nullable=True)
+    phone = Column(String, nullable=True)
+    full_name = Column(String, nullable=True)
+    status = Column(String)
+    source = Column(String, nullable=True)
+    external_id = Column(String, nullable=True)
+    data = Column(JSON, nullable=True)
+    created_at = Column(DateTime(timezone=True))
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_leads_archive_campaign_created", "campaign_id", "created_at"),
+    )
+
+class LeadRollup(Base):
+    """Archived lead counts per campaign, day and status, so aggregates don't scan the cold tier"""
+    __tablename__ = "lead_rollups"
+
+    campaign_id = Column(Integer, ForeignKey("campaigns.id"), primary_key=True)
+    day = Column(DateTime(timezone=True), primary_key=True)  # Midnight of the leads' created_at
+    status = Column(String, primary_key=True)
+    leads = Column(Integer, default=0, server_default="0", nullable=False)
+
+class LeadStatusChange(Base):
+    __tablename__ = "lead_status_changes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Every change made by one bulk update shares a batch id
+    batch_id = Column(String, index=True)
+    # No foreign key: the lead may since have moved to leads_archive
+    lead_id = Column(Integer)
+    campaign_id = Column(Integer, ForeignKey("campaigns.id"))
+    from_status = Column(String, nullable=True)
+    to_status = Column(String)
+    changed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_lead_status_changes_lead_changed", "lead_id", "changed_at"),
+        # A campaign's recent changes, read by the funnel analytics
+        Index("ix_lead_status_changes_campaign_changed", "campaign_id", "changed_at"),
+    )
+
 class WebhookEndpoint(Base):
     __tablename__ = "webhook_endpoints"
 
@@ -65,6 +146,9 @@ class WebhookEndpoint(Base):
     is_active = Column(Boolean, default=True)
     last_received_at = Column(DateTime(timezone=True), nullable=True)
     total_received = Column(Integer, default=0)
+    # Token bucket for the incoming receiver; None uses the defaults, 0 disables the limit
+    rate_limit_per_minute = Column(Integer, nullable=True)
+    rate_limit_burst = Column(Integer, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     campaign = relationship("Campaign", back_populates="webhook_endpoints")
@@ -77,13 +161,21 @@ class WebhookEvent(Base):
     endpoint_id = Column(Integer, ForeignKey("webhook_endpoints.id"))
     payload = Column(JSON)  # Raw incoming payload
     normalized_data = Column(JSON)  # After mapping
-    lead_id = Column(Integer, ForeignKey("leads.id"), nullable=True)
+    # No foreign key: the lead may since have moved to leads_archive
+    lead_id = Column(Integer, nullable=True)
     status = Column(String)  # "success", "failed", "duplicate"
     error_message = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     endpoint = relationship("WebhookEndpoint", back_populates="events")
-    lead = relationship("Lead")
+    lead = relationship("Lead", primaryjoin="foreign(WebhookEvent.lead_id) == Lead.id", viewonly=True)
+
+    __table_args__ = (
+        # Serves per-endpoint time-window scans: health aggregates and the debug event list
+        Index("ix_webhook_events_endpoint_created", "endpoint_id", "created_at"),
+        # Serves retention sweeps over expired rows
+        Index("ix_webhook_events_created_at", "created_at"),
+    )
 
 class Integration(Base):
     __tablename__ = "integrations"
@@ -141,6 +233,11 @@ class Automation(Base):
 
     campaign = relationship("Campaign", back_populates="automations")
 
+    __table_args__ = (
+        # Active automations for a campaign and trigger, looked up on every new lead
+        Index("ix_automations_campaign_trigger_active", "campaign_id", "trigger_type", "is_active"),
+    )
+
 class PublicLink(Base):
     __tablename__ = "public_links"
 
@@ -164,3 +261,11 @@ class ActivityLog(Base):
     resource_id = Column(String, nullable=True)
     details = Column(JSON, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class CacheVersion(Base):
+    __tablename__ = "cache_versions"
+
+    # One row per invalidation topic, bumped on every publish so workers can poll for changes
+    topic = Column(String, primary_key=True)
+    version = Column(Integer, default=0, server_default="0", nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,164 @@
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Type
+from sqlalchemy import event
+from sqlalchemy import exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+from .metrics import POOL_LATENCY_BUCKETS, Histogram, registry
+
+logger = logging.getLogger(__name__)
+
+# Checkouts waiting longer than this are logged
+DB_SLOW_CHECKOUT_MS = float(os.getenv("DB_SLOW_CHECKOUT_MS", "100"))
+# Weight of the latest checkout in the moving average of wait times
+RECENT_WAIT_ALPHA = 0.2
+# The average halves every this many seconds without checkouts, so an idle pool reads as healthy again
+RECENT_WAIT_HALF_LIFE_SECONDS = 5.0
+
+
+pool_checkout_wait = registry.histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pool connection, including pre-ping",
+    ("pool",), POOL_LATENCY_BUCKETS)
+pool_connection_hold = registry.histogram(
+    "db_pool_connection_hold_seconds", "Time a pool connection stayed checked out", ("pool",), POOL_LATENCY_BUCKETS)
+
+
+def _histogram_ms(histogram: Histogram, pool: str, max_ms: float) -> Dict[str, Any]:
+    """A pool's series of a seconds histogram, reported in milliseconds"""
+    value = histogram.value(pool=pool)
+    sum_ms = value["sum"] * 1000
+    return {
+        "count": value["count"],
+        "sum_ms": round(sum_ms, 3),
+        "avg_ms": round(sum_ms / value["count"], 3) if value["count"] else 0.0,
+        "max_ms": round(max_ms, 3),
+        "buckets": {
+            bound if bound == "+Inf" else f"{bound * 1000:g}": count
+            for bound, count in value["buckets"].items()
+        }
+    }
+
+
+class PoolMetrics:
+    """
+    Collects checkout statistics for one connection pool: how long callers
+    waited for a connection (including pre-ping), how long connections were
+    held, timeouts, and slow checkouts. Wait and hold times go to the shared
+    registry histograms, labeled with the pool name, so /metrics exports them
+    as they are. `waiting` and `recent_wait_ms()` (a decaying moving average)
+    describe the pool right now, for load shedding.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.checkouts = 0
+        self.timeouts = 0
+        self.slow_checkouts = 0
+        self.max_wait_ms = 0.0
+        self.max_hold_ms = 0.0
+        self.waiting = 0
+        self._recent_wait = (0.0, time.monotonic())
+        self._lock = threading.Lock()
+
+    def checkout_started(self):
+        with self._lock:
+            self.waiting += 1
+
+    def checkout_finished(self):
+        with self._lock:
+            self.waiting -= 1
+
+    def record_wait(self, ms: float, timed_out: bool = False):
+        pool_checkout_wait.observe(ms / 1000, pool=self.name)
+        with self._lock:
+            self.max_wait_ms = max(self.max_wait_ms, ms)
+            recent = self.recent_wait_ms()
+            self._recent_wait = (recent + RECENT_WAIT_ALPHA * (ms - recent), time.monotonic())
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            if ms >= DB_SLOW_CHECKOUT_MS:
+                self.slow_checkouts += 1
+        if timed_out:
+            logger.error(f"{self.name} pool checkout timed out after {ms:.1f}ms")
+        elif ms >= DB_SLOW_CHECKOUT_MS:
+            logger.warning(f"Slow {self.name} pool checkout: waited {ms:.1f}ms")
+
+    def recent_wait_ms(self) -> float:
+        value, updated = self._recent_wait
+        return value * 0.5 ** ((time.monotonic() - updated) / RECENT_WAIT_HALF_LIFE_SECONDS)
+
+    def record_hold(self, ms: float):
+        pool_connection_hold.observe(ms / 1000, pool=self.name)
+        with self._lock:
+            self.max_hold_ms = max(self.max_hold_ms, ms)
+
+    def snapshot(self, pool: Pool) -> Dict[str, Any]:
+        """Live pool gauges plus the accumulated histograms"""
+        with self._lock:
+            data = {
+                "pool_class": type(pool).__name__,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "slow_checkouts": self.slow_checkouts,
+                "slow_checkout_threshold_ms": DB_SLOW_CHECKOUT_MS,
+                "waiting": self.waiting,
+                "recent_wait_ms": round(self.recent_wait_ms(), 3),
+            }
+        data["checkout_wait"] = _histogram_ms(pool_checkout_wait, self.name, self.max_wait_ms)
+        data["connection_hold"] = _histogram_ms(pool_connection_hold, self.name, self.max_hold_ms)
+        # Not every pool class (e.g. SQLite's in-memory pools) reports these
+        for key, attr in (("size", "size"), ("checked_out", "checkedout"),
+                          ("checked_in", "checkedin"), ("overflow", "overflow"), ("timeout", "timeout")):
+            method = getattr(pool, attr, None)
+            data[key] = method() if callable(method) else None
+        if data["overflow"] is not None:
+            # QueuePool reports negative overflow until the pool has filled up
+            data["overflow"] = max(0, data["overflow"])
+        data["max_overflow"] = getattr(pool, "_max_overflow", None)
+        return data
+
+
+def instrumented_pool_class(base: Type[Pool], metrics: PoolMetrics) -> Type[Pool]:
+    """
+    Returns a subclass of `base` that times every checkout into `metrics`.
+    Pools recreated on dispose() keep the subclass.
+    """
+
+    def connect(self):
+        started = time.perf_counter()
+        metrics.checkout_started()
+        try:
+            connection = base.connect(self)
+        except exc.TimeoutError:
+            metrics.record_wait((time.perf_counter() - started) * 1000, timed_out=True)
+            raise
+        finally:
+            metrics.checkout_finished()
+        metrics.record_wait((time.perf_counter() - started) * 1000)
+        return connection
+
+    return type(f"Instrumented{base.__name__}", (base,), {"connect": connect})
+
+
+def track_connection_hold(engine: Engine, metrics: PoolMetrics) -> None:
+    """Records how long each connection stays checked out of the engine's pool"""
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        checked_out_at: Optional[float] = connection_record.info.pop("checked_out_at", None)
+        if checked_out_at is not None:
+            metrics.record_hold((time.perf_counter() - checked_out_at) * 1000)
+
+
+sync_pool_metrics = PoolMetrics("sync")
+async_pool_metrics = PoolMetrics("async")
+read_pool_metrics = PoolMetrics("read")
@@ -0,0 +1,113 @@
+import logging
+import os
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from .metrics import start_query_stats, stop_query_stats
+
+logger = logging.getLogger(__name__)
+
+# Dev mode: log requests that repeat a statement shape or run too many statements
+SQL_QUERY_INSPECTOR = os.getenv("SQL_QUERY_INSPECTOR", "false").lower() == "true"
+SQL_DUPLICATE_THRESHOLD = int(os.getenv("SQL_DUPLICATE_THRESHOLD", "3"))
+SQL_STATEMENT_WARN_COUNT = int(os.getenv("SQL_STATEMENT_WARN_COUNT", "25"))
+
+_PLACEHOLDER_LIST = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|%s|:\w+|\$\d+)\s*,?)+\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Collapses whitespace and expanded IN lists so repeats of one query compare equal"""
+    return _PLACEHOLDER_LIST.sub("(...)", _WHITESPACE.sub(" ", statement).strip())
+
+
+def duplicate_shapes(statements: List[str], threshold: int = 2) -> Dict[str, int]:
+    """Statement shapes executed at least `threshold` times - the signature of an N+1 loop"""
+    counts = Counter(statement_shape(statement) for statement in statements)
+    return {shape: count for shape, count in counts.most_common() if count >= threshold}
+
+
+class QueryCounter:
+    """
+    Records every SQL statement run on any engine, from any thread, while
+    active. Meant for tests, where the app may run on another thread.
+    """
+
+    def __init__(self):
+        self.statements: List[str] = []
+        self._lock = threading.Lock()
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def duplicates(self, threshold: int = 2) -> Dict[str, int]:
+        return duplicate_shapes(self.statements, threshold)
+
+    def __enter__(self) -> "QueryCounter":
+        event.listen(Engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(Engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        with self._lock:
+            self.statements.append(statement)
+
+
+@contextmanager
+def query_budget(max_statements: int):
+    """
+    Fails with the statements that ran when the block executes more than
+    `max_statements` SQL statements.
+
+        with query_budget(3):
+            client.get("/api/dashboard/campaigns-overview")
+    """
+    with QueryCounter() as counter:
+        yield counter
+    if counter.count > max_statements:
+        repeated = "\n".join(f"  {count}x {shape}" for shape, count in counter.duplicates().items())
+        raise AssertionError(
+            f"Expected at most {max_statements} SQL statements, got {counter.count}"
+            + (f"\nRepeated statements:\n{repeated}" if repeated else "")
+        )
+
+
+class QueryInspectorMiddleware:
+    """
+    Dev-mode middleware (SQL_QUERY_INSPECTOR=true) that logs requests running
+    the same statement shape SQL_DUPLICATE_THRESHOLD or more times, or more
+    than SQL_STATEMENT_WARN_COUNT statements in total.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats, token = start_query_stats(keep_text=True)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            stop_query_stats(token)
+            self._report(scope, stats)
+
+    def _report(self, scope, stats):
+        route = getattr(scope.get("route"), "path", scope.get("path"))
+        repeated = duplicate_shapes(stats.texts, SQL_DUPLICATE_THRESHOLD)
+        for shape, count in repeated.items():
+            logger.warning(f"Possible N+1 on {scope['method']} {route}: {count}x {shape}")
+        if stats.statements > SQL_STATEMENT_WARN_COUNT:
+            logger.warning(
+                f"{scope['method']} {route} ran {stats.statements} SQL statements "
+                f"({stats.seconds * 1000:.1f}ms in SQL)"
+            )
@@ -0,0 +1,148 @@
+"""
+Query-plan check for the hot queries behind routes/.
+
+Runs EXPLAIN for each query below against DATABASE_URL (migrated to head)
+and fails when the plan doesn't use the index the query is meant to hit:
+
+    DATABASE_URL=postgresql://... python -m backend.query_plans
+
+On PostgreSQL sequential scans are disabled for the check, so a small or
+empty database still shows whether the index is usable rather than whether
+the planner prefers it at the current table size. SQLite plans are read
+from EXPLAIN QUERY PLAN.
+"""
+import argparse
+import sys
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Tuple
+from sqlalchemy import and_, func, select, text
+from sqlalchemy.engine import Connection
+from .database import engine
+from .models import Automation, CampaignDataChange, LeadStatusChange, WebhookEvent
+from .services.lead_tiering import all_leads, lead_facts
+from .services.webhook_service import webhook_service
+
+_NOW = datetime(2026, 1, 1)
+
+
+def _campaign_leads_page():
+    leads = all_leads()
+    return select(leads.c.id, leads.c.email, leads.c.status, leads.c.created_at).where(
+        leads.c.campaign_id == 1
+    ).order_by(leads.c.created_at.desc()).limit(100)
+
+
+def _leads_over_time(campaign_id: Optional[int] = None):
+    facts = lead_facts()
+    conditions = [facts.c.created_at >= _NOW - timedelta(days=30)]
+    if campaign_id is not None:
+        conditions.append(facts.c.campaign_id == campaign_id)
+    return select(func.date(facts.c.created_at), func.sum(facts.c.leads)).where(
+        *conditions
+    ).group_by(func.date(facts.c.created_at))
+
+
+def _campaign_status_breakdown():
+    facts = lead_facts()
+    return select(facts.c.status, func.sum(facts.c.leads)).where(facts.c.campaign_id == 1).group_by(facts.c.status)
+
+
+# (name, where it runs, statement, index it must use)
+HOT_QUERIES: List[Tuple[str, str, Callable, str]] = [
+    (
+        "campaign leads page", "GET /api/campaigns/{id}/leads",
+        _campaign_leads_page,
+        "ix_leads_archive_campaign_created",
+    ),
+    (
+        "campaign leads over time", "GET /api/campaigns/{id}/leads-over-time",
+        lambda: _leads_over_time(campaign_id=1),
+        "ix_leads_campaign_created",
+    ),
+    (
+        "campaign status breakdown", "GET /api/campaigns/{id}/stats, GET /api/public-links/{uuid}",
+        _campaign_status_breakdown,
+        "ix_leads_campaign_status",
+    ),
+    (
+        "leads over time", "GET /api/dashboard/leads-over-time",
+        _leads_over_time,
+        "ix_leads_created_at",
+    ),
+    (
+        "funnel status changes", "GET /api/campaigns/{id}/funnel",
+        lambda: select(LeadStatusChange.lead_id, LeadStatusChange.to_status, LeadStatusChange.changed_at).where(
+            LeadStatusChange.campaign_id == 1, LeadStatusChange.changed_at >= _NOW - timedelta(weeks=12)
+        ),
+        "ix_lead_status_changes_campaign_changed",
+    ),
+    (
+        "webhook events", "GET /api/webhooks/{id}/events",
+        lambda: select(WebhookEvent.id, WebhookEvent.status, WebhookEvent.created_at)
+        .where(and_(WebhookEvent.endpoint_id == 1, WebhookEvent.created_at >= _NOW - timedelta(days=30)))
+        .order_by(WebhookEvent.created_at.desc()).limit(50),
+        "ix_webhook_events_endpoint_created",
+    ),
+    (
+        "webhook health", "GET /api/integrations/status, integration monitor",
+        lambda: webhook_service.aggregate_statement([1, 2, 3], _NOW, _NOW - timedelta(hours=24)),
+        "ix_webhook_events_endpoint_created",
+    ),
+    (
+        "campaign data version", "every cached campaign read",
+        lambda: select(func.sum(CampaignDataChange.changes)).where(CampaignDataChange.campaign_id == 1),
+        "ix_campaign_data_changes_campaign",
+    ),
+    (
+        "active automations", "POST /api/webhooks/incoming/{key}",
+        lambda: select(Automation.id, Automation.trigger_config, Automation.actions).where(
+            Automation.campaign_id == 1, Automation.trigger_type == "new_lead", Automation.is_active == True
+        ),
+        "ix_automations_campaign_trigger_active",
+    ),
+]
+
+
+def explain(connection: Connection, statement) -> str:
+    """The plan for `statement` as text"""
+    compiled = statement.compile(connection, compile_kwargs={"literal_binds": True})
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("SET LOCAL enable_seqscan = off"))
+        rows = connection.execute(text(f"EXPLAIN {compiled}")).scalars().all()
+        return "\n".join(rows)
+    if connection.dialect.name == "sqlite":
+        rows = connection.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+        return "\n".join(row[-1] for row in rows)
+    raise RuntimeError(f"Plan checks aren't supported on {connection.dialect.name}")
+
+
+def check(connection: Connection) -> List[str]:
+    """Returns a line per hot query whose plan misses its index"""
+    failures = []
+    for name, route, build, index in HOT_QUERIES:
+        plan = explain(connection, build())
+        if index not in plan:
+            failures.append(f"{name} ({route}) does not use {index}:\n    " + plan.replace("\n", "\n    "))
+    return failures
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check that hot queries use their indexes")
+    parser.add_argument("--verbose", action="store_true", help="Print every plan")
+    args = parser.parse_args(argv)
+
+    with engine.connect() as connection:
+        with connection.begin():
+            if args.verbose:
+                for name, route, build, index in HOT_QUERIES:
+                    print(f"-- {name} ({route})\n{explain(connection, build())}\n")
+            failures = check(connection)
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print(f"{len(HOT_QUERIES) - len(failures)}/{len(HOT_QUERIES)} hot queries use their indexes")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
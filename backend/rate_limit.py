@@ -0,0 +1,170 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+from fastapi import Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from .database import get_async_db
+from .metrics import registry
+from .pool_metrics import async_pool_metrics
+from .services.config_cache import load_webhook_endpoint
+
+# Per webhook key, unless the endpoint sets its own; 0 disables
+WEBHOOK_RATE_LIMIT_PER_MINUTE = int(os.getenv("WEBHOOK_RATE_LIMIT_PER_MINUTE", "600"))
+WEBHOOK_RATE_LIMIT_BURST = int(os.getenv("WEBHOOK_RATE_LIMIT_BURST", "100"))
+# Per source IP across every key; 0 disables
+WEBHOOK_IP_RATE_LIMIT_PER_MINUTE = int(os.getenv("WEBHOOK_IP_RATE_LIMIT_PER_MINUTE", "1200"))
+WEBHOOK_IP_RATE_LIMIT_BURST = int(os.getenv("WEBHOOK_IP_RATE_LIMIT_BURST", "200"))
+# Use the first X-Forwarded-For address as the source IP (only behind a trusted proxy)
+WEBHOOK_TRUST_FORWARDED_FOR = os.getenv("WEBHOOK_TRUST_FORWARDED_FOR", "false").lower() == "true"
+
+# Load shedding: receiver requests in progress, and callers waiting on the async pool; 0 disables
+WEBHOOK_MAX_IN_FLIGHT = int(os.getenv("WEBHOOK_MAX_IN_FLIGHT", "200"))
+WEBHOOK_SHED_POOL_WAITING = int(os.getenv("WEBHOOK_SHED_POOL_WAITING", "20"))
+# Recent average async pool checkout wait (ms) above which deliveries are shed; 0 disables
+WEBHOOK_SHED_POOL_WAIT_MS = float(os.getenv("WEBHOOK_SHED_POOL_WAIT_MS", "1000"))
+WEBHOOK_SHED_RETRY_AFTER = int(os.getenv("WEBHOOK_SHED_RETRY_AFTER", "5"))
+
+# Least recently used buckets are evicted past this many per limiter
+RATE_LIMIT_MAX_BUCKETS = 100000
+
+webhook_rejections = registry.counter(
+    "webhook_rejections_total", "Webhook deliveries refused before processing, by reason", ("reason",))
+
+
+class TokenBuckets:
+    """
+    In-memory token buckets keyed by any hashable. A bucket holds up to
+    `burst` tokens and refills at `per_minute / 60` tokens per second;
+    `take()` spends one token or says how long until one is available.
+    Limits are passed per call, so a bucket follows configuration changes.
+    """
+
+    def __init__(self, max_buckets: int = RATE_LIMIT_MAX_BUCKETS):
+        self.max_buckets = max_buckets
+        # key -> [tokens, last refill (monotonic)]
+        self._buckets: "OrderedDict[Hashable, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: Hashable, per_minute: int, burst: int, now: Optional[float] = None) -> float:
+        """Returns 0 if the request may proceed, else seconds until the next token"""
+        if per_minute <= 0:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        rate = per_minute / 60.0
+        burst = max(burst, 1)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(burst), now]
+                if len(self._buckets) > self.max_buckets:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(float(burst), bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            return (1 - bucket[0]) / rate
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class WebhookRateLimiter:
+    """
+    Admission control for POST /api/webhooks/incoming/{key}, used as a route
+    dependency so it runs before the receiver does any work.
+
+    In order: load shedding (503) when too many deliveries are in progress
+    or the async pool is backed up; then the source IP's bucket; then the
+    endpoint's bucket (429). The endpoint, with its rate_limit_per_minute/
+    rate_limit_burst, comes from the config cache, loaded through the
+    request's session on a miss, so its own limits apply from the first
+    delivery and only over-limit checks on cached endpoints skip the
+    database entirely. Unknown keys get a 404 without a bucket, so random
+    keys can't evict real ones. Rejections carry Retry-After.
+
+    Limits default to the WEBHOOK_* settings and are plain attributes, so
+    tools like the load harness can change them at runtime.
+    """
+
+    def __init__(self, per_minute: int = WEBHOOK_RATE_LIMIT_PER_MINUTE, burst: int = WEBHOOK_RATE_LIMIT_BURST,
+                 ip_per_minute: int = WEBHOOK_IP_RATE_LIMIT_PER_MINUTE, ip_burst: int = WEBHOOK_IP_RATE_LIMIT_BURST,
+                 max_in_flight: int = WEBHOOK_MAX_IN_FLIGHT, shed_pool_waiting: int = WEBHOOK_SHED_POOL_WAITING,
+                 shed_pool_wait_ms: float = WEBHOOK_SHED_POOL_WAIT_MS):
+        self.per_minute = per_minute
+        self.burst = burst
+        self.ip_per_minute = ip_per_minute
+        self.ip_burst = ip_burst
+        self.max_in_flight = max_in_flight
+        self.shed_pool_waiting = shed_pool_waiting
+        self.shed_pool_wait_ms = shed_pool_wait_ms
+        self.keys = TokenBuckets()
+        self.ips = TokenBuckets()
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    async def __call__(self, key: str, request: Request, db: AsyncSession = Depends(get_async_db)):
+        self._shed_if_overloaded()
+        self._check(self.ips, self.source_ip(request), self.ip_per_minute, self.ip_burst, "ip")
+        endpoint = await load_webhook_endpoint(db, key)
+        if endpoint is None:
+            raise HTTPException(status_code=404, detail="Webhook not found")
+        self._check(self.keys, key, *self.key_limits(endpoint), "key")
+
+        with self._lock:
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def key_limits(self, endpoint: Dict[str, Any]) -> Tuple[int, int]:
+        per_minute = endpoint.get("rate_limit_per_minute")
+        burst = endpoint.get("rate_limit_burst")
+        return (
+            self.per_minute if per_minute is None else per_minute,
+            self.burst if burst is None else burst
+        )
+
+    def source_ip(self, request: Request) -> str:
+        if WEBHOOK_TRUST_FORWARDED_FOR:
+            forwarded = request.headers.get("X-Forwarded-For")
+            if forwarded:
+                return forwarded.split(",")[0].strip()
+        return request.client.host if request.client else "unknown"
+
+    def _shed_if_overloaded(self):
+        reason = None
+        if self.max_in_flight and self.in_flight >= self.max_in_flight:
+            reason = "in_flight"
+        elif self.shed_pool_waiting and async_pool_metrics.waiting >= self.shed_pool_waiting:
+            reason = "pool_waiting"
+        elif self.shed_pool_wait_ms and async_pool_metrics.recent_wait_ms() >= self.shed_pool_wait_ms:
+            reason = "pool_wait"
+        if reason:
+            webhook_rejections.inc(reason=reason)
+            raise HTTPException(
+                status_code=503,
+                detail="Server is busy, retry later",
+                headers={"Retry-After": str(WEBHOOK_SHED_RETRY_AFTER)}
+            )
+
+    def _check(self, buckets: TokenBuckets, key: Hashable, per_minute: int, burst: int, reason: str):
+        retry_after = buckets.take(key, per_minute, burst)
+        if retry_after:
+            webhook_rejections.inc(reason=reason)
+            raise HTTPException(
+                status_code=429,
+                detail="Rate limit exceeded",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+            )
+
+
+webhook_rate_limiter = WebhookRateLimiter()
@@ -0,0 +1,185 @@
+import gzip
+import json
+import os
+import re
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+_CHUNK_SIZE = 64 * 1024
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parses a single-range `Range: bytes=...` header into an inclusive (start, end).
+    Returns None for syntax we don't serve partially (multi-range, other units),
+    in which case the full file is returned as allowed by RFC 7233.
+    Raises ValueError for an unsatisfiable range.
+    """
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        return None
+
+    start, end = match.groups()
+    if not start and not end:
+        return None
+
+    if not start:
+        # Suffix range: the last N bytes
+        length = int(end)
+        if length == 0:
+            raise ValueError("Unsatisfiable range")
+        return max(size - length, 0), size - 1
+
+    start = int(start)
+    end = int(end) if end else size - 1
+    if start >= size or end < start:
+        raise ValueError("Unsatisfiable range")
+    return start, min(end, size - 1)
+
+
+def _iter_file_range(path: str, start: int, end: int):
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def accepts_gzip(request: Request) -> bool:
+    """True when the client's Accept-Encoding allows gzip (an explicit q=0 refuses it)"""
+    for coding in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            quality = params.strip().lower()
+            return not (quality.startswith("q=") and float(quality[2:] or 0) == 0)
+    return False
+
+
+def file_response(request: Request, path: str, media_type: str, filename: str, etag: str,
+                  content_encoding: Optional[str] = None) -> Response:
+    """
+    Serves a static artifact with ETag/If-None-Match revalidation and single
+    HTTP Range support (including If-Range), so large exports can be cached
+    by clients and resumed after an interrupted download. With
+    `content_encoding` the file is sent as that encoding of `media_type`
+    (e.g. a .csv.gz served as gzip-encoded text/csv).
+    """
+    size = os.path.getsize(path)
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f"attachment; filename={filename}"
+    }
+    if content_encoding:
+        headers["Content-Encoding"] = content_encoding
+        headers["Vary"] = "Accept-Encoding"
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range.strip() == etag):
+        try:
+            byte_range = _parse_range(range_header, size)
+        except ValueError:
+            return Response(status_code=416, headers={"Content-Range": f"bytes */{size}", **headers})
+
+        if byte_range:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+            headers["Content-Length"] = str(end - start + 1)
+            return StreamingResponse(
+                _iter_file_range(path, start, end),
+                status_code=206,
+                media_type=media_type,
+                headers=headers
+            )
+
+    headers["Content-Length"] = str(size)
+    return StreamingResponse(
+        _iter_file_range(path, 0, size - 1),
+        media_type=media_type,
+        headers=headers
+    )
+
+
+def _iter_gunzip(path: str):
+    with gzip.open(path, "rb") as f:
+        while True:
+            chunk = f.read(_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+def gunzip_file_response(request: Request, path: str, media_type: str, filename: str, etag: str) -> Response:
+    """
+    Serves a gzip artifact decompressed on the fly, for clients that don't
+    accept gzip. Supports ETag revalidation but not Range, since the
+    decompressed size isn't known up front.
+    """
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "none",
+        "Vary": "Accept-Encoding",
+        "Content-Disposition": f"attachment; filename={filename}"
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers={"ETag": etag})
+    return StreamingResponse(_iter_gunzip(path), media_type=media_type, headers=headers)
+
+
+# ============ Fast JSON ============
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serializes plain dicts/lists/datetimes with orjson, or the stdlib when it isn't installed"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_json_default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response for large read-only lists. Routes opt in by declaring
+    `response_class=FastJSONResponse` and returning one, built from column
+    rows (see `rows_to_dicts`) rather than ORM entities. This skips both the
+    per-row Pydantic validation of `response_model` and FastAPI's recursive
+    `jsonable_encoder`; `response_model` can stay on the route for the docs.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def rows_to_dicts(rows: Iterable[Any]) -> List[Dict[str, Any]]:
+    """Column-tuple query rows (`db.query(Model.a, Model.b)`) as plain dicts keyed by column label"""
+    return [dict(row._mapping) for row in rows]
@@ -3,6 +3,8 @@ from sqlalchemy.orm import Session
 from typing import List
 from ..database import get_db
 from ..models import Automation
+from ..services.cache_bus import cache_bus
+from ..services.audit_log import audit_log
 from ..schemas_automation import Automation as AutomationSchema, AutomationCreate, AutomationUpdate
 
 router = APIRouter(
@@ -21,7 +23,9 @@ def get_automations(campaign_id: int = None, skip: int = 0, limit: int = 100, db
 def create_automation(automation: AutomationCreate, db: Session = Depends(get_db)):
     db_automation = Automation(**automation.dict())
     db.add(db_automation)
+    cache_bus.publish(db, "automation", db_automation.campaign_id)
     db.commit()
+    audit_log.log_activity("create", "automation", db_automation.id, {"campaign_id": db_automation.campaign_id})
     db.refresh(db_automation)
     return db_automation
 
@@ -38,11 +42,16 @@ def update_automation(automation_id: int, automation: AutomationUpdate, db: Sess
     if not db_automation:
         raise HTTPException(status_code=404, detail="Automation not found")
     
+    previous_campaign_id = db_automation.campaign_id
     update_data = automation.dict(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_automation, key, value)
     
+    cache_bus.publish(db, "automation", previous_campaign_id)
+    if db_automation.campaign_id != previous_campaign_id:
+        cache_bus.publish(db, "automation", db_automation.campaign_id)
     db.commit()
+    audit_log.log_activity("update", "automation", automation_id, {"fields": sorted(update_data)})
     db.refresh(db_automation)
     return db_automation
 
@@ -53,5 +62,7 @@ def delete_automation(automation_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Automation not found")
     
     db.delete(db_automation)
+    cache_bus.publish(db, "automation", db_automation.campaign_id)
     db.commit()
+    audit_log.log_activity("delete", "automation", automation_id)
     return {"ok": True}
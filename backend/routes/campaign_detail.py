@@ -1,10 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from sqlalchemy import func, and_, case
 from typing import List, Optional
 from datetime import datetime, timedelta
-from ..database import get_db
-from ..models import Campaign, Lead, Automation
+from ..database import get_read_db
+from ..models import Campaign, Automation
+from ..services.lead_analytics import lead_analytics_service
+from ..services.lead_tiering import all_leads, lead_facts
+from ..responses import FastJSONResponse, rows_to_dicts
 
 router = APIRouter(
     prefix="/api/campaigns",
@@ -12,7 +15,7 @@ router = APIRouter(
 )
 
 @router.get("/{campaign_id}/stats")
-def get_campaign_stats(campaign_id: int, db: Session = Depends(get_db)):
+def get_campaign_stats(campaign_id: int, db: Session = Depends(get_read_db)):
     """
     Get statistics for a specific campaign
     """
@@ -20,26 +23,20 @@ def get_campaign_stats(campaign_id: int, db: Session = Depends(get_db)):
     if not campaign:
         raise HTTPException(status_code=404, detail="Campaign not found")
     
-    # Total leads
-    total_leads = db.query(Lead).filter(Lead.campaign_id == campaign_id).count()
-    
-    # Leads today
     today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-    leads_today = db.query(Lead).filter(
-        and_(
-            Lead.campaign_id == campaign_id,
-            Lead.created_at >= today_start
-        )
-    ).count()
-    
-    # Status breakdown
-    new_leads = db.query(Lead).filter(
-        and_(Lead.campaign_id == campaign_id, Lead.status == "new")
-    ).count()
-    
-    contacted_leads = db.query(Lead).filter(
-        and_(Lead.campaign_id == campaign_id, Lead.status == "contacted")
-    ).count()
+    facts = lead_facts()
+    
+    # Totals, today and status breakdown across hot and archived leads in one pass
+    counts = db.query(
+        func.coalesce(func.sum(facts.c.leads), 0).label("total"),
+        func.coalesce(func.sum(case((facts.c.created_at >= today_start, facts.c.leads), else_=0)), 0).label("today"),
+        func.coalesce(func.sum(case((facts.c.status == "new", facts.c.leads), else_=0)), 0).label("new"),
+        func.coalesce(func.sum(case((facts.c.status == "contacted", facts.c.leads), else_=0)), 0).label("contacted")
+    ).filter(facts.c.campaign_id == campaign_id).one()
+    total_leads = int(counts.total)
+    leads_today = int(counts.today)
+    new_leads = int(counts.new)
+    contacted_leads = int(counts.contacted)
     
     # Conversion rate
     conversion_rate = (contacted_leads / total_leads * 100) if total_leads > 0 else 0
@@ -65,7 +62,7 @@ def get_campaign_stats(campaign_id: int, db: Session = Depends(get_db)):
 def get_campaign_leads_over_time(
     campaign_id: int,
     days: int = Query(30, ge=1, le=365),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get leads count over time for a specific campaign
@@ -76,16 +73,17 @@ def get_campaign_leads_over_time(
     
     start_date = datetime.now() - timedelta(days=days)
     
+    facts = lead_facts()
     results = db.query(
-        func.date(Lead.created_at).label('date'),
-        func.count(Lead.id).label('count')
+        func.date(facts.c.created_at).label('date'),
+        func.sum(facts.c.leads).label('count')
     ).filter(
         and_(
-            Lead.campaign_id == campaign_id,
-            Lead.created_at >= start_date
+            facts.c.campaign_id == campaign_id,
+            facts.c.created_at >= start_date
         )
     ).group_by(
-        func.date(Lead.created_at)
+        func.date(facts.c.created_at)
     ).order_by('date').all()
     
     data = [
@@ -98,7 +96,23 @@ def get_campaign_leads_over_time(
     
     return data
 
-@router.get("/{campaign_id}/leads")
+@router.get("/{campaign_id}/funnel")
+def get_campaign_funnel(
+    campaign_id: int,
+    weeks: int = Query(12, ge=1, le=104),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Weekly cohort funnel: leads grouped by creation week, the share of each
+    cohort that reached every status, and the average hours to reach it
+    """
+    campaign = db.query(Campaign.id).filter(Campaign.id == campaign_id).first()
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    
+    return lead_analytics_service.get_funnel(db, campaign_id, weeks)
+
+@router.get("/{campaign_id}/leads", response_class=FastJSONResponse)
 def get_campaign_leads(
     campaign_id: int,
     status: Optional[str] = None,
@@ -106,7 +120,7 @@ def get_campaign_leads(
     end_date: Optional[str] = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get leads for a specific campaign with filters
@@ -115,44 +129,38 @@ def get_campaign_leads(
     if not campaign:
         raise HTTPException(status_code=404, detail="Campaign not found")
     
-    query = db.query(Lead).filter(Lead.campaign_id == campaign_id)
+    # Archived leads are listed alongside hot ones
+    leads_table = all_leads()
+    query = db.query(
+        leads_table.c.id, leads_table.c.email, leads_table.c.full_name, leads_table.c.phone,
+        leads_table.c.status, leads_table.c.source, leads_table.c.created_at
+    ).filter(leads_table.c.campaign_id == campaign_id)
     
     # Apply filters
     if status:
-        query = query.filter(Lead.status == status)
+        query = query.filter(leads_table.c.status == status)
     
     if start_date:
         start_dt = datetime.fromisoformat(start_date)
-        query = query.filter(Lead.created_at >= start_dt)
+        query = query.filter(leads_table.c.created_at >= start_dt)
     
     if end_date:
         end_dt = datetime.fromisoformat(end_date)
-        query = query.filter(Lead.created_at <= end_dt)
+        query = query.filter(leads_table.c.created_at <= end_dt)
     
     # Get total count
     total = query.count()
     
     # Get paginated results
-    leads = query.order_by(Lead.created_at.desc()).offset(skip).limit(limit).all()
+    leads = query.order_by(leads_table.c.created_at.desc()).offset(skip).limit(limit).all()
     
-    return {
+    return FastJSONResponse({
         "total": total,
-        "leads": [
-            {
-                "id": lead.id,
-                "email": lead.email,
-                "full_name": lead.full_name,
-                "phone": lead.phone,
-                "status": lead.status,
-                "source": lead.source,
-                "created_at": lead.created_at.isoformat() if lead.created_at else None
-            }
-            for lead in leads
-        ]
-    }
+        "leads": rows_to_dicts(leads)
+    })
 
 @router.get("/{campaign_id}/automations")
-def get_campaign_automations(campaign_id: int, db: Session = Depends(get_db)):
+def get_campaign_automations(campaign_id: int, db: Session = Depends(get_read_db)):
     """
     Get automations linked to a specific campaign
     """
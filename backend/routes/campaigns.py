@@ -3,6 +3,8 @@ from sqlalchemy.orm import Session
 from typing import List
 from ..database import get_db
 from ..models import Campaign
+from ..services.cache_bus import cache_bus
+from ..services.audit_log import audit_log
 from ..schemas import Campaign as CampaignSchema, CampaignCreate
 
 router = APIRouter(
@@ -19,7 +21,10 @@ def get_campaigns(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)
 def create_campaign(campaign: CampaignCreate, db: Session = Depends(get_db)):
     db_campaign = Campaign(**campaign.dict())
     db.add(db_campaign)
+    db.flush()
+    cache_bus.publish(db, "campaign", db_campaign.id)
     db.commit()
+    audit_log.log_activity("create", "campaign", db_campaign.id, {"name": db_campaign.name})
     db.refresh(db_campaign)
     return db_campaign
 
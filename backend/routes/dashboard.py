@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from sqlalchemy import func, case
 from typing import List, Optional
 from datetime import datetime, timedelta
-from ..database import get_db
-from ..models import Campaign, Lead, Integration
+from ..database import get_read_db
+from ..models import Campaign
+from ..services.lead_tiering import lead_facts
 
 router = APIRouter(
     prefix="/api/dashboard",
@@ -12,22 +13,28 @@ router = APIRouter(
 )
 
 @router.get("/stats")
-def get_dashboard_stats(db: Session = Depends(get_db)):
+def get_dashboard_stats(db: Session = Depends(get_read_db)):
     """
     Get overall workspace statistics for main dashboard
     """
-    # Total leads
-    total_leads = db.query(Lead).count()
-    
-    # Leads today
     today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-    leads_today = db.query(Lead).filter(Lead.created_at >= today_start).count()
+    facts = lead_facts()
+    
+    # Hot and archived leads in one pass: totals, today, contacted and campaigns with leads
+    counts = db.query(
+        func.coalesce(func.sum(facts.c.leads), 0).label("total"),
+        func.coalesce(func.sum(case((facts.c.created_at >= today_start, facts.c.leads), else_=0)), 0).label("today"),
+        func.coalesce(func.sum(case((facts.c.status == "contacted", facts.c.leads), else_=0)), 0).label("contacted"),
+        func.count(func.distinct(facts.c.campaign_id)).label("campaigns")
+    ).one()
+    total_leads = int(counts.total)
+    leads_today = int(counts.today)
     
     # Active campaigns (campaigns with at least one lead)
-    active_campaigns = db.query(Campaign).join(Lead).distinct().count()
+    active_campaigns = counts.campaigns
     
     # Conversion rate (contacted / total)
-    contacted_leads = db.query(Lead).filter(Lead.status == "contacted").count()
+    contacted_leads = int(counts.contacted)
     conversion_rate = (contacted_leads / total_leads * 100) if total_leads > 0 else 0
     
     return {
@@ -40,21 +47,23 @@ def get_dashboard_stats(db: Session = Depends(get_db)):
 @router.get("/leads-over-time")
 def get_leads_over_time(
     days: int = Query(30, ge=1, le=365),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get leads count grouped by date for chart
     """
     start_date = datetime.now() - timedelta(days=days)
     
+    facts = lead_facts()
+    
     # Query leads grouped by date
     results = db.query(
-        func.date(Lead.created_at).label('date'),
-        func.count(Lead.id).label('count')
+        func.date(facts.c.created_at).label('date'),
+        func.sum(facts.c.leads).label('count')
     ).filter(
-        Lead.created_at >= start_date
+        facts.c.created_at >= start_date
     ).group_by(
-        func.date(Lead.created_at)
+        func.date(facts.c.created_at)
     ).order_by('date').all()
     
     # Format for frontend
@@ -69,19 +78,20 @@ def get_leads_over_time(
     return data
 
 @router.get("/leads-by-campaign")
-def get_leads_by_campaign(db: Session = Depends(get_db)):
+def get_leads_by_campaign(db: Session = Depends(get_read_db)):
     """
     Get leads count grouped by campaign for bar chart
     """
+    facts = lead_facts()
     results = db.query(
         Campaign.name,
-        func.count(Lead.id).label('count')
+        func.sum(facts.c.leads).label('count')
     ).join(
-        Lead, Campaign.id == Lead.campaign_id
+        facts, Campaign.id == facts.c.campaign_id
     ).group_by(
         Campaign.id, Campaign.name
     ).order_by(
-        func.count(Lead.id).desc()
+        func.sum(facts.c.leads).desc()
     ).limit(10).all()
     
     data = [
@@ -95,31 +105,31 @@ def get_leads_by_campaign(db: Session = Depends(get_db)):
     return data
 
 @router.get("/campaigns-overview")
-def get_campaigns_overview(db: Session = Depends(get_db)):
+def get_campaigns_overview(db: Session = Depends(get_read_db)):
     """
     Get campaign overview table data
     """
     today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
     
+    facts = lead_facts()
+    
+    # Per-campaign lead counts in one grouped query instead of two per campaign
+    lead_counts = {
+        row.campaign_id: row
+        for row in db.query(
+            facts.c.campaign_id,
+            func.sum(facts.c.leads).label("total_leads"),
+            func.sum(case((facts.c.created_at >= today_start, facts.c.leads), else_=0)).label("leads_today")
+        ).group_by(facts.c.campaign_id)
+    }
+    
     campaigns = db.query(Campaign).all()
     
     overview = []
     for campaign in campaigns:
-        # Total leads for this campaign
-        total_leads = db.query(Lead).filter(Lead.campaign_id == campaign.id).count()
-        
-        # Leads today
-        leads_today = db.query(Lead).filter(
-            and_(
-                Lead.campaign_id == campaign.id,
-                Lead.created_at >= today_start
-            )
-        ).count()
-        
-        # Get integration status
-        integration = db.query(Integration).filter(
-            Integration.campaign_id == campaign.id
-        ).first()
+        counts = lead_counts.get(campaign.id)
+        total_leads = int(counts.total_leads) if counts else 0
+        leads_today = int(counts.leads_today or 0) if counts else 0
         
         status = "active" if total_leads > 0 else "inactive"
         
@@ -0,0 +1,70 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.orm import Session
+from ..database import get_db
+from ..models import Campaign
+from ..responses import file_response
+from ..services.data_version import get_data_version
+from ..services.export_service import export_service, EXPORT_FORMATS
+from ..services.jobs import job_registry
+
+router = APIRouter(
+    prefix="/api/campaigns",
+    tags=["exports"]
+)
+
+@router.get("/{campaign_id}/exports")
+def get_export_status(campaign_id: int, db: Session = Depends(get_db)):
+    """
+    Describe the pre-built export artifacts for a campaign
+    """
+    data_version = get_data_version(db, campaign_id)
+    if data_version is None:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    
+    manifest = export_service.read_manifest(campaign_id)
+    return {
+        "campaign_id": campaign_id,
+        "data_version": data_version,
+        "built_version": manifest["data_version"] if manifest else None,
+        "is_fresh": export_service.is_fresh(manifest, data_version),
+        "built_at": manifest["built_at"] if manifest else None,
+        "rows": manifest["rows"] if manifest else None,
+        "formats": manifest["formats"] if manifest else {}
+    }
+
+@router.post("/{campaign_id}/exports")
+def rebuild_exports(campaign_id: int, db: Session = Depends(get_db)):
+    """
+    Schedule a background rebuild of the campaign's export artifacts
+    """
+    campaign = db.query(Campaign.id).filter(Campaign.id == campaign_id).first()
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    
+    job = job_registry.submit(
+        "export",
+        lambda job, cid: export_service.build(cid),
+        campaign_id,
+        params={"campaign_id": campaign_id}
+    )
+    return job.to_dict()
+
+@router.get("/{campaign_id}/exports/{fmt}")
+def download_export(campaign_id: int, fmt: str, request: Request, db: Session = Depends(get_db)):
+    """
+    Download a pre-built export (supports ETag and Range requests)
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=404, detail=f"Unknown export format: {fmt}")
+    
+    artifact = export_service.get_artifact(db, campaign_id, fmt)
+    if not artifact:
+        raise HTTPException(status_code=404, detail="Export not available")
+    
+    return file_response(
+        request,
+        artifact["path"],
+        media_type=artifact["media_type"],
+        filename=artifact["filename"],
+        etag=artifact["etag"]
+    )
@@ -0,0 +1,73 @@
+import json
+import shutil
+import tempfile
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from sqlalchemy.orm import Session
+from typing import Optional
+from ..database import get_db
+from ..models import Campaign
+from ..services.audit_log import audit_log
+from ..services.jobs import job_registry
+from ..services.lead_import import lead_import_service, IMPORT_DEDUP_KEYS
+
+router = APIRouter(
+    prefix="/api/campaigns",
+    tags=["imports"]
+)
+
+@router.post("/{campaign_id}/imports", status_code=202)
+def import_leads(
+    campaign_id: int,
+    file: UploadFile = File(...),
+    field_mapping: Optional[str] = Form(None),
+    dedup: Optional[str] = Form(None),
+    external_id_column: Optional[str] = Form(None),
+    trigger_automations: bool = Form(False),
+    db: Session = Depends(get_db)
+):
+    """
+    Bulk import leads from a CSV upload as a background job.
+    Columns are mapped like webhook payloads: auto-detected, or through
+    `field_mapping` (JSON, e.g. {"E-mail Address": "email"}). `dedup` skips
+    rows whose "email" or "external_id" already exists in the campaign.
+    Poll /api/jobs/{id} for progress.
+    """
+    campaign = db.query(Campaign.id).filter(Campaign.id == campaign_id).first()
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    if dedup and dedup not in IMPORT_DEDUP_KEYS:
+        raise HTTPException(status_code=400, detail=f"dedup must be one of: {', '.join(IMPORT_DEDUP_KEYS)}")
+    if dedup == "external_id" and not external_id_column:
+        raise HTTPException(status_code=400, detail="external_id_column is required to dedup by external_id")
+    
+    mapping = None
+    if field_mapping:
+        try:
+            mapping = json.loads(field_mapping)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid field_mapping: {str(e)}")
+        if not isinstance(mapping, dict):
+            raise HTTPException(status_code=400, detail="field_mapping must be a JSON object")
+    
+    # The upload only lives for the request, so hand the job its own copy
+    with tempfile.NamedTemporaryFile(prefix="lead-import-", suffix=".csv", delete=False) as target:
+        shutil.copyfileobj(file.file, target, 1024 * 1024)
+    
+    job = job_registry.submit(
+        "lead_import",
+        lead_import_service.run,
+        target.name,
+        campaign_id,
+        field_mapping=mapping,
+        dedup=dedup,
+        external_id_column=external_id_column,
+        trigger_automations=trigger_automations,
+        params={
+            "campaign_id": campaign_id,
+            "filename": file.filename,
+            "dedup": dedup,
+            "trigger_automations": trigger_automations
+        }
+    )
+    audit_log.log_activity("import", "campaign", campaign_id, {"job_id": job.id, "filename": file.filename})
+    return job.to_dict()
@@ -1,9 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+import hashlib
+from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import func, case, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from typing import List
-from ..database import get_db
-from ..models import Integration, IntegrationStatus
-from ..schemas import Integration as IntegrationSchema, IntegrationCreate, IntegrationUpdate, IntegrationStatus as IntegrationStatusSchema
+from ..database import get_async_db, get_db
+from ..models import Integration, IntegrationStatus, SyncLog
+from ..services.cache_bus import cache_bus
+from ..services.audit_log import audit_log
+from ..schemas import (
+    Integration as IntegrationSchema,
+    IntegrationCreate,
+    IntegrationStatus as IntegrationStatusSchema,
+    IntegrationStatusSummary
+)
 
 router = APIRouter(
     prefix="/api/integrations",
@@ -12,9 +23,85 @@ router = APIRouter(
 
 @router.get("/", response_model=List[IntegrationSchema])
 def get_integrations(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    integrations = db.query(Integration).offset(skip).limit(limit).all()
+    integrations = db.query(Integration).options(
+        selectinload(Integration.status)
+    ).order_by(Integration.id).offset(skip).limit(limit).all()
     return integrations
 
+def _status_window_start(now: datetime) -> datetime:
+    """
+    Start of the 24h run-count window, aligned to the hour so the counts only
+    move when runs are logged or the hour turns, both of which the ETag covers
+    """
+    return now.replace(minute=0, second=0, microsecond=0) - timedelta(hours=24)
+
+def _status_etag(db: Session, since: datetime) -> str:
+    """
+    Cheap fingerprint of everything the bulk status view depends on,
+    computed in one round trip without loading any rows
+    """
+    fingerprint = db.query(
+        select(func.count(Integration.id)).scalar_subquery(),
+        select(func.max(Integration.id)).scalar_subquery(),
+        select(func.max(IntegrationStatus.updated_at)).scalar_subquery(),
+        select(func.max(SyncLog.id)).scalar_subquery()
+    ).one()
+    return 'W/"' + hashlib.sha1(repr((tuple(fingerprint), since)).encode()).hexdigest()[:20] + '"'
+
+@router.get("/status", response_model=List[IntegrationStatusSummary])
+def get_all_integration_statuses(request: Request, response: Response, db: Session = Depends(get_db)):
+    """
+    Status of every integration with a summary of recent sync runs.
+    Supports If-None-Match: when nothing changed the poll costs one tiny query and a 304.
+    """
+    since = _status_window_start(datetime.now())
+    etag = _status_etag(db, since)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    integrations = db.query(Integration).options(
+        selectinload(Integration.status)
+    ).order_by(Integration.id).all()
+    
+    # Per-integration run counts for the last 24h and the id of the latest run, in one grouped query
+    log_stats = {
+        row.integration_id: row
+        for row in db.query(
+            SyncLog.integration_id,
+            func.max(SyncLog.id).label("last_id"),
+            func.sum(case((SyncLog.created_at >= since, 1), else_=0)).label("runs"),
+            func.sum(case(((SyncLog.created_at >= since) & (SyncLog.status == "failure"), 1), else_=0)).label("failures")
+        ).group_by(SyncLog.integration_id)
+    }
+    last_logs = {}
+    if log_stats:
+        last_logs = {
+            log.integration_id: log
+            for log in db.query(SyncLog).filter(SyncLog.id.in_([row.last_id for row in log_stats.values()]))
+        }
+    
+    response.headers["ETag"] = etag
+    summaries = []
+    for integration in integrations:
+        stats = log_stats.get(integration.id)
+        last_log = last_logs.get(integration.id)
+        summaries.append({
+            "id": integration.id,
+            "name": integration.name,
+            "type": integration.type,
+            "campaign_id": integration.campaign_id,
+            "is_active": integration.is_active,
+            "status": integration.status,
+            "recent_sync": {
+                "last_status": last_log.status if last_log else None,
+                "last_message": last_log.message if last_log else None,
+                "last_run_at": last_log.created_at if last_log else None,
+                "runs_24h": int(stats.runs or 0) if stats else 0,
+                "failures_24h": int(stats.failures or 0) if stats else 0
+            }
+        })
+    return summaries
+
 @router.post("/", response_model=IntegrationSchema)
 def create_integration(integration: IntegrationCreate, db: Session = Depends(get_db)):
     db_integration = Integration(**integration.dict())
@@ -24,7 +111,9 @@ def create_integration(integration: IntegrationCreate, db: Session = Depends(get
     # Initialize status
     status = IntegrationStatus(integration_id=db_integration.id)
     db.add(status)
+    cache_bus.publish(db, "integration", db_integration.id)
     db.commit()
+    audit_log.log_activity("create", "integration", db_integration.id, {"type": db_integration.type})
     return db_integration
 
 @router.get("/{integration_id}", response_model=IntegrationSchema)
@@ -40,3 +129,36 @@ def get_integration_status(integration_id: int, db: Session = Depends(get_db)):
     if not status:
         raise HTTPException(status_code=404, detail="Status not found")
     return status
+
+@router.post("/{integration_id}/sync", status_code=202)
+async def trigger_sync(integration_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Start an incremental lead sync; the outcome is recorded as a SyncLog"""
+    integration = await db.get(Integration, integration_id)
+    if not integration:
+        raise HTTPException(status_code=404, detail="Integration not found")
+    if integration.type != "meta":
+        raise HTTPException(status_code=400, detail="Lead sync is only supported for Meta integrations")
+    
+    from ..services.meta_lead_sync import meta_lead_sync
+    try:
+        meta_lead_sync.start_sync(integration_id)
+    except RuntimeError:
+        raise HTTPException(status_code=409, detail="A sync is already running for this integration")
+    return {"ok": True, "message": "Sync started"}
+
+@router.get("/{integration_id}/logs")
+def get_sync_logs(integration_id: int, limit: int = 20, db: Session = Depends(get_db)):
+    """Recent sync runs for an integration, newest first"""
+    logs = db.query(SyncLog).filter(
+        SyncLog.integration_id == integration_id
+    ).order_by(SyncLog.id.desc()).limit(limit).all()
+    return [
+        {
+            "id": log.id,
+            "status": log.status,
+            "message": log.message,
+            "details": log.details,
+            "created_at": log.created_at.isoformat() if log.created_at else None
+        }
+        for log in logs
+    ]
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, HTTPException
+from typing import Optional
+from ..services.jobs import job_registry
+
+router = APIRouter(
+    prefix="/api/jobs",
+    tags=["jobs"]
+)
+
+@router.get("/")
+def list_jobs(kind: Optional[str] = None):
+    """List recent background jobs, newest first"""
+    return [job.to_dict() for job in reversed(job_registry.list(kind))]
+
+@router.get("/{job_id}")
+def get_job(job_id: str):
+    """Get progress of a background job"""
+    job = job_registry.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from ..database import get_db
+from ..models import Automation
+from ..schemas import LeadStatusBulkUpdate
+from ..services.audit_log import audit_log
+from ..services.jobs import job_registry
+from ..services.lead_status import lead_status_service
+
+router = APIRouter(
+    prefix="/api/leads",
+    tags=["leads"]
+)
+
+@router.post("/bulk-status")
+def bulk_update_status(request: LeadStatusBulkUpdate, db: Session = Depends(get_db)):
+    """
+    Set the status of many leads in one statement.
+    Target leads with `lead_ids`, or with `campaign_id` plus optional
+    `current_status`, `source` and `created_from`/`created_to` filters.
+    status_change automations for the affected leads run as a background job.
+    Requested `lead_ids` that are archived or unknown are listed in
+    `archived` and `not_found` and left unchanged.
+    """
+    if not request.status:
+        raise HTTPException(status_code=400, detail="status is required")
+    if request.lead_ids is None and request.campaign_id is None:
+        raise HTTPException(status_code=400, detail="Provide lead_ids or a campaign_id filter")
+    
+    result = lead_status_service.bulk_update(db, request)
+    audit_log.log_activity("bulk_status", "lead_status_batch", result["batch_id"], {
+        "status": request.status, "updated": result["updated"], "campaign_ids": result["campaign_ids"]
+    })
+    
+    has_automations = bool(result["campaign_ids"]) and db.query(Automation.id).filter(
+        Automation.campaign_id.in_(result["campaign_ids"]),
+        Automation.trigger_type == "status_change",
+        Automation.is_active == True
+    ).first() is not None
+    
+    job = None
+    if has_automations:
+        job = job_registry.submit(
+            "status_change_automations",
+            lead_status_service.run_automations,
+            result["batch_id"],
+            params={"batch_id": result["batch_id"], "status": request.status}
+        )
+    
+    return {
+        "batch_id": result["batch_id"],
+        "updated": result["updated"],
+        "archived": result["archived"],
+        "not_found": result["not_found"],
+        "automation_job": job.to_dict() if job else None
+    }
@@ -0,0 +1,46 @@
+from fastapi import APIRouter
+from typing import List
+from ..database import engine, async_engine, read_engine, replica_guard
+from ..metrics import registry
+from ..pool_metrics import sync_pool_metrics, async_pool_metrics, read_pool_metrics
+
+router = APIRouter(
+    prefix="/api/metrics",
+    tags=["metrics"]
+)
+
+@router.get("/db-pool")
+def get_pool_metrics():
+    """Connection pool gauges and checkout latency histograms for every engine"""
+    return {
+        "sync": sync_pool_metrics.snapshot(engine.pool),
+        "async": async_pool_metrics.snapshot(async_engine.sync_engine.pool),
+        "read": read_pool_metrics.snapshot(read_engine.pool) if read_engine is not None else None,
+        "replica": replica_guard.status() if replica_guard is not None else None
+    }
+
+def _pool_samples() -> List[str]:
+    """Connection pool gauges for the Prometheus /metrics output"""
+    pools = [("sync", sync_pool_metrics, engine.pool), ("async", async_pool_metrics, async_engine.sync_engine.pool)]
+    if read_engine is not None:
+        pools.append(("read", read_pool_metrics, read_engine.pool))
+
+    metrics = [
+        ("db_pool_size", "gauge", "Configured pool size", "size"),
+        ("db_pool_checked_out", "gauge", "Connections currently checked out", "checked_out"),
+        ("db_pool_overflow", "gauge", "Overflow connections currently open", "overflow"),
+        ("db_pool_checkouts_total", "counter", "Successful pool checkouts", "checkouts"),
+        ("db_pool_timeouts_total", "counter", "Pool checkouts that timed out", "timeouts"),
+    ]
+    snapshots = {name: pool_metrics.snapshot(pool) for name, pool_metrics, pool in pools}
+    lines = []
+    for metric, kind, documentation, key in metrics:
+        lines += [f"# HELP {metric} {documentation}", f"# TYPE {metric} {kind}"]
+        lines += [
+            f'{metric}{{pool="{name}"}} {snapshot[key]}'
+            for name, snapshot in snapshots.items() if snapshot[key] is not None
+        ]
+    # Checkout wait and hold histograms are registered metrics and render themselves
+    return lines
+
+registry.add_collector(_pool_samples)
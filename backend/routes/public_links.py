@@ -1,11 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import datetime
 import uuid
 from passlib.context import CryptContext
-from ..database import get_db
-from ..models import PublicLink, Campaign, Lead
-from ..schemas_public import PublicLink as PublicLinkSchema, PublicLinkCreate
+from ..database import SessionLocal, get_db, get_read_db, is_replica
+from ..models import PublicLink, Campaign
+from ..schemas_public import PublicLink as PublicLinkSchema, PublicLinkCreate, PublicLinkSession, PublicLinkSessionCreate, PublicLinkUpdate
+from ..responses import FastJSONResponse, accepts_gzip, file_response, gunzip_file_response
+from ..services.export_service import export_service
+from ..services.public_snapshot import public_snapshot_service
+from ..services.cache_bus import cache_bus
+from ..services.audit_log import audit_log
+from ..services.link_token_service import link_token_service
 
 router = APIRouter(
     prefix="/api/public-links",
@@ -39,77 +46,171 @@ def create_public_link(link: PublicLinkCreate, db: Session = Depends(get_db)):
     
     db.add(db_link)
     db.commit()
+    audit_log.log_activity("create", "public_link", link_uuid, {"campaign_id": link.campaign_id})
     db.refresh(db_link)
     return db_link
 
-@router.get("/{link_uuid}")
-def get_public_dashboard(link_uuid: str, password: str = None, db: Session = Depends(get_db)):
-    """
-    Public endpoint - no authentication required
-    """
-    link = db.query(PublicLink).filter(PublicLink.uuid == link_uuid).first()
+def _get_active_link(db: Session, link_uuid: str) -> dict:
+    """Resolve a public link and enforce its expiry"""
+    link = public_snapshot_service.get_link(db, link_uuid)
+    if not link and is_replica(db):
+        # A link created moments ago may not have reached the replica yet
+        primary = SessionLocal()
+        try:
+            link = public_snapshot_service.get_link(primary, link_uuid)
+        finally:
+            primary.close()
     if not link:
         raise HTTPException(status_code=404, detail="Link not found")
     
     # Check expiry
-    from datetime import datetime
-    if link.expires_at and link.expires_at < datetime.now():
+    if link["expires_at"] and link["expires_at"] < datetime.now():
         raise HTTPException(status_code=410, detail="Link has expired")
     
-    # Check password
-    if link.password_hash:
-        if not password or not pwd_context.verify(password, link.password_hash):
-            raise HTTPException(status_code=401, detail="Invalid password")
+    return link
+
+def _authorize_link(db: Session, link_uuid: str, request: Request, token: Optional[str], password: Optional[str]) -> dict:
+    """
+    Resolve a public link and check access to it.
+    Protected links accept a session token (query param or Bearer header) issued
+    by POST /{link_uuid}/session; the raw password is still accepted for older
+    clients but costs a bcrypt verification on every request.
+    """
+    link = _get_active_link(db, link_uuid)
+    if not link["password_hash"]:
+        return link
     
-    # Get campaign data
-    campaign = db.query(Campaign).filter(Campaign.id == link.campaign_id).first()
-    leads = db.query(Lead).filter(Lead.campaign_id == link.campaign_id).all()
-    
-    return {
-        "campaign": {
-            "id": campaign.id,
-            "name": campaign.name,
-            "description": campaign.description
-        },
-        "leads": [
-            {
-                "id": lead.id,
-                "email": lead.email,
-                "full_name": lead.full_name,
-                "status": lead.status,
-                "created_at": lead.created_at
-            } for lead in leads
-        ],
-        "stats": {
-            "total_leads": len(leads),
-            "new_leads": len([l for l in leads if l.status == "new"])
-        }
-    }
+    authorization = request.headers.get("Authorization", "")
+    if not token and authorization.lower().startswith("bearer "):
+        token = authorization[7:].strip()
+    
+    if token:
+        if not link_token_service.verify(token, link):
+            raise HTTPException(status_code=401, detail="Invalid or expired token")
+        return link
+    
+    if not password or not pwd_context.verify(password, link["password_hash"]):
+        raise HTTPException(status_code=401, detail="Invalid password")
+    
+    return link
+
+@router.post("/{link_uuid}/session", response_model=PublicLinkSession)
+def create_link_session(link_uuid: str, credentials: PublicLinkSessionCreate, db: Session = Depends(get_db)):
+    """
+    Exchange a link password for a short-lived access token.
+    bcrypt runs once here (on the worker threadpool, not the event loop);
+    later requests only verify the token signature.
+    """
+    link = _get_active_link(db, link_uuid)
+    if link["password_hash"] and not pwd_context.verify(credentials.password, link["password_hash"]):
+        raise HTTPException(status_code=401, detail="Invalid password")
+    
+    return link_token_service.issue(link)
+
+@router.get("/{link_uuid}", response_class=FastJSONResponse)
+def get_public_dashboard(
+    link_uuid: str,
+    request: Request,
+    token: str = None,
+    password: str = None,
+    db: Session = Depends(get_read_db)
+):
+    """
+    Public endpoint - no authentication required.
+    Served from a cached snapshot: stats plus the first page of leads.
+    Use /leads with `next_cursor` for further pages.
+    """
+    link = _authorize_link(db, link_uuid, request, token, password)
+    return FastJSONResponse(public_snapshot_service.get_snapshot(db, link))
+
+@router.get("/{link_uuid}/leads", response_class=FastJSONResponse)
+def get_public_leads(
+    link_uuid: str,
+    request: Request,
+    cursor: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=500),
+    token: str = None,
+    password: str = None,
+    db: Session = Depends(get_read_db)
+):
+    """
+    Paginated leads for a public dashboard, newest first
+    """
+    link = _authorize_link(db, link_uuid, request, token, password)
+    return FastJSONResponse(public_snapshot_service.get_leads_page(db, link["campaign_id"], cursor, limit))
+
+def _variant_etag(etag: str, encoding: str) -> str:
+    """Distinct ETag per representation of the same artifact"""
+    return f'{etag[:-1]}-{encoding}"'
 
 @router.get("/{link_uuid}/csv")
-def download_csv(link_uuid: str, password: str = None, db: Session = Depends(get_db)):
+def download_csv(
+    link_uuid: str,
+    request: Request,
+    fmt: str = Query("csv", alias="format", pattern="^(csv|csv\\.gz)$"),
+    token: str = None,
+    password: str = None,
+    db: Session = Depends(get_read_db)
+):
     """
-    Download CSV export
+    Download CSV export as leads_<id>.csv (text/csv).
+    Served from the pre-built CSV.gz artifact, so repeated downloads never
+    re-read the leads table: gzip-encoded when the client sends
+    Accept-Encoding: gzip (with ETag and Range support), decompressed on the
+    fly otherwise. `?format=csv.gz` downloads the .csv.gz file itself.
     """
+    link = _authorize_link(db, link_uuid, request, token, password)
+    
+    artifact = export_service.get_artifact(db, link["campaign_id"], "csv.gz")
+    if not artifact:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    
+    if fmt == "csv.gz":
+        return file_response(
+            request,
+            artifact["path"],
+            media_type=artifact["media_type"],
+            filename=artifact["filename"],
+            etag=artifact["etag"]
+        )
+
+    filename = f"leads_{link['campaign_id']}.csv"
+    if accepts_gzip(request):
+        return file_response(
+            request,
+            artifact["path"],
+            media_type="text/csv",
+            filename=filename,
+            etag=_variant_etag(artifact["etag"], "gzip"),
+            content_encoding="gzip"
+        )
+    return gunzip_file_response(
+        request,
+        artifact["path"],
+        media_type="text/csv",
+        filename=filename,
+        etag=_variant_etag(artifact["etag"], "identity")
+    )
+
+@router.patch("/{link_uuid}", response_model=PublicLinkSchema)
+def update_link(link_uuid: str, updates: PublicLinkUpdate, db: Session = Depends(get_db)):
+    """Change a link's password or expiry; a new password revokes its access tokens"""
     link = db.query(PublicLink).filter(PublicLink.uuid == link_uuid).first()
     if not link:
         raise HTTPException(status_code=404, detail="Link not found")
     
-    # Similar checks as above...
-    
-    leads = db.query(Lead).filter(Lead.campaign_id == link.campaign_id).all()
+    update_data = updates.dict(exclude_unset=True)
+    if "password" in update_data:
+        link.password_hash = pwd_context.hash(update_data["password"]) if update_data["password"] else None
+    if "expires_at" in update_data:
+        link.expires_at = update_data["expires_at"]
     
-    # Generate CSV (simplified)
-    csv_data = "ID,Email,Name,Status,Created\n"
-    for lead in leads:
-        csv_data += f"{lead.id},{lead.email},{lead.full_name},{lead.status},{lead.created_at}\n"
-    
-    from fastapi.responses import Response
-    return Response(
-        content=csv_data,
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename=leads_{link.campaign_id}.csv"}
-    )
+    # Cached link metadata carries the password hash and expiry, here and in every other worker
+    cache_bus.publish(db, "public_link", link_uuid)
+    db.commit()
+    audit_log.log_activity("update", "public_link", link_uuid, {"fields": sorted(update_data)})
+    db.refresh(link)
+    return link
 
 @router.delete("/{link_uuid}")
 def revoke_link(link_uuid: str, db: Session = Depends(get_db)):
@@ -118,5 +219,8 @@ def revoke_link(link_uuid: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Link not found")
     
     db.delete(link)
+    # Drops the link's cached snapshot here and in every other worker
+    cache_bus.publish(db, "public_link", link_uuid)
     db.commit()
+    audit_log.log_activity("revoke", "public_link", link_uuid)
     return {"ok": True}
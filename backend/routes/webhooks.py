@@ -1,18 +1,31 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, Query
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List
 import uuid
 import secrets
 from datetime import datetime
-from ..database import get_db
+from ..database import get_db, get_async_db
 from ..models import WebhookEndpoint, WebhookEvent, Lead, Campaign
 from ..schemas_webhook import (
     WebhookEndpoint as WebhookEndpointSchema,
     WebhookEndpointCreate,
     WebhookEndpointUpdate,
-    WebhookEvent as WebhookEventSchema
+    WebhookEvent as WebhookEventSchema,
+    WebhookReplayRequest
 )
 from ..services.webhook_normalizer import webhook_normalizer
+from ..services.data_version import bump_data_version_async
+from ..services.event_retention import webhook_event_retention
+from ..services.jobs import job_registry
+from ..services.webhook_replay import webhook_replay_service
+from ..services.cache_bus import cache_bus
+from ..services.audit_log import audit_log
+from ..services.config_cache import load_webhook_endpoint
+from ..metrics import webhook_events
+from ..responses import FastJSONResponse, rows_to_dicts
+from ..rate_limit import webhook_rate_limiter
 
 router = APIRouter(
     prefix="/api/webhooks",
@@ -38,20 +51,24 @@ def create_webhook_endpoint(endpoint: WebhookEndpointCreate, db: Session = Depen
         key=key,
         secret=secret,
         name=endpoint.name,
-        field_mapping=endpoint.field_mapping
+        field_mapping=endpoint.field_mapping,
+        rate_limit_per_minute=endpoint.rate_limit_per_minute,
+        rate_limit_burst=endpoint.rate_limit_burst
     )
     db.add(db_endpoint)
+    cache_bus.publish(db, "webhook_endpoint", key)
     db.commit()
+    audit_log.log_activity("create", "webhook_endpoint", db_endpoint.id, {"campaign_id": endpoint.campaign_id})
     db.refresh(db_endpoint)
     return db_endpoint
 
-@router.get("/", response_model=List[WebhookEndpointSchema])
+@router.get("/", response_model=List[WebhookEndpointSchema], response_class=FastJSONResponse)
 def list_webhook_endpoints(campaign_id: int = None, db: Session = Depends(get_db)):
     """List all webhook endpoints, optionally filtered by campaign"""
-    query = db.query(WebhookEndpoint)
+    query = db.query(*[getattr(WebhookEndpoint, field) for field in WebhookEndpointSchema.model_fields])
     if campaign_id:
         query = query.filter(WebhookEndpoint.campaign_id == campaign_id)
-    return query.all()
+    return FastJSONResponse(rows_to_dicts(query.all()))
 
 @router.get("/{endpoint_id}", response_model=WebhookEndpointSchema)
 def get_webhook_endpoint(endpoint_id: int, db: Session = Depends(get_db)):
@@ -76,7 +93,9 @@ def update_webhook_endpoint(
     for key, value in update_data.items():
         setattr(endpoint, key, value)
     
+    cache_bus.publish(db, "webhook_endpoint", endpoint.key)
     db.commit()
+    audit_log.log_activity("update", "webhook_endpoint", endpoint_id, {"fields": sorted(update_data)})
     db.refresh(endpoint)
     return endpoint
 
@@ -88,7 +107,9 @@ def delete_webhook_endpoint(endpoint_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Webhook endpoint not found")
     
     db.delete(endpoint)
+    cache_bus.publish(db, "webhook_endpoint", endpoint.key)
     db.commit()
+    audit_log.log_activity("delete", "webhook_endpoint", endpoint_id)
     return {"ok": True}
 
 @router.post("/{endpoint_id}/regenerate-secret", response_model=WebhookEndpointSchema)
@@ -99,55 +120,94 @@ def regenerate_secret(endpoint_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Webhook endpoint not found")
     
     endpoint.secret = secrets.token_urlsafe(32)
+    cache_bus.publish(db, "webhook_endpoint", endpoint.key)
     db.commit()
+    audit_log.log_activity("regenerate_secret", "webhook_endpoint", endpoint_id)
     db.refresh(endpoint)
     return endpoint
 
-@router.get("/{endpoint_id}/events", response_model=List[WebhookEventSchema])
+@router.get("/{endpoint_id}/events", response_model=List[WebhookEventSchema], response_class=FastJSONResponse)
 def get_webhook_events(endpoint_id: int, limit: int = 50, db: Session = Depends(get_db)):
     """Get recent webhook events for debugging"""
-    events = db.query(WebhookEvent).filter(
-        WebhookEvent.endpoint_id == endpoint_id
+    # Bounding by the retention window lets the planner skip expired partitions
+    events = db.query(*[getattr(WebhookEvent, field) for field in WebhookEventSchema.model_fields]).filter(
+        WebhookEvent.endpoint_id == endpoint_id,
+        WebhookEvent.created_at >= webhook_event_retention.cutoff()
     ).order_by(WebhookEvent.created_at.desc()).limit(limit).all()
-    return events
+    return FastJSONResponse(rows_to_dicts(events))
+
+@router.get("/{endpoint_id}/health")
+def get_webhook_health(endpoint_id: int, db: Session = Depends(get_db)):
+    """Delivery metrics for an endpoint (last success, failure rate, events/hour)"""
+    endpoint = db.query(WebhookEndpoint.id).filter(WebhookEndpoint.id == endpoint_id).first()
+    if not endpoint:
+        raise HTTPException(status_code=404, detail="Webhook endpoint not found")
+    
+    from ..services.webhook_service import webhook_service
+    return webhook_service.get_endpoint_metrics(db, endpoint_id)
+
+@router.post("/{endpoint_id}/replay", status_code=202)
+def replay_failed_events(endpoint_id: int, replay: WebhookReplayRequest, db: Session = Depends(get_db)):
+    """Re-process failed events in a time range with the current field mapping (returns a job)"""
+    endpoint = db.query(WebhookEndpoint.id).filter(WebhookEndpoint.id == endpoint_id).first()
+    if not endpoint:
+        raise HTTPException(status_code=404, detail="Webhook endpoint not found")
+    if webhook_replay_service.is_running(endpoint_id):
+        raise HTTPException(status_code=409, detail="A replay is already running for this endpoint")
+    
+    job = job_registry.submit(
+        "webhook_replay",
+        webhook_replay_service.replay,
+        endpoint_id,
+        replay.since,
+        replay.until,
+        params={
+            "endpoint_id": endpoint_id,
+            "since": replay.since.isoformat() if replay.since else None,
+            "until": replay.until.isoformat() if replay.until else None
+        }
+    )
+    return job.to_dict()
 
 # ============ Public Endpoint (No Authentication) ============
 
-@router.post("/incoming/{key}")
+# Rate limits and load shedding run first, before a database session is used
+@router.post("/incoming/{key}", dependencies=[Depends(webhook_rate_limiter)])
 async def receive_webhook(
     key: str,
     request: Request,
     secret: str = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Public webhook receiver endpoint.
     External platforms POST to: /api/webhooks/incoming/{key}?secret={secret}
     Or include X-Webhook-Secret header
     """
-    # Find webhook endpoint
-    endpoint = db.query(WebhookEndpoint).filter(WebhookEndpoint.key == key).first()
-    if not endpoint:
+    # Find webhook endpoint (cached; the rate limiter has normally loaded it already)
+    endpoint = await load_webhook_endpoint(db, key)
+    if endpoint is None:
         raise HTTPException(status_code=404, detail="Webhook not found")
     
-    if not endpoint.is_active:
+    if not endpoint["is_active"]:
         raise HTTPException(status_code=403, detail="Webhook is disabled")
     
     # Validate secret (support both query param and header)
     header_secret = request.headers.get("X-Webhook-Secret")
     provided_secret = secret or header_secret
     
-    if provided_secret != endpoint.secret:
+    if provided_secret != endpoint["secret"]:
         # Log failed attempt
         payload = await request.json()
         event = WebhookEvent(
-            endpoint_id=endpoint.id,
+            endpoint_id=endpoint["id"],
             payload=payload,
             status="failed",
             error_message="Invalid secret"
         )
         db.add(event)
-        db.commit()
+        await db.commit()
+        webhook_events.inc(endpoint_id=endpoint["id"], status="unauthorized")
         raise HTTPException(status_code=401, detail="Invalid secret")
     
     # Parse payload
@@ -157,12 +217,13 @@ async def receive_webhook(
         raise HTTPException(status_code=400, detail=f"Invalid JSON: {str(e)}")
     
     # Normalize payload
-    normalized = webhook_normalizer.normalize(payload, endpoint.field_mapping)
+    normalized = webhook_normalizer.normalize(payload, endpoint["field_mapping"])
+    endpoint_id = endpoint["id"]
     
     # Create lead
     try:
         lead = Lead(
-            campaign_id=endpoint.campaign_id,
+            campaign_id=endpoint["campaign_id"],
             email=normalized.get("email"),
             full_name=normalized.get("full_name"),
             phone=normalized.get("phone"),
@@ -171,12 +232,11 @@ async def receive_webhook(
             data=normalized.get("data")
         )
         db.add(lead)
-        db.commit()
-        db.refresh(lead)
+        await db.flush()
         
         # Log successful event
         event = WebhookEvent(
-            endpoint_id=endpoint.id,
+            endpoint_id=endpoint_id,
             payload=payload,
             normalized_data=normalized,
             lead_id=lead.id,
@@ -185,30 +245,41 @@ async def receive_webhook(
         db.add(event)
         
         # Update endpoint stats
-        endpoint.last_received_at = datetime.now()
-        endpoint.total_received += 1
-        db.commit()
-        
-        # Trigger automations asynchronously
-        from ..services.automation_engine import automation_engine
-        await automation_engine.evaluate_triggers(db, lead, "new_lead")
-        
-        return {
-            "success": True,
-            "lead_id": lead.id,
-            "message": "Lead created successfully"
-        }
+        # Incremented in SQL so concurrent deliveries don't lose counts
+        await db.execute(
+            update(WebhookEndpoint)
+            .where(WebhookEndpoint.id == endpoint_id)
+            .values(last_received_at=datetime.now(), total_received=WebhookEndpoint.total_received + 1)
+        )
+        await bump_data_version_async(db, endpoint["campaign_id"])
+        await db.commit()
+        await db.refresh(lead)
         
     except Exception as e:
+        await db.rollback()
         # Log failed event
         event = WebhookEvent(
-            endpoint_id=endpoint.id,
+            endpoint_id=endpoint_id,
             payload=payload,
             normalized_data=normalized,
             status="failed",
             error_message=str(e)
         )
         db.add(event)
-        db.commit()
+        await db.commit()
+        webhook_events.inc(endpoint_id=endpoint_id, status="failed")
         
         raise HTTPException(status_code=500, detail=f"Failed to create lead: {str(e)}")
+    
+    webhook_events.inc(endpoint_id=endpoint_id, status="success")
+    
+    # Trigger automations once the lead is committed, so a failing automation
+    # can't leave a dead-letter event for a lead that already exists
+    from ..services.automation_engine import automation_engine
+    await automation_engine.evaluate_triggers(db, lead, "new_lead")
+    
+    return {
+        "success": True,
+        "lead_id": lead.id,
+        "message": "Lead created successfully"
+    }
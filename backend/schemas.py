@@ -42,10 +42,28 @@ class Integration(IntegrationBase):
     class Config:
         orm_mode = True
 
+class SyncSummary(BaseModel):
+    last_status: Optional[str] = None
+    last_message: Optional[str] = None
+    last_run_at: Optional[datetime] = None
+    runs_24h: int = 0
+    failures_24h: int = 0
+
+class IntegrationStatusSummary(BaseModel):
+    id: int
+    name: str
+    type: str
+    campaign_id: Optional[int] = None
+    is_active: bool
+    status: Optional[IntegrationStatus] = None
+    recent_sync: SyncSummary
+
 class CampaignBase(BaseModel):
     name: str
     description: Optional[str] = None
     status: str = "active"
+    owner: Optional[str] = None
+    source: Optional[str] = None
 
 class CampaignCreate(CampaignBase):
     pass
@@ -75,3 +93,13 @@ class Lead(LeadBase):
 
     class Config:
         orm_mode = True
+
+class LeadStatusBulkUpdate(BaseModel):
+    """Target leads by id, or by campaign plus optional filters"""
+    status: str
+    lead_ids: Optional[List[int]] = None
+    campaign_id: Optional[int] = None
+    current_status: Optional[str] = None
+    source: Optional[str] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
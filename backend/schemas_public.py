@@ -11,6 +11,11 @@ class PublicLinkBase(BaseModel):
 class PublicLinkCreate(PublicLinkBase):
     pass
 
+class PublicLinkUpdate(BaseModel):
+    # Set to null to remove the password or the expiry
+    password: Optional[str] = None
+    expires_at: Optional[datetime] = None
+
 class PublicLink(BaseModel):
     id: int
     campaign_id: int
@@ -21,3 +26,11 @@ class PublicLink(BaseModel):
 
     class Config:
         orm_mode = True
+
+class PublicLinkSessionCreate(BaseModel):
+    password: str
+
+class PublicLinkSession(BaseModel):
+    access_token: str
+    token_type: str = "bearer"
+    expires_at: datetime
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any
 from datetime import datetime
 
@@ -6,6 +6,8 @@ class WebhookEndpointBase(BaseModel):
     campaign_id: int
     name: str
     field_mapping: Optional[Dict[str, str]] = None
+    rate_limit_per_minute: Optional[int] = Field(None, ge=0)
+    rate_limit_burst: Optional[int] = Field(None, ge=1)
 
 class WebhookEndpointCreate(WebhookEndpointBase):
     pass
@@ -14,6 +16,8 @@ class WebhookEndpointUpdate(BaseModel):
     name: Optional[str] = None
     field_mapping: Optional[Dict[str, str]] = None
     is_active: Optional[bool] = None
+    rate_limit_per_minute: Optional[int] = Field(None, ge=0)
+    rate_limit_burst: Optional[int] = Field(None, ge=1)
 
 class WebhookEndpoint(WebhookEndpointBase):
     id: int
@@ -41,3 +45,7 @@ class WebhookEvent(WebhookEventBase):
 
     class Config:
         orm_mode = True
+
+class WebhookReplayRequest(BaseModel):
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
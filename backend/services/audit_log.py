@@ -0,0 +1,153 @@
+import atexit
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import insert
+from ..database import SessionLocal
+from ..models import ActivityLog, SyncLog
+
+logger = logging.getLogger(__name__)
+
+# Entries buffered before the flusher is woken early
+AUDIT_LOG_FLUSH_SIZE = int(os.getenv("AUDIT_LOG_FLUSH_SIZE", "500"))
+# Longest an entry waits in memory
+AUDIT_LOG_FLUSH_SECONDS = float(os.getenv("AUDIT_LOG_FLUSH_SECONDS", "2"))
+# Entries beyond this are dropped (and counted) while the database is unreachable
+AUDIT_LOG_MAX_BUFFER = int(os.getenv("AUDIT_LOG_MAX_BUFFER", "50000"))
+
+
+class AuditLogWriter:
+    """
+    Buffered writer for the append-only ActivityLog and SyncLog streams.
+
+    `log_activity()` and `log_sync()` only append to an in-memory buffer, so
+    callers don't pay for a commit per entry. A background thread flushes the
+    buffer every AUDIT_LOG_FLUSH_SECONDS, or as soon as it holds
+    AUDIT_LOG_FLUSH_SIZE entries, with one bulk INSERT per table in a single
+    transaction. `stop()` (app shutdown) and interpreter exit flush whatever
+    is left. created_at is taken when the entry is logged, not when it's
+    written.
+
+    A failed flush puts the entries back for the next attempt; if the buffer
+    outgrows AUDIT_LOG_MAX_BUFFER meanwhile, new entries are dropped and
+    counted in `dropped`.
+    """
+
+    def __init__(self, flush_size: int = AUDIT_LOG_FLUSH_SIZE, flush_seconds: float = AUDIT_LOG_FLUSH_SECONDS,
+                 max_buffer: int = AUDIT_LOG_MAX_BUFFER):
+        self.flush_size = flush_size
+        self.flush_seconds = flush_seconds
+        self.max_buffer = max_buffer
+        self.dropped = 0
+        self._buffer: List[Tuple[type, Dict[str, Any]]] = []
+        self._lock = threading.Lock()
+        # Serializes flushes so entries reach the database in the order they were logged
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def log_activity(self, action: str, resource_type: str, resource_id: Any = None,
+                     details: Optional[Dict[str, Any]] = None, user_id: Optional[int] = None):
+        """Records a user or system action on a resource"""
+        self._append(ActivityLog, {
+            "user_id": user_id,
+            "action": action,
+            "resource_type": resource_type,
+            "resource_id": str(resource_id) if resource_id is not None else None,
+            "details": details
+        })
+
+    def log_sync(self, integration_id: int, status: str, message: Optional[str] = None,
+                 details: Optional[Dict[str, Any]] = None):
+        """Records the outcome of an integration sync run"""
+        self._append(SyncLog, {
+            "integration_id": integration_id,
+            "status": status,
+            "message": message,
+            "details": details
+        })
+
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def flush(self) -> int:
+        """Writes every buffered entry now. Returns how many were written"""
+        with self._flush_lock:
+            with self._lock:
+                entries, self._buffer = self._buffer, []
+            if not entries:
+                return 0
+
+            by_model: Dict[type, List[Dict[str, Any]]] = {}
+            for model, row in entries:
+                by_model.setdefault(model, []).append(row)
+
+            db = SessionLocal()
+            try:
+                for model, rows in by_model.items():
+                    db.execute(insert(model), rows)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                self._requeue(entries)
+                logger.error(f"Audit log flush of {len(entries)} entries failed: {str(e)}")
+                return 0
+            finally:
+                db.close()
+            return len(entries)
+
+    # ============ Flusher thread ============
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-log", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=self.flush_seconds + 5)
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Audit log flusher failed: {str(e)}")
+
+    def _append(self, model: type, row: Dict[str, Any]):
+        row["created_at"] = datetime.now()
+        with self._lock:
+            if len(self._buffer) >= self.max_buffer:
+                self.dropped += 1
+                return
+            self._buffer.append((model, row))
+            full = len(self._buffer) >= self.flush_size
+        if full:
+            if self._thread and self._thread.is_alive():
+                self._wake.set()
+            else:
+                # No flusher (CLI runs, jobs outside the app): write inline rather than grow unbounded
+                self.flush()
+
+    def _requeue(self, entries: List[Tuple[type, Dict[str, Any]]]):
+        with self._lock:
+            room = max(self.max_buffer - len(self._buffer), 0)
+            kept = entries[:room]
+            self.dropped += len(entries) - len(kept)
+            self._buffer = kept + self._buffer
+
+
+audit_log = AuditLogWriter()
+# Scripts and CLI runs never call stop(); don't lose their last entries
+atexit.register(audit_log.flush)
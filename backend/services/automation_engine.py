@@ -1,7 +1,16 @@
-from typing import List, Dict, Any
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import List, Dict, Any, Set, Tuple, Union
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from ..models import Automation, Lead, Campaign
+from ..models import Automation, Lead, LeadStatusChange, Campaign
 from ..schemas import Lead as LeadSchema
+from .data_version import bump_data_version, bump_data_version_async, bump_data_versions
+from ..metrics import automation_actions
+from .config_cache import automation_cache
+from .lead_status import lead_status_service
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,20 +19,86 @@ class AutomationEngine:
     def __init__(self):
         pass
 
-    async def evaluate_triggers(self, db: Session, lead: Lead, trigger_type: str):
+    async def evaluate_triggers(self, db: Union[Session, AsyncSession], lead: Lead, trigger_type: str):
         """
         Evaluates all active automations for a given campaign and trigger type.
+        Accepts either a sync Session or an AsyncSession.
         """
-        campaign_id = lead.campaign_id
-        automations = db.query(Automation).filter(
-            Automation.campaign_id == campaign_id,
-            Automation.trigger_type == trigger_type,
-            Automation.is_active == True
-        ).all()
+        automations = await self._load_automations(db, lead.campaign_id, trigger_type)
 
         for automation in automations:
-            if self._check_conditions(automation.trigger_config, lead):
-                await self._execute_actions(automation.actions, lead, db)
+            if self._check_conditions(automation["trigger_config"], lead):
+                await self._execute_actions(automation["actions"], lead, db)
+
+    async def evaluate_status_changes(self, db: Session, changes: List[Tuple[Lead, Any]]) -> int:
+        """
+        Batch counterpart of evaluate_triggers for "status_change".
+        `changes` pairs each lead with its LeadStatusChange row. Automations are
+        loaded once per campaign and `update_lead` actions run as one UPDATE
+        over every matching lead, committed together. trigger_config may
+        narrow the transition with "from_status"/"to_status". Leads updated
+        here don't fire status_change again. Returns the actions executed.
+        """
+        return await self._evaluate_batch(db, "status_change", changes)
+
+    async def evaluate_new_leads(self, db: Session, leads: List[Lead]) -> int:
+        """
+        Batch counterpart of evaluate_triggers for "new_lead", for bulk inserts
+        such as imports: one commit for the whole batch instead of one per lead.
+        Returns the actions executed.
+        """
+        return await self._evaluate_batch(db, "new_lead", [(lead, None) for lead in leads])
+
+    async def _evaluate_batch(self, db: Session, trigger_type: str, items: List[Tuple[Lead, Any]]) -> int:
+        by_campaign: Dict[int, List[Tuple[Lead, Any]]] = defaultdict(list)
+        for lead, change in items:
+            by_campaign[lead.campaign_id].append((lead, change))
+
+        executed = 0
+        updated_campaigns: Set[int] = set()
+        for campaign_id, campaign_items in by_campaign.items():
+            for automation in await self._load_automations(db, campaign_id, trigger_type):
+                config = automation["trigger_config"] or {}
+                matched = [
+                    lead for lead, change in campaign_items
+                    if (change is None or self._matches_transition(config, change))
+                    and self._check_conditions(config, lead)
+                ]
+                if not matched:
+                    continue
+                for action in automation["actions"]:
+                    executed += await self._execute_action_batch(action, matched, db, updated_campaigns)
+
+        if updated_campaigns:
+            bump_data_versions(db, updated_campaigns)
+            db.commit()
+        return executed
+
+    async def _load_automations(self, db: Union[Session, AsyncSession], campaign_id: int,
+                                trigger_type: str) -> List[Dict[str, Any]]:
+        automations = automation_cache.get((campaign_id, trigger_type))
+        if automations is None:
+            query = select(Automation.id, Automation.trigger_config, Automation.actions).where(
+                Automation.campaign_id == campaign_id,
+                Automation.trigger_type == trigger_type,
+                Automation.is_active == True
+            )
+            if isinstance(db, AsyncSession):
+                rows = (await db.execute(query)).all()
+            else:
+                rows = db.execute(query).all()
+            automations = automation_cache.set(
+                (campaign_id, trigger_type),
+                [{"id": row.id, "trigger_config": row.trigger_config, "actions": row.actions or []} for row in rows]
+            )
+        return automations
+
+    def _matches_transition(self, config: Dict[str, Any], change) -> bool:
+        if config.get("from_status") and config["from_status"] != change.from_status:
+            return False
+        if config.get("to_status") and config["to_status"] != change.to_status:
+            return False
+        return True
 
     def _check_conditions(self, config: Dict[str, Any], lead: Lead) -> bool:
         """
@@ -50,7 +125,7 @@ class AutomationEngine:
             
         return True
 
-    async def _execute_actions(self, actions: List[Dict[str, Any]], lead: Lead, db: Session):
+    async def _execute_actions(self, actions: List[Dict[str, Any]], lead: Lead, db: Union[Session, AsyncSession]):
         """
         Executes the defined actions.
         Example action: {"type": "send_email", "template_id": 1}
@@ -67,21 +142,74 @@ class AutomationEngine:
                     await self._action_call_webhook(action, lead)
                 
                 logger.info(f"Executed action {action_type} for lead {lead.id}")
+                automation_actions.inc(action=action_type, outcome="success")
             except Exception as e:
                 logger.error(f"Failed to execute action {action_type}: {str(e)}")
+                automation_actions.inc(action=action_type, outcome="error")
+
+    async def _execute_action_batch(self, action: Dict[str, Any], leads: List[Lead], db: Session,
+                                    updated_campaigns: Set[int]) -> int:
+        """Runs one action for many leads; lead updates become a single UPDATE left for the caller to commit"""
+        action_type = action.get("type")
+        try:
+            if action_type == "update_lead":
+                updates = {
+                    key: value for key, value in (action.get("updates") or {}).items()
+                    if key in Lead.__table__.columns and key not in ("id", "campaign_id")
+                }
+                if updates:
+                    lead_ids = [lead.id for lead in leads]
+                    # A savepoint, so a failed UPDATE doesn't leave its status changes for the caller to commit
+                    with db.begin_nested():
+                        if "status" in updates:
+                            # Recorded like any status change, so funnels count it
+                            db.execute(lead_status_service.record_changes(
+                                str(uuid.uuid4()), updates["status"], Lead.id.in_(lead_ids)
+                            ))
+                        db.execute(
+                            update(Lead).where(Lead.id.in_(lead_ids)).values(**updates),
+                            execution_options={"synchronize_session": False}
+                        )
+                    updated_campaigns.update(lead.campaign_id for lead in leads)
+            else:
+                for lead in leads:
+                    if action_type == "send_email":
+                        await self._action_send_email(action, lead)
+                    elif action_type == "webhook":
+                        await self._action_call_webhook(action, lead)
+
+            logger.info(f"Executed action {action_type} for {len(leads)} leads")
+            automation_actions.inc(len(leads), action=action_type, outcome="success")
+            return len(leads)
+        except Exception as e:
+            logger.error(f"Failed to execute action {action_type}: {str(e)}")
+            automation_actions.inc(len(leads), action=action_type, outcome="error")
+            return 0
 
     async def _action_send_email(self, action: Dict[str, Any], lead: Lead):
         # Placeholder for email sending logic
         # Would use SMTPService here
         print(f"Sending email to {lead.email}")
 
-    async def _action_update_lead(self, action: Dict[str, Any], lead: Lead, db: Session):
+    async def _action_update_lead(self, action: Dict[str, Any], lead: Lead, db: Union[Session, AsyncSession]):
         # Update lead fields
         updates = action.get("updates", {})
+        if "status" in updates and updates["status"] != lead.status:
+            db.add(LeadStatusChange(
+                batch_id=str(uuid.uuid4()), lead_id=lead.id, campaign_id=lead.campaign_id,
+                from_status=lead.status, to_status=updates["status"], changed_at=datetime.now()
+            ))
         for key, value in updates.items():
             if hasattr(lead, key):
                 setattr(lead, key, value)
-        db.commit()
+        # One commit per action: this path serves a single new lead (a webhook
+        # delivery); bulk inserts go through evaluate_new_leads instead
+        if isinstance(db, AsyncSession):
+            await bump_data_version_async(db, lead.campaign_id)
+            await db.commit()
+        else:
+            bump_data_version(db, lead.campaign_id)
+            db.commit()
 
     async def _action_call_webhook(self, action: Dict[str, Any], lead: Lead):
         # Call external webhook
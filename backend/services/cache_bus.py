@@ -0,0 +1,176 @@
+import json
+import logging
+import os
+import select
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from ..database import SessionLocal, engine
+from ..models import CacheVersion
+
+logger = logging.getLogger(__name__)
+
+CACHE_BUS_CHANNEL = "cache_invalidation"
+# How often versions are polled when notifications aren't available (SQLite)
+CACHE_BUS_POLL_SECONDS = float(os.getenv("CACHE_BUS_POLL_SECONDS", "1"))
+# Safety-net version check on PostgreSQL, in case a notification was missed while reconnecting
+CACHE_BUS_RESYNC_SECONDS = float(os.getenv("CACHE_BUS_RESYNC_SECONDS", "30"))
+
+TOPICS = ("webhook_endpoint", "automation", "integration", "campaign", "public_link")
+
+_PENDING = "cache_bus_pending"
+
+
+class CacheBus:
+    """
+    Keeps in-process caches coherent across uvicorn workers.
+
+    `publish()` runs inside the writer's transaction: it bumps the topic's
+    row in cache_versions and, on PostgreSQL, sends a NOTIFY with the topic
+    and key. Both only take effect on commit. The writing worker drops its
+    own entries right after commit; other workers hear about it through
+    LISTEN, or by polling cache_versions on SQLite (where the key is
+    unknown and the whole topic is dropped).
+    """
+
+    def __init__(self, poll_seconds: float = CACHE_BUS_POLL_SECONDS, resync_seconds: float = CACHE_BUS_RESYNC_SECONDS):
+        self.poll_seconds = poll_seconds
+        self.resync_seconds = resync_seconds
+        self._subscribers: Dict[str, List[Callable[[Any], None]]] = defaultdict(list)
+        self._versions: Optional[Dict[str, int]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, topic: str, callback: Callable[[Any], None]):
+        """Registers `callback(key)` for a topic; key is None when the whole topic is stale"""
+        self._check_topic(topic)
+        self._subscribers[topic].append(callback)
+
+    def publish(self, db: Session, topic: str, key: Any = None):
+        """Queues an invalidation that is delivered to every worker once `db` commits"""
+        self._check_topic(topic)
+        db.query(CacheVersion).filter(CacheVersion.topic == topic).update(
+            {CacheVersion.version: CacheVersion.version + 1},
+            synchronize_session=False
+        )
+        if db.bind.dialect.name == "postgresql":
+            db.execute(text("SELECT pg_notify(:channel, :payload)"), {
+                "channel": CACHE_BUS_CHANNEL,
+                "payload": json.dumps({"topic": topic, "key": key})
+            })
+        db.info.setdefault(_PENDING, []).append((topic, key))
+
+    def dispatch(self, topic: str, key: Any = None):
+        for callback in self._subscribers.get(topic, []):
+            try:
+                callback(key)
+            except Exception as e:
+                logger.error(f"Cache invalidation for {topic} failed: {str(e)}")
+
+    # ============ Subscription loop ============
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._ensure_topics()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cache-bus", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if engine.dialect.driver == "psycopg2":
+                    self._listen_postgres()
+                else:
+                    self._poll_versions()
+                    self._stop.wait(self.poll_seconds)
+            except Exception as e:
+                logger.error(f"Cache bus subscriber failed, retrying: {str(e)}")
+                self._stop.wait(self.poll_seconds)
+
+    def _listen_postgres(self):
+        # A dedicated connection outside the pool, since LISTEN holds it for the process lifetime
+        cargs, cparams = engine.dialect.create_connect_args(engine.url)
+        connection = engine.dialect.connect(*cargs, **cparams)
+        try:
+            connection.autocommit = True
+            connection.cursor().execute(f"LISTEN {CACHE_BUS_CHANNEL}")
+            # Anything published while we were not listening
+            self._poll_versions()
+            waited = 0.0
+            while not self._stop.is_set():
+                timeout = min(self.poll_seconds, self.resync_seconds)
+                if select.select([connection], [], [], timeout) == ([], [], []):
+                    waited += timeout
+                    if waited >= self.resync_seconds:
+                        self._poll_versions()
+                        waited = 0.0
+                    continue
+                connection.poll()
+                while connection.notifies:
+                    notification = connection.notifies.pop(0)
+                    self._on_notification(notification.payload)
+        finally:
+            connection.close()
+
+    def _on_notification(self, payload: str):
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return
+        if message.get("topic") in TOPICS:
+            self.dispatch(message["topic"], message.get("key"))
+
+    def _poll_versions(self):
+        db = SessionLocal()
+        try:
+            versions = {row.topic: row.version for row in db.query(CacheVersion.topic, CacheVersion.version)}
+        finally:
+            db.close()
+
+        previous, self._versions = self._versions, versions
+        if previous is None:
+            return
+        for topic, version in versions.items():
+            if previous.get(topic) != version:
+                self.dispatch(topic)
+
+    def _ensure_topics(self):
+        db = SessionLocal()
+        try:
+            existing = {row.topic for row in db.query(CacheVersion.topic)}
+            missing = [topic for topic in TOPICS if topic not in existing]
+            if missing:
+                db.add_all([CacheVersion(topic=topic, version=0) for topic in missing])
+                db.commit()
+        except Exception as e:
+            # Another worker inserted them first
+            db.rollback()
+            logger.debug(f"Cache topics already initialized: {str(e)}")
+        finally:
+            db.close()
+
+    def _check_topic(self, topic: str):
+        if topic not in TOPICS:
+            raise ValueError(f"Unknown cache topic: {topic}")
+
+
+cache_bus = CacheBus()
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_after_commit(session: Session):
+    pending: List[Tuple[str, Any]] = session.info.pop(_PENDING, None)
+    for topic, key in pending or ():
+        cache_bus.dispatch(topic, key)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session):
+    session.info.pop(_PENDING, None)
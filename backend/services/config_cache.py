@@ -0,0 +1,82 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models import WebhookEndpoint
+from .cache_bus import cache_bus
+
+# Upper bound on staleness should an invalidation ever be lost
+CONFIG_CACHE_SECONDS = float(os.getenv("CONFIG_CACHE_SECONDS", "300"))
+
+
+class ConfigCache:
+    """
+    Small TTL cache for configuration rows read on hot paths (webhook
+    endpoints, automations). Values are plain dicts/lists, never ORM objects,
+    so they can be shared between sessions and threads. Entries are dropped
+    through the cache bus when the underlying rows change.
+    """
+
+    def __init__(self, ttl_seconds: float = CONFIG_CACHE_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[Hashable, Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] >= self.ttl_seconds:
+                del self._entries[key]
+                return None
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> Any:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+        return value
+
+    def invalidate(self, key: Optional[Hashable] = None, match: Optional[Callable[[Hashable], bool]] = None):
+        """Drops one key, every key for which `match(key)` is true, or everything"""
+        with self._lock:
+            if key is not None:
+                self._entries.pop(key, None)
+            elif match is not None:
+                for cached_key in [k for k in self._entries if match(k)]:
+                    del self._entries[cached_key]
+            else:
+                self._entries.clear()
+
+
+# Webhook endpoint key -> {id, campaign_id, secret, is_active, field_mapping, rate_limit_per_minute, rate_limit_burst}
+webhook_endpoint_cache = ConfigCache()
+# (campaign_id, trigger_type) -> [{id, trigger_config, actions}, ...]
+automation_cache = ConfigCache()
+
+cache_bus.subscribe("webhook_endpoint", lambda key: webhook_endpoint_cache.invalidate(key))
+
+
+async def load_webhook_endpoint(db: AsyncSession, key: str) -> Optional[Dict[str, Any]]:
+    """The receiver's view of an endpoint: from webhook_endpoint_cache, or the database on a miss"""
+    endpoint = webhook_endpoint_cache.get(key)
+    if endpoint is None:
+        row = (await db.execute(
+            select(
+                WebhookEndpoint.id, WebhookEndpoint.campaign_id, WebhookEndpoint.secret,
+                WebhookEndpoint.is_active, WebhookEndpoint.field_mapping,
+                WebhookEndpoint.rate_limit_per_minute, WebhookEndpoint.rate_limit_burst
+            ).where(WebhookEndpoint.key == key)
+        )).first()
+        if not row:
+            return None
+        endpoint = webhook_endpoint_cache.set(key, dict(row._mapping))
+    return endpoint
+cache_bus.subscribe(
+    "automation",
+    lambda campaign_id: automation_cache.invalidate(
+        match=(lambda key: key[0] == campaign_id) if campaign_id is not None else None
+    )
+)
@@ -0,0 +1,84 @@
+from typing import Dict, Iterable, Optional
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from ..models import Campaign, CampaignDataChange
+
+# A campaign's data version is the sum of its rows in campaign_data_changes.
+# Bumping inserts a row instead of updating the campaign, so concurrent lead
+# writes (e.g. webhook deliveries) don't serialize on the campaign row lock.
+
+
+def _version_of(campaign_id_column):
+    return select(func.coalesce(func.sum(CampaignDataChange.changes), 0)).where(
+        CampaignDataChange.campaign_id == campaign_id_column
+    ).scalar_subquery()
+
+
+def bump_data_version(db: Session, campaign_id: int) -> None:
+    """
+    Increments the campaign's data version inside the caller's transaction.
+    Call this alongside any insert/update of the campaign's leads so caches and
+    pre-built artifacts keyed on the version know they are stale.
+    """
+    db.execute(insert(CampaignDataChange).values(campaign_id=campaign_id))
+
+
+async def bump_data_version_async(db: AsyncSession, campaign_id: int) -> None:
+    """bump_data_version for AsyncSession callers"""
+    await db.execute(insert(CampaignDataChange).values(campaign_id=campaign_id))
+
+
+def bump_data_versions(db: Session, campaign_ids: Iterable[int]) -> None:
+    """Bulk variant of bump_data_version for writes spanning several campaigns"""
+    ids = sorted(set(campaign_ids))
+    if not ids:
+        return
+    db.execute(insert(CampaignDataChange), [{"campaign_id": campaign_id} for campaign_id in ids])
+
+
+def get_data_version(db: Session, campaign_id: int) -> Optional[int]:
+    """Returns the current data version, or None if the campaign does not exist"""
+    row = db.execute(
+        select(_version_of(Campaign.id).label("data_version")).where(Campaign.id == campaign_id)
+    ).first()
+    return row.data_version if row else None
+
+
+def get_data_versions(db: Session) -> Dict[int, int]:
+    """Returns {campaign_id: data_version} for every campaign in one query"""
+    rows = db.execute(
+        select(Campaign.id, func.coalesce(func.sum(CampaignDataChange.changes), 0))
+        .outerjoin(CampaignDataChange, CampaignDataChange.campaign_id == Campaign.id)
+        .group_by(Campaign.id)
+    ).all()
+    return {campaign_id: version for campaign_id, version in rows}
+
+
+def compact_data_versions(db: Session) -> int:
+    """
+    Folds each campaign's change rows into its newest one, leaving every
+    version unchanged. Rows are summed from what the DELETE actually removed,
+    so a bump committing meanwhile is never lost. Returns the rows removed.
+    """
+    newest = db.execute(
+        select(CampaignDataChange.campaign_id, func.max(CampaignDataChange.id))
+        .group_by(CampaignDataChange.campaign_id)
+        .having(func.count() > 1)
+    ).all()
+
+    removed = 0
+    for campaign_id, keep_id in newest:
+        folded = db.execute(
+            delete(CampaignDataChange)
+            .where(CampaignDataChange.campaign_id == campaign_id, CampaignDataChange.id < keep_id)
+            .returning(CampaignDataChange.changes)
+        ).scalars().all()
+        if folded:
+            db.execute(
+                update(CampaignDataChange).where(CampaignDataChange.id == keep_id)
+                .values(changes=CampaignDataChange.changes + sum(folded))
+            )
+            removed += len(folded)
+    db.commit()
+    return removed
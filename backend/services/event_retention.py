@@ -0,0 +1,310 @@
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import os
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from ..database import SessionLocal, engine
+from ..models import WebhookEvent
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_EVENT_RETENTION_DAYS = int(os.getenv("WEBHOOK_EVENT_RETENTION_DAYS", "30"))
+WEBHOOK_EVENT_ARCHIVE = os.getenv("WEBHOOK_EVENT_ARCHIVE", "true").lower() == "true"
+WEBHOOK_EVENT_ARCHIVE_DIR = os.getenv("WEBHOOK_EVENT_ARCHIVE_DIR", os.path.join("archives", "webhook_events"))
+WEBHOOK_EVENT_RETENTION_INTERVAL_SECONDS = int(os.getenv("WEBHOOK_EVENT_RETENTION_INTERVAL_SECONDS", "3600"))
+# Monthly partitions created ahead of time on PostgreSQL
+PARTITIONS_AHEAD = 2
+# PostgreSQL advisory lock held while a worker runs retention
+RETENTION_LOCK_KEY = 4823001
+
+TABLE = WebhookEvent.__tablename__
+
+
+def _month_start(value: datetime) -> datetime:
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _next_month(value: datetime) -> datetime:
+    return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+class WebhookEventRetention:
+    """
+    Enforces a retention window on webhook_events and archives what expires.
+
+    On PostgreSQL, once the table has been converted with `partition_table()`,
+    events live in monthly range partitions on created_at: partitions are
+    created ahead of time and an expired month is archived, detached and
+    dropped in one cheap DDL step. Elsewhere (SQLite, or an unconverted
+    table) expired rows are archived and deleted in id-ordered batches.
+
+    Archives are gzip-compressed JSON lines, one file per month, under
+    WEBHOOK_EVENT_ARCHIVE_DIR. Every worker runs the loop, but on PostgreSQL
+    a run only proceeds in the worker holding the advisory lock, so rows and
+    partitions are archived once.
+    """
+
+    def __init__(self, retention_days: int = WEBHOOK_EVENT_RETENTION_DAYS, archive: bool = WEBHOOK_EVENT_ARCHIVE,
+                 archive_dir: str = WEBHOOK_EVENT_ARCHIVE_DIR, batch_size: int = 5000):
+        self.retention_days = retention_days
+        self.archive = archive
+        self.archive_dir = archive_dir
+        self.batch_size = batch_size
+        self.running = False
+
+    async def start(self):
+        self.running = True
+        while self.running:
+            try:
+                await asyncio.to_thread(self.run_once)
+            except Exception as e:
+                logger.error(f"Webhook event retention failed: {str(e)}")
+            await asyncio.sleep(WEBHOOK_EVENT_RETENTION_INTERVAL_SECONDS)
+
+    def stop(self):
+        self.running = False
+
+    def cutoff(self) -> datetime:
+        return datetime.now() - timedelta(days=self.retention_days)
+
+    def run_once(self, job=None) -> Dict[str, Any]:
+        with self._exclusive() as acquired:
+            if not acquired:
+                logger.info("Webhook event retention is running in another worker, skipping")
+                return {"mode": "skipped"}
+            db = SessionLocal()
+            try:
+                if self._is_partitioned(db):
+                    self.ensure_partitions(db)
+                    return self._drop_expired_partitions(db)
+                return self._purge_in_batches(db, job)
+            finally:
+                db.close()
+
+    @contextmanager
+    def _exclusive(self):
+        """Yields whether this worker may run retention; SQLite serializes writers, so it always may"""
+        if engine.dialect.name != "postgresql":
+            yield True
+            return
+        # A session-level lock on its own connection, so it outlives the run's commits
+        with engine.connect() as connection:
+            acquired = connection.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": RETENTION_LOCK_KEY}
+            ).scalar()
+            connection.commit()
+            try:
+                yield acquired
+            finally:
+                if acquired:
+                    connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": RETENTION_LOCK_KEY})
+                    connection.commit()
+
+    # ============ PostgreSQL partitioning ============
+
+    def partition_table(self, db: Session) -> None:
+        """
+        One-off conversion of webhook_events into a table range-partitioned by
+        month on created_at. Existing rows are copied into their partitions.
+        Run it in a maintenance window: it rewrites the table.
+        """
+        if db.bind.dialect.name != "postgresql":
+            raise RuntimeError("Native partitioning requires PostgreSQL")
+        if self._is_partitioned(db):
+            return
+
+        first, last = db.execute(text(f"SELECT min(created_at), max(created_at) FROM {TABLE}")).one()
+        statements = [
+            f"ALTER TABLE {TABLE} RENAME TO {TABLE}_legacy",
+            f"ALTER SEQUENCE {TABLE}_id_seq OWNED BY NONE",
+            f"CREATE TABLE {TABLE} (LIKE {TABLE}_legacy INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)",
+            f"ALTER TABLE {TABLE} ALTER COLUMN created_at SET NOT NULL",
+            # The partition key must be part of the primary key
+            f"ALTER TABLE {TABLE} ADD PRIMARY KEY (id, created_at)",
+            f"ALTER TABLE {TABLE} ADD FOREIGN KEY (endpoint_id) REFERENCES webhook_endpoints (id)",
+            f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT",
+        ]
+        for statement in statements:
+            db.execute(text(statement))
+
+        self.ensure_partitions(db, since=first.replace(tzinfo=None) if first else None, commit=False)
+
+        db.execute(text(
+            f"INSERT INTO {TABLE} SELECT id, endpoint_id, payload, normalized_data, lead_id, status, "
+            f"error_message, coalesce(created_at, now()) FROM {TABLE}_legacy"
+        ))
+        db.execute(text(f"DROP TABLE {TABLE}_legacy"))
+        db.execute(text(f"ALTER SEQUENCE {TABLE}_id_seq OWNED BY {TABLE}.id"))
+        # Parent-level indexes cascade to every partition
+        db.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{TABLE}_endpoint_created ON {TABLE} (endpoint_id, created_at)"))
+        db.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{TABLE}_created_at ON {TABLE} (created_at)"))
+        db.commit()
+        logger.info(f"Converted {TABLE} to monthly partitions (rows from {first} to {last})")
+
+    def ensure_partitions(self, db: Session, since: Optional[datetime] = None, commit: bool = True) -> List[str]:
+        """Creates any missing monthly partitions from `since` (default: now) to PARTITIONS_AHEAD months out"""
+        existing = {name for name, _, _ in self._list_partitions(db)}
+        month = _month_start(since or datetime.now())
+        end = _month_start(datetime.now())
+        for _ in range(PARTITIONS_AHEAD):
+            end = _next_month(end)
+
+        created = []
+        while month <= end:
+            name = f"{TABLE}_p{month:%Y_%m}"
+            if name not in existing:
+                db.execute(text(
+                    f"CREATE TABLE {name} PARTITION OF {TABLE} "
+                    f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{_next_month(month):%Y-%m-%d}')"
+                ))
+                created.append(name)
+            month = _next_month(month)
+        if commit:
+            db.commit()
+        return created
+
+    def _drop_expired_partitions(self, db: Session) -> Dict[str, Any]:
+        cutoff = self.cutoff()
+        dropped, archived = [], 0
+        for name, lower, upper in self._list_partitions(db):
+            if upper is None or upper > cutoff:
+                continue
+            if self.archive:
+                archived += self._archive_query(db, f"{lower:%Y-%m}", text(f"SELECT * FROM {name} ORDER BY id"))
+            db.execute(text(f"ALTER TABLE {TABLE} DETACH PARTITION {name}"))
+            db.execute(text(f"DROP TABLE {name}"))
+            db.commit()
+            dropped.append(name)
+        return {"mode": "partitioned", "dropped": dropped, "archived": archived}
+
+    def _is_partitioned(self, db: Session) -> bool:
+        if db.bind.dialect.name != "postgresql":
+            return False
+        return db.execute(text(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = :table"
+        ), {"table": TABLE}).first() is not None
+
+    def _list_partitions(self, db: Session) -> List[Tuple[str, Optional[datetime], Optional[datetime]]]:
+        """Returns (name, lower, upper) for each monthly partition, parsed from its name"""
+        rows = db.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :table"
+        ), {"table": TABLE}).all()
+
+        partitions = []
+        for (name,) in rows:
+            try:
+                lower = datetime.strptime(name[len(TABLE) + 2:], "%Y_%m")
+            except ValueError:
+                # The default partition has no bounds and is never dropped
+                partitions.append((name, None, None))
+                continue
+            partitions.append((name, lower, _next_month(lower)))
+        return partitions
+
+    # ============ Batched fallback ============
+
+    def _purge_in_batches(self, db: Session, job=None) -> Dict[str, Any]:
+        cutoff = self.cutoff()
+        deleted = 0
+        while True:
+            rows = db.query(WebhookEvent).filter(
+                WebhookEvent.created_at < cutoff
+            ).order_by(WebhookEvent.id).limit(self.batch_size).all()
+            if not rows:
+                break
+
+            if self.archive:
+                self._archive_rows(rows)
+            ids = [row.id for row in rows]
+            db.query(WebhookEvent).filter(WebhookEvent.id.in_(ids)).delete(synchronize_session=False)
+            db.commit()
+            db.expunge_all()
+
+            deleted += len(ids)
+            if job:
+                job.advance(len(ids))
+        return {"mode": "batched", "deleted": deleted, "archived": deleted if self.archive else 0}
+
+    # ============ Archival ============
+
+    def _archive_rows(self, rows: List[WebhookEvent]) -> None:
+        by_month: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            record = {
+                "id": row.id,
+                "endpoint_id": row.endpoint_id,
+                "payload": row.payload,
+                "normalized_data": row.normalized_data,
+                "lead_id": row.lead_id,
+                "status": row.status,
+                "error_message": row.error_message,
+                "created_at": row.created_at.isoformat() if row.created_at else None
+            }
+            month = f"{row.created_at:%Y-%m}" if row.created_at else "unknown"
+            by_month.setdefault(month, []).append(record)
+
+        for month, records in by_month.items():
+            self._write_archive(month, records)
+
+    def _archive_query(self, db: Session, month: str, query) -> int:
+        """Streams a raw query's rows into the month's archive without loading them all at once"""
+        count = 0
+        result = db.execute(query.execution_options(stream_results=True, yield_per=self.batch_size))
+        for partition in result.mappings().partitions():
+            records = [
+                {**row, "created_at": row["created_at"].isoformat() if row["created_at"] else None}
+                for row in partition
+            ]
+            self._write_archive(month, records)
+            count += len(records)
+        return count
+
+    def _write_archive(self, month: str, records: List[Dict[str, Any]]) -> None:
+        os.makedirs(self.archive_dir, exist_ok=True)
+        path = os.path.join(self.archive_dir, f"{TABLE}_{month}.jsonl.gz")
+        # Appending adds a new gzip member; readers see one continuous stream
+        with gzip.open(path, "at", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, default=str) + "\n")
+
+
+webhook_event_retention = WebhookEventRetention()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Webhook event retention and partition maintenance")
+    parser.add_argument("--partition", action="store_true", help="Convert webhook_events to monthly partitions (PostgreSQL)")
+    parser.add_argument("--days", type=int, default=WEBHOOK_EVENT_RETENTION_DAYS, help="Keep events this many days")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    retention = WebhookEventRetention(retention_days=args.days, batch_size=args.batch_size)
+    if args.partition:
+        session = SessionLocal()
+        try:
+            retention.partition_table(session)
+        finally:
+            session.close()
+
+    result = retention.run_once()
+    if result["mode"] == "skipped":
+        logger.info("Another worker is running retention, nothing done")
+    elif result["mode"] == "partitioned":
+        logger.info(f"Dropped {len(result['dropped'])} partitions, archived {result['archived']} events")
+    else:
+        logger.info(f"Deleted {result['deleted']} events, archived {result['archived']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,279 @@
+import asyncio
+import csv
+import gzip
+import json
+import logging
+import os
+import tempfile
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+from sqlalchemy.orm import Session
+from ..database import SessionLocal
+from .data_version import compact_data_versions, get_data_version, get_data_versions
+from .lead_tiering import all_leads
+
+logger = logging.getLogger(__name__)
+
+EXPORT_DIR = os.getenv("EXPORT_DIR", "exports")
+EXPORT_REFRESH_SECONDS = int(os.getenv("EXPORT_REFRESH_SECONDS", "60"))
+
+CSV_HEADER = ["ID", "Email", "Name", "Status", "Created"]
+
+EXPORT_FORMATS = {
+    "csv.gz": "application/gzip",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+class ExportService:
+    """
+    Materializes per-campaign lead exports (CSV.gz and Parquet) into local storage.
+    Artifacts are keyed on the campaign's data version: a download only triggers a
+    rebuild when the campaign's leads changed since the artifact was written,
+    and the background loop pre-builds stale campaigns so downloads never read
+    the leads table.
+    """
+
+    def __init__(self, export_dir: str = EXPORT_DIR, batch_size: int = 5000):
+        self.export_dir = export_dir
+        self.batch_size = batch_size
+        self.running = False
+        self._locks: Dict[int, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    # ============ Background refresh ============
+
+    async def start(self):
+        self.running = True
+        while self.running:
+            try:
+                await asyncio.to_thread(self.rebuild_stale)
+            except Exception as e:
+                logger.error(f"Export refresh failed: {str(e)}")
+            await asyncio.sleep(EXPORT_REFRESH_SECONDS)
+
+    def stop(self):
+        self.running = False
+
+    def rebuild_stale(self, job=None) -> Dict[str, Any]:
+        """Rebuilds artifacts for every campaign whose data version moved on"""
+        db = SessionLocal()
+        try:
+            # Keeps the per-campaign version sums short between refreshes
+            compact_data_versions(db)
+            versions = get_data_versions(db)
+        finally:
+            db.close()
+
+        stale = [
+            campaign_id for campaign_id, version in versions.items()
+            if not self.is_fresh(self.read_manifest(campaign_id), version)
+        ]
+        if job:
+            job.set_total(len(stale))
+
+        for campaign_id in stale:
+            self.ensure_fresh(campaign_id, versions[campaign_id])
+            if job:
+                job.advance()
+
+        return {"rebuilt": stale}
+
+    # ============ Artifact access ============
+
+    def get_artifact(self, db: Session, campaign_id: int, fmt: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns {path, size, etag, media_type, filename} for a fresh artifact,
+        building it first if it is missing or stale. Returns None if the
+        campaign does not exist or the format is unavailable.
+        """
+        if fmt not in EXPORT_FORMATS:
+            return None
+
+        data_version = get_data_version(db, campaign_id)
+        if data_version is None:
+            return None
+
+        manifest = self.read_manifest(campaign_id)
+        if not self.is_fresh(manifest, data_version):
+            manifest = self.ensure_fresh(campaign_id, data_version)
+
+        entry = manifest["formats"].get(fmt)
+        if not entry:
+            return None
+
+        return {
+            "path": os.path.join(self._campaign_dir(campaign_id), entry["file"]),
+            "size": entry["size"],
+            "etag": f'"{campaign_id}-{manifest["data_version"]}-{fmt}"',
+            "media_type": EXPORT_FORMATS[fmt],
+            "filename": f"leads_{campaign_id}.{fmt}"
+        }
+
+    def read_manifest(self, campaign_id: int) -> Optional[Dict[str, Any]]:
+        path = os.path.join(self._campaign_dir(campaign_id), "manifest.json")
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_fresh(self, manifest: Optional[Dict[str, Any]], data_version: int) -> bool:
+        # A manifest built from newer data than the caller saw (e.g. reading from a lagging replica) is fine
+        return manifest is not None and (manifest.get("data_version") or 0) >= data_version
+
+    def ensure_fresh(self, campaign_id: int, data_version: int) -> Dict[str, Any]:
+        """Builds the campaign's artifacts unless another thread already did"""
+        with self._lock_for(campaign_id):
+            manifest = self.read_manifest(campaign_id)
+            if self.is_fresh(manifest, data_version):
+                return manifest
+            return self._build(campaign_id)
+
+    # ============ Building ============
+
+    def build(self, campaign_id: int) -> Dict[str, Any]:
+        """Rebuilds the campaign's artifacts now, after any build of it already running"""
+        with self._lock_for(campaign_id):
+            return self._build(campaign_id)
+
+    def _build(self, campaign_id: int) -> Dict[str, Any]:
+        """
+        Streams the campaign's leads once and writes every format from the same pass.
+        Files are written under unique temporary names and renamed into place so
+        readers never see a partial artifact; a failed build leaves nothing behind.
+        """
+        campaign_dir = self._campaign_dir(campaign_id)
+        os.makedirs(campaign_dir, exist_ok=True)
+        csv_tmp = self._temp_file(campaign_dir, "leads.csv.gz")
+        parquet_tmp = self._temp_file(campaign_dir, "leads.parquet")
+        manifest_tmp = self._temp_file(campaign_dir, "manifest.json")
+        parquet_writer = None
+
+        db = SessionLocal()
+        try:
+            # Read the version before the rows: a concurrent insert can only make
+            # the artifact newer than its manifest, never older.
+            data_version = get_data_version(db, campaign_id) or 0
+            leads = all_leads()
+            rows = db.query(
+                leads.c.id, leads.c.email, leads.c.full_name, leads.c.status, leads.c.created_at
+            ).filter(
+                leads.c.campaign_id == campaign_id
+            ).order_by(leads.c.id).yield_per(self.batch_size)
+
+            parquet_writer = _ParquetBatchWriter(parquet_tmp)
+            row_count = 0
+
+            with gzip.open(csv_tmp, "wt", newline="", encoding="utf-8") as csv_file:
+                writer = csv.writer(csv_file)
+                writer.writerow(CSV_HEADER)
+                batch = []
+                for row in rows:
+                    writer.writerow([row.id, row.email, row.full_name, row.status, row.created_at])
+                    batch.append(row)
+                    if len(batch) >= self.batch_size:
+                        parquet_writer.write(batch)
+                        row_count += len(batch)
+                        batch = []
+                if batch:
+                    parquet_writer.write(batch)
+                    row_count += len(batch)
+            parquet_ok = parquet_writer.close()
+
+            formats = {"csv.gz": self._commit_file(csv_tmp, campaign_dir, "leads.csv.gz")}
+            if parquet_ok:
+                formats["parquet"] = self._commit_file(parquet_tmp, campaign_dir, "leads.parquet")
+
+            manifest = {
+                "campaign_id": campaign_id,
+                "data_version": data_version,
+                "rows": row_count,
+                "built_at": datetime.now().isoformat(),
+                "formats": formats
+            }
+            with open(manifest_tmp, "w") as f:
+                json.dump(manifest, f)
+            os.replace(manifest_tmp, os.path.join(campaign_dir, "manifest.json"))
+        finally:
+            db.close()
+            if parquet_writer:
+                parquet_writer.close()
+            for path in (csv_tmp, parquet_tmp, manifest_tmp):
+                if os.path.exists(path):
+                    os.remove(path)
+
+        logger.info(f"Built exports for campaign {campaign_id} (v{data_version}, {row_count} rows)")
+        return manifest
+
+    def _temp_file(self, campaign_dir: str, filename: str) -> str:
+        # Unique per build, so builds in other threads or workers never write the same file
+        fd, path = tempfile.mkstemp(prefix=f"{filename}.", suffix=".tmp", dir=campaign_dir)
+        os.close(fd)
+        # mkstemp creates owner-only files; artifacts keep the usual permissions
+        os.chmod(path, 0o644)
+        return path
+
+    def _commit_file(self, tmp_path: str, campaign_dir: str, filename: str) -> Dict[str, Any]:
+        path = os.path.join(campaign_dir, filename)
+        os.replace(tmp_path, path)
+        return {"file": filename, "size": os.path.getsize(path)}
+
+    def _campaign_dir(self, campaign_id: int) -> str:
+        return os.path.join(self.export_dir, str(campaign_id))
+
+    def _lock_for(self, campaign_id: int) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(campaign_id, threading.Lock())
+
+
+class _ParquetBatchWriter:
+    """
+    Incremental Parquet writer. pyarrow is imported lazily; without it the
+    columnar artifact is simply skipped and only CSV.gz is produced.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._writer = None
+        self._schema = None
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            logger.warning("pyarrow is not installed, skipping Parquet exports")
+            self._pa = None
+            return
+        self._pa = pa
+        self._schema = pa.schema([
+            ("id", pa.int64()),
+            ("email", pa.string()),
+            ("full_name", pa.string()),
+            ("status", pa.string()),
+            ("created_at", pa.timestamp("us", tz="UTC")),
+        ])
+        self._writer = pq.ParquetWriter(path, self._schema, compression="zstd")
+
+    def write(self, rows):
+        if not self._writer:
+            return
+        pa = self._pa
+        table = pa.table({
+            "id": pa.array([r.id for r in rows], pa.int64()),
+            "email": pa.array([r.email for r in rows], pa.string()),
+            "full_name": pa.array([r.full_name for r in rows], pa.string()),
+            "status": pa.array([r.status for r in rows], pa.string()),
+            "created_at": pa.array([r.created_at for r in rows], pa.timestamp("us", tz="UTC")),
+        }, schema=self._schema)
+        self._writer.write_table(table)
+
+    def close(self) -> bool:
+        if not self._writer:
+            return False
+        self._writer.close()
+        self._writer = None
+        return True
+
+
+export_service = ExportService()
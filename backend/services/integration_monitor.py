@@ -1,80 +1,263 @@
 import asyncio
-from sqlalchemy.orm import Session
+import logging
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import or_
+from sqlalchemy.orm import contains_eager
 from ..database import SessionLocal
 from ..models import Integration, IntegrationStatus, IntegrationStatusEnum
 from datetime import datetime, timedelta
 
+logger = logging.getLogger(__name__)
+
+MONITOR_CONCURRENCY = int(os.getenv("MONITOR_CONCURRENCY", "20"))
+MONITOR_TICK_SECONDS = int(os.getenv("MONITOR_TICK_SECONDS", "15"))
+MONITOR_BATCH_SIZE = int(os.getenv("MONITOR_BATCH_SIZE", "500"))
+MONITOR_CHECK_TIMEOUT = int(os.getenv("MONITOR_CHECK_TIMEOUT", "30"))
+# How long a worker's claim on due integrations holds before another worker may check them
+MONITOR_CLAIM_SECONDS = int(os.getenv("MONITOR_CLAIM_SECONDS", "600"))
+
+# Seconds between checks of a healthy integration, per type
+CHECK_INTERVALS = {
+    "meta": 300,
+    "webhook": 300,
+    "smtp": 900,
+}
+DEFAULT_CHECK_INTERVAL = 300
+MAX_BACKOFF_SECONDS = 3600
+JITTER_RATIO = 0.1
+
 class IntegrationMonitor:
-    def __init__(self):
+    """
+    Schedules integration health checks from IntegrationStatus.next_sync_time.
+
+    Every tick picks the integrations that are due, checks them concurrently
+    (bounded by a semaphore, blocking checks on a thread pool) and writes all
+    status updates in one transaction. Healthy integrations are re-checked after
+    their type's interval; failing ones back off exponentially with error_count.
+    Jitter spreads checks out so integrations created together don't stay in
+    lockstep. Every worker may run a monitor: due integrations are claimed
+    (locked with SKIP LOCKED, then pushed MONITOR_CLAIM_SECONDS ahead) so each
+    is checked by one worker per round.
+    """
+
+    def __init__(self, concurrency: int = MONITOR_CONCURRENCY, tick_seconds: int = MONITOR_TICK_SECONDS,
+                 batch_size: int = MONITOR_BATCH_SIZE):
         self.running = False
+        self.concurrency = concurrency
+        self.tick_seconds = tick_seconds
+        self.batch_size = batch_size
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="monitor")
 
     async def start(self):
         self.running = True
         while self.running:
-            await self.check_all_integrations()
-            await asyncio.sleep(300) # Check every 5 minutes
+            try:
+                await self.check_due_integrations()
+            except Exception as e:
+                logger.error(f"Integration monitor sweep failed: {str(e)}")
+            await asyncio.sleep(self.tick_seconds)
 
     def stop(self):
         self.running = False
 
-    async def check_all_integrations(self):
-        db = SessionLocal()
-        try:
-            integrations = db.query(Integration).filter(Integration.is_active == True).all()
-            for integration in integrations:
-                await self.check_integration_health(db, integration)
-        finally:
-            db.close()
+    async def check_due_integrations(self) -> int:
+        """Checks integrations whose next_sync_time has passed. Returns how many were checked"""
+        integrations = await asyncio.to_thread(self._load_integrations, True)
+        await self._run_checks(integrations)
+        return len(integrations)
 
-    async def check_integration_health(self, db: Session, integration: Integration):
-        # Get or create status record
-        status = integration.status
-        if not status:
-            status = IntegrationStatus(integration_id=integration.id)
-            db.add(status)
-            db.commit()
-            db.refresh(status)
-
-        result = {
-            "status": IntegrationStatusEnum.DISCONNECTED,
-            "status_text": "Unknown Type",
-            "error": "Unsupported integration type"
-        }
+    async def check_all_integrations(self) -> int:
+        """Checks every active integration now, regardless of schedule"""
+        integrations = await asyncio.to_thread(self._load_integrations, False)
+        await self._run_checks(integrations)
+        return len(integrations)
 
+    async def check_integration_health(self, integration: Integration) -> Dict[str, Any]:
+        """Runs the type-specific health check for a single integration"""
         try:
             if integration.type == "meta":
                 from .meta_service import meta_service
-                result = await meta_service.check_connection_status(integration)
-            
+                return await meta_service.check_connection_status(integration)
+
             elif integration.type == "webhook":
-                from .webhook_service import webhook_service
-                result = webhook_service.check_health(db, integration)
-            
+                return await self._run_blocking(self._check_webhook, integration)
+
             elif integration.type == "smtp":
                 from .smtp_service import smtp_service
-                # SMTP check is synchronous/blocking, might want to run in executor in production
-                result = smtp_service.check_connection(integration)
-                
+                # smtplib blocks, so keep it off the event loop
+                return await self._run_blocking(smtp_service.check_connection, integration)
+
         except Exception as e:
-            result = {
+            return {
                 "status": IntegrationStatusEnum.DISCONNECTED,
                 "status_text": "System Error",
                 "error": str(e)
             }
 
-        # Update status record
-        status.status = result["status"]
-        status.status_text = result["status_text"]
-        status.last_error_message = result.get("error")
-        status.updated_at = datetime.now()
-        
-        if result["status"] == IntegrationStatusEnum.CONNECTED:
-            status.last_sync_time = datetime.now()
-            # Reset error count if connected
-            status.error_count = 0
+        return {
+            "status": IntegrationStatusEnum.DISCONNECTED,
+            "status_text": "Unknown Type",
+            "error": "Unsupported integration type"
+        }
+
+    async def _run_checks(self, integrations: List[Integration]):
+        if not integrations:
+            return
+        from .meta_service import meta_service
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(check):
+            # Every check, and every Meta batch, holds a slot and gets MONITOR_CHECK_TIMEOUT
+            async with semaphore:
+                try:
+                    return await asyncio.wait_for(check, timeout=MONITOR_CHECK_TIMEOUT)
+                except asyncio.TimeoutError:
+                    return None
+
+        async def run(integration: Integration) -> List[Tuple[Integration, Dict[str, Any]]]:
+            result = await bounded(self.check_integration_health(integration))
+            return [(integration, result or self._timeout_result())]
+
+        async def run_meta_batch(chunk: List[Integration]) -> List[Tuple[Integration, Dict[str, Any]]]:
+            results = await bounded(self._check_meta_batch(chunk))
+            return results or [(integration, self._timeout_result()) for integration in chunk]
+
+        # With an app token, Meta tokens are validated together through Graph API batch requests
+        if meta_service.supports_batch():
+            meta_integrations = [i for i in integrations if i.type == "meta"]
+            other_integrations = [i for i in integrations if i.type != "meta"]
         else:
-            status.error_count += 1
-        
-        db.commit()
+            meta_integrations, other_integrations = [], integrations
+        chunks = [
+            meta_integrations[start:start + meta_service.BATCH_SIZE]
+            for start in range(0, len(meta_integrations), meta_service.BATCH_SIZE)
+        ]
+
+        checked = await asyncio.gather(
+            *[run(integration) for integration in other_integrations],
+            *[run_meta_batch(chunk) for chunk in chunks]
+        )
+        results = [pair for pairs in checked for pair in pairs]
+        await asyncio.to_thread(self._save_results, results)
+
+    async def _check_meta_batch(self, integrations: List[Integration]) -> List[Tuple[Integration, Dict[str, Any]]]:
+        from .meta_service import meta_service
+        error = "No result from Meta batch check"
+        try:
+            batch_results = await meta_service.check_connection_statuses(integrations)
+        except Exception as e:
+            batch_results = {}
+            error = str(e)
+        return [
+            (integration, batch_results.get(integration.id) or {
+                "status": IntegrationStatusEnum.DISCONNECTED,
+                "status_text": "System Error",
+                "error": error
+            })
+            for integration in integrations
+        ]
+
+    def _timeout_result(self) -> Dict[str, Any]:
+        return {
+            "status": IntegrationStatusEnum.DISCONNECTED,
+            "status_text": "Timeout",
+            "error": f"Health check timed out after {MONITOR_CHECK_TIMEOUT}s"
+        }
+
+    async def _run_blocking(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    def _check_webhook(self, integration: Integration) -> Dict[str, Any]:
+        from .webhook_service import webhook_service
+        db = SessionLocal()
+        try:
+            return webhook_service.check_health(db, integration)
+        finally:
+            db.close()
+
+    def _load_integrations(self, due_only: bool) -> List[Integration]:
+        db = SessionLocal()
+        try:
+            query = db.query(Integration).outerjoin(
+                IntegrationStatus, IntegrationStatus.integration_id == Integration.id
+            ).options(
+                contains_eager(Integration.status)
+            ).filter(Integration.is_active == True)
+
+            if due_only:
+                query = query.filter(or_(
+                    IntegrationStatus.next_sync_time == None,
+                    IntegrationStatus.next_sync_time <= datetime.now()
+                )).order_by(
+                    IntegrationStatus.next_sync_time.asc().nullsfirst()
+                ).limit(self.batch_size).with_for_update(skip_locked=True, of=Integration)
+
+            integrations = query.all()
+            if due_only:
+                self._claim(db, integrations)
+            # Detach so the objects can be read from other threads after close
+            db.expunge_all()
+            db.commit()
+            return integrations
+        finally:
+            db.close()
+
+    def _claim(self, db, integrations: List[Integration]):
+        """Moves next_sync_time past the sweep, so other workers skip these until the results are saved"""
+        claimed_until = datetime.now() + timedelta(seconds=MONITOR_CLAIM_SECONDS)
+        for integration in integrations:
+            if integration.status is None:
+                integration.status = IntegrationStatus(integration_id=integration.id, error_count=0)
+            integration.status.next_sync_time = claimed_until
+        db.flush()
+
+    def _save_results(self, results: List[Tuple[Integration, Dict[str, Any]]]):
+        """Writes every status update from a sweep in a single transaction"""
+        db = SessionLocal()
+        try:
+            ids = [integration.id for integration, _ in results]
+            statuses = {
+                status.integration_id: status
+                for status in db.query(IntegrationStatus).filter(IntegrationStatus.integration_id.in_(ids))
+            }
+
+            now = datetime.now()
+            for integration, result in results:
+                status = statuses.get(integration.id)
+                if not status:
+                    status = IntegrationStatus(integration_id=integration.id, error_count=0)
+                    db.add(status)
+
+                status.status = result["status"]
+                status.status_text = result["status_text"]
+                status.last_error_message = result.get("error")
+                status.updated_at = now
+
+                if result["status"] == IntegrationStatusEnum.CONNECTED:
+                    status.last_sync_time = now
+                    # Reset error count if connected
+                    status.error_count = 0
+                else:
+                    status.error_count = (status.error_count or 0) + 1
+
+                status.next_sync_time = now + timedelta(
+                    seconds=self._next_check_delay(integration.type, status.error_count)
+                )
+
+            db.commit()
+        finally:
+            db.close()
+
+    def _next_check_delay(self, integration_type: Optional[str], error_count: int) -> float:
+        interval = CHECK_INTERVALS.get(integration_type, DEFAULT_CHECK_INTERVAL)
+        if error_count > 0:
+            interval = min(interval * 2 ** min(error_count - 1, 16), MAX_BACKOFF_SECONDS)
+        # Clamped after jitter, so a maxed-out backoff never exceeds MAX_BACKOFF_SECONDS
+        return min(interval * random.uniform(1 - JITTER_RATIO, 1 + JITTER_RATIO), MAX_BACKOFF_SECONDS)
 
 monitor = IntegrationMonitor()
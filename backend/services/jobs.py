@@ -0,0 +1,102 @@
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    """
+    A unit of background work with progress tracking.
+    The job function receives the Job as its first argument and reports progress
+    through `set_total` and `advance`.
+    """
+
+    def __init__(self, kind: str, params: Optional[Dict[str, Any]] = None):
+        self.id = str(uuid.uuid4())
+        self.kind = kind
+        self.params = params or {}
+        self.status = "pending"  # "pending", "running", "completed", "failed"
+        self.total: Optional[int] = None
+        self.processed = 0
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+
+    def set_total(self, total: int):
+        self.total = total
+
+    def advance(self, count: int = 1):
+        self.processed += count
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "total": self.total,
+            "processed": self.processed,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+class JobRegistry:
+    """
+    Runs background jobs on a small thread pool and keeps the most recent ones
+    in memory so their progress can be polled.
+    """
+
+    def __init__(self, max_workers: int = 4, max_jobs: int = 500):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_jobs = max_jobs
+
+    def submit(self, kind: str, fn: Callable[..., Optional[Dict[str, Any]]], *args,
+               params: Optional[Dict[str, Any]] = None, **kwargs) -> Job:
+        job = Job(kind, params)
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self._max_jobs:
+                self._jobs.popitem(last=False)
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self, kind: Optional[str] = None) -> List[Job]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job for job in jobs if kind is None or job.kind == kind]
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job: Job, fn: Callable, args: tuple, kwargs: dict):
+        job.status = "running"
+        job.started_at = datetime.now()
+        try:
+            job.result = fn(job, *args, **kwargs)
+            job.status = "completed"
+        except Exception as e:
+            logger.exception(f"Job {job.kind} {job.id} failed")
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = datetime.now()
+
+
+job_registry = JobRegistry()
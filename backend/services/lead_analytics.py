@@ -0,0 +1,175 @@
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy import DateTime, and_, case, func, literal, select, union_all
+from sqlalchemy.orm import Session
+from ..models import LeadStatusChange
+from .data_version import get_data_version
+from .lead_tiering import all_leads
+
+LEAD_FUNNEL_CACHE_ENTRIES = int(os.getenv("LEAD_FUNNEL_CACHE_ENTRIES", "1000"))
+
+
+def _week_start(column, dialect: str):
+    """Monday of the column's week"""
+    if dialect == "postgresql":
+        return func.date_trunc("week", column)
+    if dialect == "sqlite":
+        return func.date(column, "weekday 0", "-6 days")
+    raise RuntimeError(f"Funnel analytics aren't supported on {dialect}")
+
+
+def _seconds_between(start, end, dialect: str):
+    if dialect == "postgresql":
+        return func.extract("epoch", end - start)
+    return (func.julianday(end) - func.julianday(start)) * 86400
+
+
+class LeadAnalyticsService:
+    """
+    Weekly cohort funnels for a campaign.
+
+    Leads (hot and archived) are grouped by the week they were created. For
+    each cohort and status the funnel counts the leads that reached it,
+    either as their current status or through a recorded change in
+    lead_status_changes, and averages the time from creation to the first
+    change into it. The status a lead was created with (the first change's
+    from_status, or the current status of a lead that never changed) counts
+    as reached at creation. It all runs as one SQL statement without joins: leads and
+    changes are unioned, window functions carry each lead's creation time
+    onto its changes and count cohort sizes, and the database does the
+    grouping, so nothing per-lead reaches Python.
+
+    Results are cached per campaign, window and window start week, keyed on
+    the campaign's data version, so repeat views cost one primary-key lookup
+    until leads or statuses change or a new week begins.
+    """
+
+    def __init__(self, max_entries: int = LEAD_FUNNEL_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[int, int, datetime], Tuple[int, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_funnel(self, db: Session, campaign_id: int, weeks: int = 12) -> Dict[str, Any]:
+        since = self.window_start(weeks)
+        # The window moves every Monday, so a cached funnel doesn't outlive its week
+        key = (campaign_id, weeks, since)
+        data_version = get_data_version(db, campaign_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == data_version:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        funnel = self.build_funnel(db, campaign_id, weeks, since)
+        with self._lock:
+            self._entries[key] = (data_version, funnel)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return funnel
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+    def build_funnel(self, db: Session, campaign_id: int, weeks: int = 12,
+                     since: Optional[datetime] = None) -> Dict[str, Any]:
+        since = since or self.window_start(weeks)
+        cohorts: Dict[str, Dict[str, Any]] = {}
+        statuses = set()
+        for row in db.execute(self.funnel_statement(db.get_bind().dialect.name, campaign_id, since)):
+            week = str(row.week)[:10]
+            cohort = cohorts.setdefault(week, {"week": week, "leads": row.cohort_size, "statuses": {}})
+            cohort["statuses"][row.status] = {
+                "leads": row.leads,
+                "share": round(row.leads / row.cohort_size, 4) if row.cohort_size else 0.0,
+                "avg_hours_to_reach": round(row.avg_seconds / 3600, 2) if row.avg_seconds is not None else None
+            }
+            statuses.add(row.status)
+
+        return {
+            "campaign_id": campaign_id,
+            "since": since.date().isoformat(),
+            "statuses": sorted(statuses),
+            "cohorts": sorted(cohorts.values(), key=lambda cohort: cohort["week"])
+        }
+
+    def window_start(self, weeks: int, now: Optional[datetime] = None) -> datetime:
+        """Monday 00:00 of the oldest week in the window"""
+        today = (now or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+        return today - timedelta(days=today.weekday(), weeks=weeks - 1)
+
+    def funnel_statement(self, dialect: str, campaign_id: int, since: datetime):
+        """(week, cohort_size, status, leads, avg_seconds) per cohort and reached status"""
+        leads = all_leads()
+        changes = select(
+            LeadStatusChange.lead_id, LeadStatusChange.from_status, LeadStatusChange.to_status,
+            LeadStatusChange.changed_at,
+            func.row_number().over(
+                partition_by=LeadStatusChange.lead_id, order_by=(LeadStatusChange.changed_at, LeadStatusChange.id)
+            ).label("n")
+        ).where(LeadStatusChange.campaign_id == campaign_id, LeadStatusChange.changed_at >= since).cte("changes")
+
+        # Each lead's current status (is_lead = 1), every recorded change into a status,
+        # and the status the first change left, which the lead was created with (is_origin = 1)
+        events = union_all(
+            select(
+                leads.c.id.label("lead_id"), leads.c.status, leads.c.created_at,
+                literal(None, DateTime).label("reached_at"), literal(1).label("is_lead"),
+                literal(0).label("is_change"), literal(0).label("is_origin")
+            ).where(leads.c.campaign_id == campaign_id, leads.c.created_at >= since),
+            select(
+                changes.c.lead_id, changes.c.to_status, literal(None, DateTime), changes.c.changed_at,
+                literal(0), literal(1), literal(0)
+            ),
+            select(
+                changes.c.lead_id, changes.c.from_status, literal(None, DateTime), literal(None, DateTime),
+                literal(0), literal(0), literal(1)
+            ).where(changes.c.n == 1)
+        ).subquery("events")
+
+        # Spread the lead's created_at onto its change rows; changes of leads outside the window stay NULL.
+        # The creation status is reached at created_at: the first change's from_status, or the
+        # current status when the lead has no changes
+        created_at = func.max(events.c.created_at).over(partition_by=events.c.lead_id)
+        changed = func.max(events.c.is_change).over(partition_by=events.c.lead_id)
+        spread = select(
+            events.c.lead_id, events.c.status, events.c.is_lead,
+            case(
+                (events.c.is_origin == 1, created_at),
+                (and_(events.c.is_lead == 1, changed == 0), created_at),
+                else_=events.c.reached_at
+            ).label("reached_at"),
+            created_at.label("created_at")
+        ).subquery("spread")
+
+        reached = select(
+            spread.c.lead_id, spread.c.status, spread.c.created_at,
+            func.min(spread.c.reached_at).label("reached_at"),
+            func.max(spread.c.is_lead).label("is_lead")
+        ).where(spread.c.created_at.isnot(None)).group_by(
+            spread.c.lead_id, spread.c.status, spread.c.created_at
+        ).subquery("reached")
+
+        week = _week_start(reached.c.created_at, dialect)
+        # Exactly one row per lead has is_lead = 1, so this sums to the cohort's lead count
+        cohorts = select(
+            week.label("week"), reached.c.status, reached.c.created_at, reached.c.reached_at,
+            func.sum(reached.c.is_lead).over(partition_by=week).label("cohort_size")
+        ).subquery("cohorts")
+
+        return select(
+            cohorts.c.week,
+            cohorts.c.cohort_size,
+            cohorts.c.status,
+            func.count().label("leads"),
+            func.avg(_seconds_between(cohorts.c.created_at, cohorts.c.reached_at, dialect)).label("avg_seconds")
+        ).group_by(
+            cohorts.c.week, cohorts.c.cohort_size, cohorts.c.status
+        ).order_by(cohorts.c.week, cohorts.c.status)
+
+
+lead_analytics_service = LeadAnalyticsService()
@@ -0,0 +1,224 @@
+import asyncio
+import codecs
+import csv
+import io
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from sqlalchemy import func, insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from ..database import SessionLocal
+from ..models import Lead, LeadArchive
+from .data_version import bump_data_version
+from .webhook_normalizer import webhook_normalizer
+
+logger = logging.getLogger(__name__)
+
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "5000"))
+IMPORT_DEDUP_KEYS = ("email", "external_id")
+# Attempts per chunk when the database reports a lock timeout or deadlock
+IMPORT_CHUNK_ATTEMPTS = 3
+
+# Columns written by COPY, in order; created_at is left to the server default
+_COPY_COLUMNS = ("campaign_id", "email", "full_name", "phone", "status", "source", "external_id", "data")
+
+
+class LeadImportService:
+    """
+    Bulk-loads leads from an uploaded CSV file.
+
+    The file is read as a stream and each row is mapped through the webhook
+    normalizer (auto-detected columns, or the given field_mapping). Rows are
+    loaded in chunks of IMPORT_CHUNK_SIZE, each chunk committed on its own
+    with a data version bump: PostgreSQL chunks go through COPY, other
+    databases through one executemany INSERT. Triggering automations needs
+    the new lead ids, so those imports always use INSERT ... RETURNING.
+    """
+
+    def __init__(self, chunk_size: int = IMPORT_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+
+    def run(self, job, path: str, campaign_id: int, field_mapping: Optional[Dict[str, str]] = None,
+            dedup: Optional[str] = None, external_id_column: Optional[str] = None,
+            trigger_automations: bool = False, delete_file: bool = True) -> Dict[str, Any]:
+        """Job function: imports the CSV at `path` into the campaign and returns counts"""
+        if dedup and dedup not in IMPORT_DEDUP_KEYS:
+            raise ValueError(f"Unknown dedup key: {dedup}")
+
+        db = SessionLocal()
+        try:
+            if job:
+                job.set_total(self.count_rows(path))
+
+            stats = {"imported": 0, "duplicates": 0, "skipped": 0}
+            seen: Set[str] = set()
+            chunk: List[Dict[str, Any]] = []
+            for row in self._read_rows(path):
+                lead = self._lead_row(campaign_id, row, field_mapping, external_id_column)
+                if lead is None:
+                    stats["skipped"] += 1
+                    continue
+                chunk.append(lead)
+                if len(chunk) >= self.chunk_size:
+                    self._load_chunk(db, job, campaign_id, chunk, dedup, seen, trigger_automations, stats)
+                    chunk = []
+            if chunk:
+                self._load_chunk(db, job, campaign_id, chunk, dedup, seen, trigger_automations, stats)
+
+            logger.info(f"Imported {stats['imported']} leads into campaign {campaign_id}")
+            return stats
+        finally:
+            db.close()
+            if delete_file:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def count_rows(self, path: str) -> int:
+        """Data rows in the file, for progress reporting"""
+        return sum(1 for _ in self._read_rows(path))
+
+    # ============ Parsing ============
+
+    def _read_rows(self, path: str) -> Iterator[Dict[str, str]]:
+        with open(path, "rb") as raw:
+            # utf-8-sig drops the BOM spreadsheet tools like to prepend
+            text = codecs.getreader("utf-8-sig")(raw, errors="replace")
+            for row in csv.DictReader(text):
+                # Extra cells without a header land under the None key
+                row.pop(None, None)
+                yield row
+
+    def _lead_row(self, campaign_id: int, row: Dict[str, str], field_mapping: Optional[Dict[str, str]],
+                  external_id_column: Optional[str]) -> Optional[Dict[str, Any]]:
+        row = {key.strip(): value for key, value in row.items() if key and value not in (None, "")}
+        if not row:
+            return None
+        normalized = webhook_normalizer.normalize(row, field_mapping)
+        return {
+            "campaign_id": campaign_id,
+            "email": normalized.get("email"),
+            "full_name": normalized.get("full_name"),
+            "phone": normalized.get("phone"),
+            "status": "new",
+            "source": "import",
+            "external_id": row.get(external_id_column) if external_id_column else None,
+            "data": normalized.get("data")
+        }
+
+    # ============ Loading ============
+
+    def _load_chunk(self, db: Session, job, campaign_id: int, rows: List[Dict[str, Any]], dedup: Optional[str],
+                    seen: Set[str], trigger_automations: bool, stats: Dict[str, int]):
+        for attempt in range(1, IMPORT_CHUNK_ATTEMPTS + 1):
+            try:
+                unique, keys = self._dedup(db, campaign_id, rows, dedup, seen) if dedup else (rows, set())
+                lead_ids = self._insert_chunk(db, campaign_id, unique, trigger_automations)
+                break
+            except OperationalError as e:
+                db.rollback()
+                if attempt == IMPORT_CHUNK_ATTEMPTS:
+                    raise
+                logger.warning(f"Import chunk for campaign {campaign_id} failed, retrying: {str(e)}")
+                time.sleep(attempt)
+
+        # Only once committed, so a retried chunk doesn't see its own rows as duplicates
+        seen.update(keys)
+        stats["duplicates"] += len(rows) - len(unique)
+        stats["imported"] += len(unique)
+        if lead_ids:
+            self._trigger_automations(db, lead_ids)
+        db.expunge_all()
+        if job:
+            job.advance(len(rows))
+
+    def _insert_chunk(self, db: Session, campaign_id: int, rows: List[Dict[str, Any]],
+                      trigger_automations: bool) -> Optional[List[int]]:
+        if not rows:
+            return None
+        lead_ids = None
+        if trigger_automations:
+            lead_ids = db.execute(
+                insert(Lead).returning(Lead.id, sort_by_parameter_order=True), rows
+            ).scalars().all()
+        else:
+            self._bulk_insert(db, rows)
+        bump_data_version(db, campaign_id)
+        db.commit()
+        return lead_ids
+
+    def _dedup(self, db: Session, campaign_id: int, rows: List[Dict[str, Any]], key: str,
+               seen: Set[str]) -> Tuple[List[Dict[str, Any]], Set[str]]:
+        """
+        Drops rows whose key is already stored for the campaign or earlier in
+        this file. Returns the remaining rows and the keys they add.
+        """
+        def value(row):
+            raw = row.get(key)
+            return raw.strip().lower() if key == "email" and raw else raw
+
+        values = list({value(row) for row in rows if value(row)} - seen)
+        existing = set()
+        if values:
+            # Archived leads count as already stored
+            for model in (Lead, LeadArchive):
+                column = func.lower(model.email) if key == "email" else model.external_id
+                existing.update(
+                    stored for (stored,) in db.query(column).filter(
+                        model.campaign_id == campaign_id, column.in_(values)
+                    )
+                )
+
+        unique, added = [], set()
+        for row in rows:
+            row_value = value(row)
+            if row_value:
+                if row_value in seen or row_value in existing or row_value in added:
+                    continue
+                added.add(row_value)
+            # Rows without the key can't be matched, so they are always kept
+            unique.append(row)
+        return unique, added
+
+    def _bulk_insert(self, db: Session, rows: List[Dict[str, Any]]):
+        driver = db.get_bind().dialect.driver
+        if driver not in ("psycopg2", "psycopg"):
+            db.execute(insert(Lead), rows)
+            return
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([
+                json.dumps(row[column]) if column == "data" and row[column] is not None else row[column]
+                for column in _COPY_COLUMNS
+            ])
+        # csv.writer renders None as an empty unquoted field, which COPY reads as NULL
+        statement = f"COPY leads ({', '.join(_COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+        cursor = db.connection().connection.cursor()
+        try:
+            if driver == "psycopg2":
+                buffer.seek(0)
+                cursor.copy_expert(statement, buffer)
+            else:
+                with cursor.copy(statement) as copy:
+                    copy.write(buffer.getvalue())
+        finally:
+            cursor.close()
+
+    def _trigger_automations(self, db: Session, lead_ids: List[int]):
+        from .automation_engine import automation_engine
+
+        leads = db.query(Lead).filter(Lead.id.in_(lead_ids)).order_by(Lead.id).all()
+        try:
+            asyncio.run(automation_engine.evaluate_new_leads(db, leads))
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Automations failed for {len(leads)} imported leads: {str(e)}")
+
+
+lead_import_service = LeadImportService()
@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List
+from sqlalchemy import insert, literal, select, update
+from sqlalchemy.orm import Session
+from ..database import SessionLocal
+from ..models import Lead, LeadArchive, LeadStatusChange
+from ..schemas import LeadStatusBulkUpdate
+from .data_version import bump_data_versions
+
+logger = logging.getLogger(__name__)
+
+# Leads loaded per round when evaluating status_change automations
+STATUS_AUTOMATION_BATCH_SIZE = 1000
+
+
+class LeadStatusService:
+    """
+    Set-based lead status changes.
+
+    A bulk update runs as two statements in one transaction: an
+    INSERT ... SELECT that records a lead_status_changes row (old and new
+    status, shared batch id) for every matching lead whose status differs,
+    then a single UPDATE of the leads recorded under that batch. The
+    status_change automations are evaluated afterwards from the recorded
+    batch, in chunks, rather than lead by lead.
+    """
+
+    def bulk_update(self, db: Session, request: LeadStatusBulkUpdate) -> Dict[str, Any]:
+        """
+        Applies the status change and returns the batch id and affected count.
+        Requested lead_ids that are archived (read-only) or don't exist are
+        returned as `archived` and `not_found`
+        """
+        batch_id = str(uuid.uuid4())
+        db.execute(self.record_changes(batch_id, request.status, *self._conditions(request)))
+
+        batch = select(LeadStatusChange.lead_id).where(LeadStatusChange.batch_id == batch_id)
+        updated = db.execute(
+            update(Lead).where(Lead.id.in_(batch)).values(status=request.status),
+            execution_options={"synchronize_session": False}
+        ).rowcount
+
+        campaign_ids = db.execute(
+            select(LeadStatusChange.campaign_id).where(LeadStatusChange.batch_id == batch_id).distinct()
+        ).scalars().all()
+        bump_data_versions(db, campaign_ids)
+        archived, not_found = self._missing_ids(db, request.lead_ids or [])
+        db.commit()
+
+        logger.info(f"Changed status of {updated} leads to {request.status} (batch {batch_id})")
+        return {
+            "batch_id": batch_id, "updated": updated, "campaign_ids": sorted(campaign_ids),
+            "archived": archived, "not_found": not_found
+        }
+
+    def record_changes(self, batch_id: str, to_status: str, *conditions):
+        """
+        INSERT ... SELECT recording a change to `to_status` for every lead matching
+        `conditions` whose status differs. Run it before updating the leads
+        """
+        source = select(
+            literal(batch_id), Lead.id, Lead.campaign_id, Lead.status, literal(to_status), literal(datetime.now())
+        ).where(Lead.status.is_distinct_from(to_status), *conditions)
+        return insert(LeadStatusChange).from_select(
+            ["batch_id", "lead_id", "campaign_id", "from_status", "to_status", "changed_at"], source
+        )
+
+    def run_automations(self, job, batch_id: str) -> Dict[str, Any]:
+        """Job function: evaluates status_change automations for every lead in a batch"""
+        from .automation_engine import automation_engine
+
+        db = SessionLocal()
+        try:
+            base = db.query(LeadStatusChange).filter(LeadStatusChange.batch_id == batch_id)
+            if job:
+                job.set_total(base.count())
+
+            stats = {"leads": 0, "actions": 0}
+            last_id = 0
+            while True:
+                changes = base.filter(LeadStatusChange.id > last_id).order_by(
+                    LeadStatusChange.id
+                ).limit(STATUS_AUTOMATION_BATCH_SIZE).all()
+                if not changes:
+                    break
+                last_id = changes[-1].id
+
+                leads = {
+                    lead.id: lead for lead in db.query(Lead).filter(Lead.id.in_([c.lead_id for c in changes]))
+                }
+                pairs = [(leads[c.lead_id], c) for c in changes if c.lead_id in leads]
+                stats["actions"] += asyncio.run(automation_engine.evaluate_status_changes(db, pairs))
+                stats["leads"] += len(pairs)
+
+                db.expunge_all()
+                if job:
+                    job.advance(len(changes))
+            return stats
+        finally:
+            db.close()
+
+    def _missing_ids(self, db: Session, lead_ids: List[int]):
+        """Splits requested ids missing from the hot table into archived and unknown ones"""
+        if not lead_ids:
+            return [], []
+        missing = set(lead_ids) - set(db.execute(select(Lead.id).where(Lead.id.in_(lead_ids))).scalars())
+        if not missing:
+            return [], []
+        archived = set(db.execute(select(LeadArchive.id).where(LeadArchive.id.in_(missing))).scalars())
+        return sorted(archived), sorted(missing - archived)
+
+    def _conditions(self, request: LeadStatusBulkUpdate) -> List[Any]:
+        conditions = []
+        if request.lead_ids is not None:
+            conditions.append(Lead.id.in_(request.lead_ids))
+        if request.campaign_id is not None:
+            conditions.append(Lead.campaign_id == request.campaign_id)
+        if request.current_status is not None:
+            conditions.append(Lead.status == request.current_status)
+        if request.source is not None:
+            conditions.append(Lead.source == request.source)
+        if request.created_from is not None:
+            conditions.append(Lead.created_at >= request.created_from)
+        if request.created_to is not None:
+            conditions.append(Lead.created_at <= request.created_to)
+        return conditions
+
+
+lead_status_service = LeadStatusService()
@@ -0,0 +1,181 @@
+import argparse
+import asyncio
+import logging
+import sys
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import delete, insert, literal, or_, select, union_all, update
+from sqlalchemy.orm import Session
+from ..database import SessionLocal
+from ..models import Campaign, Lead, LeadArchive, LeadRollup
+from .data_version import bump_data_versions
+
+logger = logging.getLogger(__name__)
+
+# Leads older than this move to the cold tier; 0 disables the age rule
+LEAD_ARCHIVE_AFTER_DAYS = int(os.getenv("LEAD_ARCHIVE_AFTER_DAYS", "365"))
+# Every lead of a campaign in one of these statuses moves to the cold tier
+LEAD_ARCHIVE_CAMPAIGN_STATUSES = [
+    status.strip() for status in os.getenv("LEAD_ARCHIVE_CAMPAIGN_STATUSES", "archived").split(",") if status.strip()
+]
+LEAD_ARCHIVE_BATCH_SIZE = int(os.getenv("LEAD_ARCHIVE_BATCH_SIZE", "5000"))
+LEAD_ARCHIVE_INTERVAL_SECONDS = int(os.getenv("LEAD_ARCHIVE_INTERVAL_SECONDS", "3600"))
+
+# Columns shared by leads and leads_archive, in insert order
+_LEAD_COLUMNS = ("id", "campaign_id", "email", "phone", "full_name", "status", "source", "external_id", "data", "created_at")
+
+
+def lead_facts():
+    """
+    Lead counts across both tiers, as a subquery of (campaign_id, status,
+    created_at, leads). Hot leads contribute one row each; archived leads
+    come from lead_rollups, one row per campaign, day and status, with
+    created_at set to midnight of that day. Aggregate with sum(leads).
+    """
+    hot = select(Lead.campaign_id, Lead.status, Lead.created_at, literal(1).label("leads"))
+    cold = select(LeadRollup.campaign_id, LeadRollup.status, LeadRollup.day.label("created_at"), LeadRollup.leads)
+    return union_all(hot, cold).subquery("lead_facts")
+
+
+def all_leads():
+    """Hot and archived leads as one subquery with the leads table's columns"""
+    hot = select(*(getattr(Lead, name) for name in _LEAD_COLUMNS))
+    cold = select(*(getattr(LeadArchive, name) for name in _LEAD_COLUMNS))
+    return union_all(hot, cold).subquery("all_leads")
+
+
+class LeadTieringService:
+    """
+    Moves leads to the cold tier.
+
+    Leads older than LEAD_ARCHIVE_AFTER_DAYS, and every lead of a campaign
+    whose status is in LEAD_ARCHIVE_CAMPAIGN_STATUSES, are copied into
+    leads_archive (same ids and columns) and deleted from leads in
+    id-ordered batches. Each batch also adds its per-day, per-status counts
+    to lead_rollups and bumps the campaigns' data versions, all in one
+    transaction, so `lead_facts()` totals never change across a move.
+
+    Lead reads go through `all_leads()` and aggregates through `lead_facts()`,
+    so the API doesn't depend on which tier a lead lives in, while the hot
+    table and its indexes only hold recent, active data.
+    """
+
+    def __init__(self, archive_after_days: int = LEAD_ARCHIVE_AFTER_DAYS,
+                 campaign_statuses: Optional[List[str]] = None, batch_size: int = LEAD_ARCHIVE_BATCH_SIZE):
+        self.archive_after_days = archive_after_days
+        self.campaign_statuses = LEAD_ARCHIVE_CAMPAIGN_STATUSES if campaign_statuses is None else campaign_statuses
+        self.batch_size = batch_size
+        self.running = False
+
+    async def start(self):
+        self.running = True
+        while self.running:
+            try:
+                await asyncio.to_thread(self.run_once)
+            except Exception as e:
+                logger.error(f"Lead tiering failed: {str(e)}")
+            await asyncio.sleep(LEAD_ARCHIVE_INTERVAL_SECONDS)
+
+    def stop(self):
+        self.running = False
+
+    def cutoff(self) -> Optional[datetime]:
+        if self.archive_after_days <= 0:
+            return None
+        return datetime.now() - timedelta(days=self.archive_after_days)
+
+    def run_once(self, job=None) -> Dict[str, Any]:
+        db = SessionLocal()
+        try:
+            conditions = self._conditions()
+            if not conditions:
+                return {"archived": 0}
+
+            archived = 0
+            while True:
+                moved = self._move_batch(db, conditions)
+                if not moved:
+                    break
+                archived += moved
+                if job:
+                    job.advance(moved)
+
+            if archived:
+                logger.info(f"Moved {archived} leads to leads_archive")
+            return {"archived": archived}
+        finally:
+            db.close()
+
+    def _conditions(self) -> List[Any]:
+        conditions = []
+        cutoff = self.cutoff()
+        if cutoff is not None:
+            conditions.append(Lead.created_at < cutoff)
+        if self.campaign_statuses:
+            conditions.append(Lead.campaign_id.in_(
+                select(Campaign.id).where(Campaign.status.in_(self.campaign_statuses))
+            ))
+        return conditions
+
+    def _move_batch(self, db: Session, conditions: List[Any]) -> int:
+        rows = db.execute(
+            select(Lead.id, Lead.campaign_id, Lead.status, Lead.created_at)
+            .where(or_(*conditions))
+            .order_by(Lead.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not rows:
+            return 0
+        ids = [row.id for row in rows]
+
+        db.execute(insert(LeadArchive).from_select(
+            list(_LEAD_COLUMNS),
+            select(*(getattr(Lead, name) for name in _LEAD_COLUMNS)).where(Lead.id.in_(ids))
+        ))
+        self._add_to_rollups(db, rows)
+        # Webhook events and status changes keep their lead_id (no foreign key), which now points into the archive
+        db.execute(delete(Lead).where(Lead.id.in_(ids)), execution_options={"synchronize_session": False})
+        bump_data_versions(db, {row.campaign_id for row in rows})
+        db.commit()
+        return len(ids)
+
+    def _add_to_rollups(self, db: Session, rows) -> None:
+        now = datetime.now()
+        counts: Dict[Tuple[int, datetime, str], int] = {}
+        for row in rows:
+            day = (row.created_at or now).replace(hour=0, minute=0, second=0, microsecond=0)
+            key = (row.campaign_id, day, row.status)
+            counts[key] = counts.get(key, 0) + 1
+
+        for (campaign_id, day, status), count in counts.items():
+            updated = db.execute(
+                update(LeadRollup).where(
+                    LeadRollup.campaign_id == campaign_id,
+                    LeadRollup.day == day,
+                    LeadRollup.status == status
+                ).values(leads=LeadRollup.leads + count),
+                execution_options={"synchronize_session": False}
+            ).rowcount
+            if not updated:
+                db.execute(insert(LeadRollup).values(campaign_id=campaign_id, day=day, status=status, leads=count))
+
+
+lead_tiering_service = LeadTieringService()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Move old and archived-campaign leads to leads_archive")
+    parser.add_argument("--days", type=int, default=LEAD_ARCHIVE_AFTER_DAYS, help="Archive leads older than this; 0 disables the age rule")
+    parser.add_argument("--batch-size", type=int, default=LEAD_ARCHIVE_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    result = LeadTieringService(archive_after_days=args.days, batch_size=args.batch_size).run_once()
+    logger.info(f"Archived {result['archived']} leads")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
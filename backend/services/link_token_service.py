@@ -0,0 +1,81 @@
+import hashlib
+import logging
+import os
+import secrets
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+from jose import jwt, JWTError
+
+logger = logging.getLogger(__name__)
+
+SECRET_KEY = os.getenv("SECRET_KEY")
+ALGORITHM = os.getenv("ALGORITHM", "HS256")
+PUBLIC_LINK_TOKEN_MINUTES = int(os.getenv("PUBLIC_LINK_TOKEN_MINUTES", "60"))
+# Only these environments may run without SECRET_KEY (tokens then use a per-process key)
+ENVIRONMENT = os.getenv("ENVIRONMENT", "production").lower()
+EPHEMERAL_KEY_ENVIRONMENTS = ("development", "test")
+
+
+class LinkTokenService:
+    """
+    Issues short-lived signed access tokens for password-protected public links.
+
+    The password is checked with bcrypt once, when the token is issued; later
+    requests only verify an HMAC signature. Tokens are bound to the link UUID,
+    expire on their own and never outlive the link. They also carry a
+    fingerprint of the password hash, so changing a link's password revokes
+    every token issued for it.
+    """
+
+    def __init__(self, secret_key: Optional[str] = SECRET_KEY, algorithm: str = ALGORITHM,
+                 expire_minutes: int = PUBLIC_LINK_TOKEN_MINUTES, environment: str = ENVIRONMENT):
+        if not secret_key:
+            if environment not in EPHEMERAL_KEY_ENVIRONMENTS:
+                # A random key would differ per worker and per restart, silently rejecting issued tokens
+                raise RuntimeError(f"SECRET_KEY must be set when ENVIRONMENT is {environment}")
+            logger.warning("SECRET_KEY is not set, public link tokens will not survive a restart")
+            secret_key = secrets.token_urlsafe(32)
+        self.secret_key = secret_key
+        self.algorithm = algorithm
+        self.expire_minutes = expire_minutes
+
+    def issue(self, link: Dict[str, Any]) -> Dict[str, Any]:
+        """Returns {access_token, token_type, expires_at} for an already-verified link"""
+        expires_at = datetime.now(timezone.utc) + timedelta(minutes=self.expire_minutes)
+        link_expires_at = self._as_utc(link.get("expires_at"))
+        if link_expires_at and link_expires_at < expires_at:
+            expires_at = link_expires_at
+
+        claims = {
+            "sub": link["uuid"],
+            "pwf": self._fingerprint(link.get("password_hash")),
+            "exp": expires_at
+        }
+        return {
+            "access_token": jwt.encode(claims, self.secret_key, algorithm=self.algorithm),
+            "token_type": "bearer",
+            "expires_at": expires_at.isoformat()
+        }
+
+    def verify(self, token: str, link: Dict[str, Any]) -> bool:
+        """True if the token was issued for this link and is still valid"""
+        try:
+            claims = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+        except JWTError:
+            return False
+        return (
+            claims.get("sub") == link["uuid"]
+            and claims.get("pwf") == self._fingerprint(link.get("password_hash"))
+        )
+
+    def _fingerprint(self, password_hash: Optional[str]) -> str:
+        return hashlib.sha256((password_hash or "").encode()).hexdigest()[:16]
+
+    def _as_utc(self, value: Optional[datetime]) -> Optional[datetime]:
+        if value is None:
+            return None
+        # Naive timestamps are in server local time, which astimezone assumes
+        return value.astimezone(timezone.utc)
+
+
+link_token_service = LinkTokenService()
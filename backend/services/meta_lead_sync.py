@@ -0,0 +1,327 @@
+import asyncio
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from ..database import SessionLocal
+from ..models import Integration, IntegrationStatus, Lead, LeadArchive, SyncLog
+from .audit_log import audit_log
+from .data_version import bump_data_version
+from .meta_service import meta_service, MetaService
+from .webhook_normalizer import webhook_normalizer
+
+logger = logging.getLogger(__name__)
+
+META_SYNC_INTERVAL_SECONDS = int(os.getenv("META_SYNC_INTERVAL_SECONDS", "600"))
+META_SYNC_PAGE_SIZE = int(os.getenv("META_SYNC_PAGE_SIZE", "500"))
+META_SYNC_CHUNK_SIZE = int(os.getenv("META_SYNC_CHUNK_SIZE", "1000"))
+
+
+class MetaLeadSync:
+    """
+    Pulls leads from Meta Lead Ads forms into the integration's campaign.
+
+    Each form is polled from a high-water mark (the newest created_time seen
+    by the last successful run, kept in SyncLog.details). Pages are followed
+    through Graph API cursors and leads are bulk-inserted in chunks, skipping
+    any whose Meta lead id is already stored, so a run interrupted midway can
+    simply be repeated. Only one sync per integration runs at a time, and the
+    unique index on (campaign_id, source, external_id) keeps anything else
+    writing the same leads from duplicating them.
+
+    Integration config: {"access_token": ..., "form_ids": [...]} or
+    {"access_token": ..., "page_id": ...} to sync every form on the page,
+    plus an optional "field_mapping" as used by webhooks.
+    """
+
+    def __init__(self, service: MetaService = meta_service, page_size: int = META_SYNC_PAGE_SIZE,
+                 chunk_size: int = META_SYNC_CHUNK_SIZE):
+        self.service = service
+        self.page_size = page_size
+        self.chunk_size = chunk_size
+        self.running = False
+        self._active: Set[int] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._lock = threading.Lock()
+
+    def is_running(self, integration_id: int) -> bool:
+        with self._lock:
+            return integration_id in self._active
+
+    async def start(self):
+        self.running = True
+        while self.running:
+            try:
+                await self.sync_all()
+            except Exception as e:
+                logger.error(f"Meta lead sync failed: {str(e)}")
+            await asyncio.sleep(META_SYNC_INTERVAL_SECONDS)
+
+    def stop(self):
+        self.running = False
+
+    async def sync_all(self):
+        integration_ids = await asyncio.to_thread(self._active_integration_ids)
+        for integration_id in integration_ids:
+            if self.is_running(integration_id):
+                # Triggered manually in the meantime
+                continue
+            try:
+                await self.sync_integration(integration_id)
+            except RuntimeError as e:
+                logger.info(str(e))
+
+    async def sync_integration(self, integration_id: int) -> Dict[str, Any]:
+        """Runs one incremental sync and records it as a SyncLog. Returns the log details"""
+        self._claim(integration_id)
+        return await self._run_claimed(integration_id)
+
+    def start_sync(self, integration_id: int) -> asyncio.Task:
+        """
+        Starts sync_integration in the background. Raises RuntimeError if a sync
+        for the integration is already running. The task is referenced until it
+        finishes so it can't be garbage collected midway.
+        """
+        self._claim(integration_id)
+        task = asyncio.create_task(self._run_claimed(integration_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def _claim(self, integration_id: int):
+        with self._lock:
+            if integration_id in self._active:
+                raise RuntimeError(f"A sync for integration {integration_id} is already running")
+            self._active.add(integration_id)
+
+    async def _run_claimed(self, integration_id: int) -> Dict[str, Any]:
+        # Database work runs on worker threads; only Graph API calls stay on the event loop
+        db = SessionLocal()
+        try:
+            integration = await asyncio.to_thread(self._load_integration, db, integration_id)
+            return await self._sync(db, integration)
+        finally:
+            await asyncio.to_thread(db.close)
+            with self._lock:
+                self._active.discard(integration_id)
+
+    def _active_integration_ids(self) -> List[int]:
+        db = SessionLocal()
+        try:
+            return [
+                row.id for row in db.query(Integration.id).filter(
+                    Integration.type == "meta",
+                    Integration.is_active == True
+                )
+            ]
+        finally:
+            db.close()
+
+    def _load_integration(self, db: Session, integration_id: int) -> Integration:
+        integration = db.query(Integration).filter(Integration.id == integration_id).first()
+        if not integration:
+            raise ValueError(f"Integration {integration_id} not found")
+        # Detached, so commits and rollbacks during the sync never reload it on the event loop
+        db.expunge(integration)
+        return integration
+
+    async def _sync(self, db: Session, integration: Integration) -> Dict[str, Any]:
+        started_at = datetime.now()
+        config = integration.config or {}
+        high_water_marks = await asyncio.to_thread(self._load_high_water_marks, db, integration.id)
+        details: Dict[str, Any] = {"inserted": 0, "skipped": 0, "forms": {}, "high_water_marks": high_water_marks}
+
+        try:
+            if not config.get("access_token"):
+                raise ValueError("No access token found")
+            if not integration.campaign_id:
+                raise ValueError("Integration is not linked to a campaign")
+
+            form_ids = config.get("form_ids") or await self._list_forms(config)
+            new_marks = dict(high_water_marks)
+            for form_id in form_ids:
+                form_stats = await self._sync_form(db, integration, str(form_id), high_water_marks.get(str(form_id)))
+                details["forms"][str(form_id)] = form_stats
+                details["inserted"] += form_stats["inserted"]
+                details["skipped"] += form_stats["skipped"]
+                if form_stats["high_water_mark"]:
+                    new_marks[str(form_id)] = form_stats["high_water_mark"]
+
+            details["high_water_marks"] = new_marks
+            await asyncio.to_thread(
+                self._record, db, integration.id, "success", f"Synced {details['inserted']} new leads",
+                details, started_at
+            )
+
+        except Exception as e:
+            await asyncio.to_thread(db.rollback)
+            details["error"] = str(e)
+            await asyncio.to_thread(self._record, db, integration.id, "failure", str(e), details, started_at)
+            logger.error(f"Meta sync for integration {integration.id} failed: {str(e)}")
+
+        return details
+
+    async def _list_forms(self, config: Dict[str, Any]) -> List[str]:
+        page_id = config.get("page_id")
+        if not page_id:
+            raise ValueError("Config needs form_ids or page_id")
+
+        form_ids = []
+        async for page in self._paginate(f"/{page_id}/leadgen_forms", {
+            "access_token": config["access_token"],
+            "fields": "id",
+            "limit": 100
+        }):
+            form_ids.extend(form["id"] for form in page)
+        return form_ids
+
+    async def _sync_form(self, db: Session, integration: Integration, form_id: str,
+                         high_water_mark: Optional[int]) -> Dict[str, Any]:
+        params = {
+            "access_token": integration.config["access_token"],
+            "fields": "id,created_time,field_data",
+            "limit": self.page_size
+        }
+        if high_water_mark:
+            # Inclusive of the mark's second: leads sharing it are deduplicated on insert
+            params["filtering"] = (
+                f'[{{"field":"time_created","operator":"GREATER_THAN","value":{high_water_mark - 1}}}]'
+            )
+
+        stats = {"inserted": 0, "skipped": 0, "high_water_mark": high_water_mark}
+        buffer: List[Dict[str, Any]] = []
+
+        async for page in self._paginate(f"/{form_id}/leads", params):
+            for meta_lead in page:
+                row = self._normalize(integration, form_id, meta_lead)
+                created_ts = int(row["created_at"].timestamp())
+                if not stats["high_water_mark"] or created_ts > stats["high_water_mark"]:
+                    stats["high_water_mark"] = created_ts
+                buffer.append(row)
+
+            if len(buffer) >= self.chunk_size:
+                inserted = await asyncio.to_thread(self._insert_chunk, db, integration.campaign_id, buffer)
+                stats["inserted"] += inserted
+                stats["skipped"] += len(buffer) - inserted
+                buffer = []
+
+        if buffer:
+            inserted = await asyncio.to_thread(self._insert_chunk, db, integration.campaign_id, buffer)
+            stats["inserted"] += inserted
+            stats["skipped"] += len(buffer) - inserted
+
+        return stats
+
+    async def _paginate(self, path: str, params: Dict[str, Any]):
+        """Yields the `data` list of each page, following paging.next cursors"""
+        client = self.service.get_client()
+        response = await client.get(path, params=params)
+        while True:
+            response.raise_for_status()
+            body = response.json()
+            yield body.get("data", [])
+
+            next_url = body.get("paging", {}).get("next")
+            if not next_url:
+                break
+            response = await client.get(next_url)
+
+    def _normalize(self, integration: Integration, form_id: str, meta_lead: Dict[str, Any]) -> Dict[str, Any]:
+        fields = {
+            field["name"]: (field.get("values") or [None])[0]
+            for field in meta_lead.get("field_data", [])
+        }
+        normalized = webhook_normalizer.normalize(fields, (integration.config or {}).get("field_mapping"))
+        return {
+            "campaign_id": integration.campaign_id,
+            "email": normalized.get("email"),
+            "full_name": normalized.get("full_name"),
+            "phone": normalized.get("phone"),
+            "status": "new",
+            "source": "meta",
+            "external_id": str(meta_lead["id"]),
+            "data": {"form_id": form_id, "fields": normalized.get("data")},
+            "created_at": self._parse_time(meta_lead.get("created_time"))
+        }
+
+    def _insert_chunk(self, db: Session, campaign_id: int, rows: List[Dict[str, Any]]) -> int:
+        """
+        Inserts rows not already stored (by external id) in one statement.
+        Returns the count inserted. Rows another writer stored since the
+        lookup are skipped by the unique index rather than duplicated.
+        """
+        external_ids = list({row["external_id"] for row in rows})
+        existing = set()
+        # Archived leads count as already stored
+        for model in (Lead, LeadArchive):
+            existing.update(
+                row.external_id for row in db.query(model.external_id).filter(
+                    model.campaign_id == campaign_id,
+                    model.source == "meta",
+                    model.external_id.in_(external_ids)
+                )
+            )
+
+        new_rows, seen = [], set(existing)
+        for row in rows:
+            if row["external_id"] not in seen:
+                seen.add(row["external_id"])
+                new_rows.append(row)
+
+        if not new_rows:
+            return 0
+        inserted = len(db.execute(self._insert_new_leads(db), new_rows).all())
+        if inserted:
+            bump_data_version(db, campaign_id)
+        db.commit()
+        return inserted
+
+    def _insert_new_leads(self, db: Session):
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            statement = postgresql.insert(Lead)
+        elif dialect == "sqlite":
+            statement = sqlite.insert(Lead)
+        else:
+            raise RuntimeError(f"Meta lead sync isn't supported on {dialect}")
+        return statement.on_conflict_do_nothing(
+            index_elements=[Lead.campaign_id, Lead.source, Lead.external_id],
+            index_where=text("source = 'meta'")
+        ).returning(Lead.id)
+
+    def _load_high_water_marks(self, db: Session, integration_id: int) -> Dict[str, int]:
+        # The previous run's SyncLog may still be buffered
+        audit_log.flush()
+        last_success = db.query(SyncLog).filter(
+            SyncLog.integration_id == integration_id,
+            SyncLog.status == "success"
+        ).order_by(SyncLog.id.desc()).first()
+        if not last_success or not last_success.details:
+            return {}
+        return dict(last_success.details.get("high_water_marks") or {})
+
+    def _record(self, db: Session, integration_id: int, status: str, message: str,
+                details: Dict[str, Any], started_at: datetime):
+        details["duration_seconds"] = round((datetime.now() - started_at).total_seconds(), 3)
+        audit_log.log_sync(integration_id, status, message, details)
+
+        if status == "success":
+            integration_status = db.query(IntegrationStatus).filter(
+                IntegrationStatus.integration_id == integration_id
+            ).first()
+            if integration_status:
+                integration_status.last_sync_time = datetime.now()
+                db.commit()
+
+    def _parse_time(self, value: Optional[str]) -> datetime:
+        if not value:
+            return datetime.now(timezone.utc)
+        # Graph timestamps look like 2024-01-31T12:00:00+0000
+        return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S%z")
+
+
+meta_lead_sync = MetaLeadSync()
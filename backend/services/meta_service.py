@@ -1,14 +1,47 @@
+import asyncio
+import json
+import os
+from urllib.parse import urlencode
 import httpx
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from ..models import Integration, IntegrationStatus, IntegrationStatusEnum
 from sqlalchemy.orm import Session
 
+META_GRAPH_URL = os.getenv("META_GRAPH_URL", "https://graph.facebook.com/v18.0")
+# App token ("app_id|app_secret") for batch requests; without it every token is checked on its own
+META_APP_ACCESS_TOKEN = os.getenv("META_APP_ACCESS_TOKEN")
+
 class MetaService:
-    BASE_URL = "https://graph.facebook.com/v18.0"
-    
-    def __init__(self):
-        pass
+    BASE_URL = META_GRAPH_URL
+    # Graph API accepts at most 50 operations per batch request
+    BATCH_SIZE = 50
+
+    def __init__(self, base_url: Optional[str] = None, transport: Optional[httpx.AsyncBaseTransport] = None,
+                 app_access_token: Optional[str] = META_APP_ACCESS_TOKEN):
+        self.base_url = base_url or self.BASE_URL
+        self.app_access_token = app_access_token
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def get_client(self) -> httpx.AsyncClient:
+        """
+        Returns the long-lived pooled client, so health checks and syncs reuse
+        keep-alive connections instead of a TLS handshake per call.
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(15.0, connect=5.0),
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+                transport=self._transport
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     async def check_connection_status(self, integration: Integration) -> Dict[str, Any]:
         """
@@ -16,49 +49,138 @@ class MetaService:
         Returns a dict with status, status_text, and error_message.
         """
         if not integration.config or "access_token" not in integration.config:
-            return {
-                "status": IntegrationStatusEnum.DISCONNECTED,
-                "status_text": "Not Connected",
-                "error": "No access token found"
-            }
+            return self._missing_token_result()
 
         access_token = integration.config["access_token"]
-        
+
         try:
             # Verify token validity by calling debug_token endpoint
             # Note: In a real app, we need the App Access Token to call debug_token
             # For this implementation, we'll try to fetch the 'me' endpoint as a proxy check
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.BASE_URL}/me",
-                    params={"access_token": access_token}
-                )
-                
-                if response.status_code == 200:
-                    return {
-                        "status": IntegrationStatusEnum.CONNECTED,
-                        "status_text": "Active",
-                        "error": None
-                    }
-                elif response.status_code == 401:
-                    return {
-                        "status": IntegrationStatusEnum.WARNING,
-                        "status_text": "Token Expired",
-                        "error": "Access token has expired or is invalid"
-                    }
-                else:
-                    return {
-                        "status": IntegrationStatusEnum.WARNING,
-                        "status_text": "API Error",
-                        "error": f"Meta API returned {response.status_code}"
-                    }
-                    
+            response = await self.get_client().get(
+                "/me",
+                params={"access_token": access_token}
+            )
+            return self._result_from_response(response.status_code, response.text)
+
+        except Exception as e:
+            return self._connection_failed_result(e)
+
+    def supports_batch(self) -> bool:
+        """Batch checks need an app token for the request itself"""
+        return bool(self.app_access_token)
+
+    async def check_connection_statuses(self, integrations: List[Integration]) -> Dict[int, Dict[str, Any]]:
+        """
+        Checks many Meta integrations using Graph API batch requests:
+        up to BATCH_SIZE token checks per HTTP round trip.
+        Returns {integration_id: result} in the same shape as check_connection_status.
+
+        The batch request itself is authenticated with the app token, never
+        one of the checked tokens, so one expired token can't fail the whole
+        batch. Without an app token each integration is checked on its own.
+        """
+        results: Dict[int, Dict[str, Any]] = {}
+        pending = []
+        for integration in integrations:
+            if not integration.config or "access_token" not in integration.config:
+                results[integration.id] = self._missing_token_result()
+            else:
+                pending.append(integration)
+
+        if not self.supports_batch():
+            checked = await asyncio.gather(*[self.check_connection_status(integration) for integration in pending])
+            results.update({integration.id: result for integration, result in zip(pending, checked)})
+            return results
+
+        for start in range(0, len(pending), self.BATCH_SIZE):
+            chunk = pending[start:start + self.BATCH_SIZE]
+            results.update(await self._check_batch(chunk))
+
+        return results
+
+    async def _check_batch(self, integrations: List[Integration]) -> Dict[int, Dict[str, Any]]:
+        batch = [
+            # Each operation carries its own token, overriding the top-level app token
+            {"method": "GET", "relative_url": f"me?{urlencode({'access_token': integration.config['access_token']})}"}
+            for integration in integrations
+        ]
+
+        try:
+            response = await self.get_client().post(
+                "/",
+                data={
+                    "access_token": self.app_access_token,
+                    "batch": json.dumps(batch),
+                    "include_headers": "false"
+                }
+            )
+            if response.status_code != 200:
+                # The batch itself failed (e.g. a bad app token); that says nothing about the checked tokens
+                result = {
+                    "status": IntegrationStatusEnum.WARNING,
+                    "status_text": "API Error",
+                    "error": f"Meta API batch request returned {response.status_code}"
+                }
+                return {integration.id: result for integration in integrations}
+            responses = response.json()
         except Exception as e:
+            result = self._connection_failed_result(e)
+            return {integration.id: result for integration in integrations}
+
+        results = {}
+        for integration, item in zip(integrations, responses):
+            if item is None:
+                # Graph returns null for operations that did not complete in time
+                results[integration.id] = {
+                    "status": IntegrationStatusEnum.WARNING,
+                    "status_text": "API Error",
+                    "error": "Meta API batch operation timed out"
+                }
+            else:
+                results[integration.id] = self._result_from_response(item.get("code"), item.get("body"))
+        return results
+
+    def _result_from_response(self, status_code: int, body: Optional[str]) -> Dict[str, Any]:
+        if status_code == 200:
             return {
-                "status": IntegrationStatusEnum.DISCONNECTED,
-                "status_text": "Connection Failed",
-                "error": str(e)
+                "status": IntegrationStatusEnum.CONNECTED,
+                "status_text": "Active",
+                "error": None
             }
+        elif status_code == 401 or self._is_token_error(body):
+            return {
+                "status": IntegrationStatusEnum.WARNING,
+                "status_text": "Token Expired",
+                "error": "Access token has expired or is invalid"
+            }
+        else:
+            return {
+                "status": IntegrationStatusEnum.WARNING,
+                "status_text": "API Error",
+                "error": f"Meta API returned {status_code}"
+            }
+
+    def _is_token_error(self, body: Optional[str]) -> bool:
+        # OAuthException code 190 means the token is expired, revoked or invalid
+        try:
+            return json.loads(body or "{}").get("error", {}).get("code") == 190
+        except (ValueError, AttributeError):
+            return False
+
+    def _missing_token_result(self) -> Dict[str, Any]:
+        return {
+            "status": IntegrationStatusEnum.DISCONNECTED,
+            "status_text": "Not Connected",
+            "error": "No access token found"
+        }
+
+    def _connection_failed_result(self, error: Exception) -> Dict[str, Any]:
+        return {
+            "status": IntegrationStatusEnum.DISCONNECTED,
+            "status_text": "Connection Failed",
+            "error": str(error)
+        }
 
     async def get_auth_url(self, app_id: str, redirect_uri: str) -> str:
         return (
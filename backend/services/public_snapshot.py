@@ -0,0 +1,204 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from ..models import Campaign, PublicLink
+from .cache_bus import cache_bus
+from .data_version import get_data_version
+from .lead_tiering import all_leads, lead_facts
+
+PUBLIC_SNAPSHOT_TTL_SECONDS = int(os.getenv("PUBLIC_SNAPSHOT_TTL_SECONDS", "300"))
+PUBLIC_SNAPSHOT_RECHECK_SECONDS = int(os.getenv("PUBLIC_SNAPSHOT_RECHECK_SECONDS", "5"))
+
+
+def serialize_lead(lead) -> Dict[str, Any]:
+    return {
+        "id": lead.id,
+        "email": lead.email,
+        "full_name": lead.full_name,
+        "status": lead.status,
+        "created_at": lead.created_at.isoformat() if lead.created_at else None
+    }
+
+
+class PublicSnapshotService:
+    """
+    Serves public dashboards from per-link snapshots held in memory.
+
+    A snapshot holds the campaign header, aggregated stats and the first page of
+    leads. It is rebuilt when the campaign's data version changes or after the
+    TTL; between rebuilds the version is re-checked at most every few seconds
+    with a primary-key lookup, so anonymous viewers never scan the leads table.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = PUBLIC_SNAPSHOT_TTL_SECONDS,
+        recheck_seconds: int = PUBLIC_SNAPSHOT_RECHECK_SECONDS,
+        page_size: int = 50,
+        max_entries: int = 1000
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.recheck_seconds = recheck_seconds
+        self.page_size = page_size
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._guard = threading.Lock()
+        self._build_locks: Dict[str, threading.Lock] = {}
+
+    def get_link(self, db: Session, link_uuid: str) -> Optional[Dict[str, Any]]:
+        """Returns the cached link metadata, loading it on first access"""
+        entry = self._get_entry(link_uuid)
+        if entry:
+            return entry["link"]
+
+        link = db.query(PublicLink).filter(PublicLink.uuid == link_uuid).first()
+        if not link:
+            return None
+
+        meta = {
+            "id": link.id,
+            "uuid": link.uuid,
+            "campaign_id": link.campaign_id,
+            "type": link.type.value if hasattr(link.type, "value") else link.type,
+            "password_hash": link.password_hash,
+            "expires_at": link.expires_at
+        }
+        self._put_entry(link_uuid, {
+            "link": meta,
+            "snapshot": None,
+            "data_version": None,
+            "built_at": 0.0,
+            "checked_at": 0.0
+        })
+        return meta
+
+    def get_snapshot(self, db: Session, link: Dict[str, Any]) -> Dict[str, Any]:
+        link_uuid = link["uuid"]
+        entry = self._get_entry(link_uuid)
+        if entry and self._is_current(db, entry):
+            return entry["snapshot"]
+
+        with self._build_lock(link_uuid):
+            # Another request may have rebuilt it while we waited
+            entry = self._get_entry(link_uuid)
+            if entry and self._is_current(db, entry):
+                return entry["snapshot"]
+
+            data_version = get_data_version(db, link["campaign_id"])
+            snapshot = self._build_snapshot(db, link["campaign_id"])
+            now = time.monotonic()
+            self._put_entry(link_uuid, {
+                "link": link,
+                "snapshot": snapshot,
+                "data_version": data_version,
+                "built_at": now,
+                "checked_at": now
+            })
+            return snapshot
+
+    def get_leads_page(self, db: Session, campaign_id: int, cursor: Optional[int] = None,
+                       limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Keyset-paginated lead list, newest first.
+        `cursor` is the last id of the previous page.
+        """
+        limit = limit or self.page_size
+        leads = all_leads()
+        query = db.query(
+            leads.c.id, leads.c.email, leads.c.full_name, leads.c.status, leads.c.created_at
+        ).filter(leads.c.campaign_id == campaign_id)
+        if cursor is not None:
+            query = query.filter(leads.c.id < cursor)
+
+        # Fetch one extra row to know whether another page exists
+        rows = query.order_by(leads.c.id.desc()).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        return {
+            "leads": [serialize_lead(row) for row in rows],
+            "next_cursor": rows[-1].id if has_more else None
+        }
+
+    def invalidate(self, link_uuid: Optional[str] = None, campaign_id: Optional[int] = None):
+        """Drops cached entries for a link, for every link of a campaign, or everything"""
+        with self._guard:
+            if link_uuid is not None:
+                self._entries.pop(link_uuid, None)
+            elif campaign_id is not None:
+                for key in [k for k, v in self._entries.items() if v["link"]["campaign_id"] == campaign_id]:
+                    self._entries.pop(key, None)
+            else:
+                self._entries.clear()
+
+    def _build_snapshot(self, db: Session, campaign_id: int) -> Dict[str, Any]:
+        campaign = db.query(Campaign).filter(Campaign.id == campaign_id).first()
+
+        # One grouped pass gives every status count and the total
+        facts = lead_facts()
+        status_counts = {
+            status: int(count) for status, count in
+            db.query(facts.c.status, func.sum(facts.c.leads))
+            .filter(facts.c.campaign_id == campaign_id)
+            .group_by(facts.c.status)
+            .all()
+        }
+        total_leads = sum(status_counts.values())
+        first_page = self.get_leads_page(db, campaign_id)
+
+        return {
+            "campaign": {
+                "id": campaign.id,
+                "name": campaign.name,
+                "description": campaign.description
+            },
+            "leads": first_page["leads"],
+            "next_cursor": first_page["next_cursor"],
+            "stats": {
+                "total_leads": total_leads,
+                "new_leads": status_counts.get("new", 0),
+                "status_breakdown": status_counts
+            }
+        }
+
+    def _is_current(self, db: Session, entry: Dict[str, Any]) -> bool:
+        if entry["snapshot"] is None:
+            return False
+
+        now = time.monotonic()
+        if now - entry["built_at"] >= self.ttl_seconds:
+            return False
+        if now - entry["checked_at"] < self.recheck_seconds:
+            return True
+
+        entry["checked_at"] = now
+        return get_data_version(db, entry["link"]["campaign_id"]) == entry["data_version"]
+
+    def _get_entry(self, link_uuid: str) -> Optional[Dict[str, Any]]:
+        with self._guard:
+            entry = self._entries.get(link_uuid)
+            if entry:
+                self._entries.move_to_end(link_uuid)
+            return entry
+
+    def _put_entry(self, link_uuid: str, entry: Dict[str, Any]):
+        with self._guard:
+            self._entries[link_uuid] = entry
+            self._entries.move_to_end(link_uuid)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _build_lock(self, link_uuid: str) -> threading.Lock:
+        with self._guard:
+            if len(self._build_locks) > self.max_entries:
+                self._build_locks = {k: v for k, v in self._build_locks.items() if v.locked()}
+            return self._build_locks.setdefault(link_uuid, threading.Lock())
+
+
+public_snapshot_service = PublicSnapshotService()
+cache_bus.subscribe("public_link", lambda link_uuid: public_snapshot_service.invalidate(link_uuid=link_uuid))
+cache_bus.subscribe("campaign", lambda campaign_id: public_snapshot_service.invalidate(campaign_id=campaign_id))
@@ -0,0 +1,152 @@
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+from ..database import SessionLocal
+from ..models import Lead, WebhookEndpoint, WebhookEvent
+from .data_version import bump_data_version
+from .webhook_normalizer import webhook_normalizer
+
+logger = logging.getLogger(__name__)
+
+REPLAY_BATCH_SIZE = 1000
+# Events rejected for a bad secret were never authenticated and must not become leads
+UNAUTHENTICATED_ERROR = "Invalid secret"
+
+
+class WebhookReplayService:
+    """
+    Re-processes failed (dead-letter) webhook events for an endpoint.
+
+    Events are walked in id order, normalized with the endpoint's current
+    field_mapping, and turned into leads with one bulk insert per batch. Each
+    batch's leads and the matching event updates (status "replayed", lead_id
+    set) commit in the same transaction, so a replay that dies halfway can
+    be started again without creating duplicates. Automations are not
+    triggered for replayed leads.
+    """
+
+    def __init__(self, batch_size: int = REPLAY_BATCH_SIZE):
+        self.batch_size = batch_size
+        self._active: set = set()
+        self._lock = threading.Lock()
+
+    def is_running(self, endpoint_id: int) -> bool:
+        with self._lock:
+            return endpoint_id in self._active
+
+    def count_failed(self, db: Session, endpoint_id: int, since: Optional[datetime] = None,
+                     until: Optional[datetime] = None) -> int:
+        return self._failed_query(db, endpoint_id, since, until).count()
+
+    def replay(self, job, endpoint_id: int, since: Optional[datetime] = None,
+               until: Optional[datetime] = None) -> Dict[str, Any]:
+        """Job function: replays every matching failed event and returns counts"""
+        with self._lock:
+            if endpoint_id in self._active:
+                raise RuntimeError(f"A replay for endpoint {endpoint_id} is already running")
+            self._active.add(endpoint_id)
+
+        db = SessionLocal()
+        try:
+            endpoint = db.query(
+                WebhookEndpoint.campaign_id, WebhookEndpoint.field_mapping
+            ).filter(WebhookEndpoint.id == endpoint_id).first()
+            if not endpoint:
+                raise ValueError(f"Webhook endpoint {endpoint_id} not found")
+            if job:
+                job.set_total(self.count_failed(db, endpoint_id, since, until))
+
+            stats = {"replayed": 0, "failed": 0}
+            last_id = 0
+            while True:
+                events = self._failed_query(db, endpoint_id, since, until).filter(
+                    WebhookEvent.id > last_id
+                ).order_by(WebhookEvent.id).limit(self.batch_size).with_for_update(skip_locked=True).all()
+                if not events:
+                    break
+                last_id = events[-1].id
+
+                try:
+                    stats["replayed"] += self._replay_batch(db, endpoint, events)
+                except Exception as e:
+                    # One bad row shouldn't sink the batch: retry it event by event
+                    db.rollback()
+                    logger.warning(f"Replay batch for endpoint {endpoint_id} failed, retrying singly: {str(e)}")
+                    for event in events:
+                        replayed = self._replay_single(db, endpoint, event.id)
+                        stats["replayed" if replayed else "failed"] += 1
+
+                db.expunge_all()
+                if job:
+                    job.advance(len(events))
+
+            logger.info(f"Replayed {stats['replayed']} webhook events for endpoint {endpoint_id}")
+            return stats
+        finally:
+            db.close()
+            with self._lock:
+                self._active.discard(endpoint_id)
+
+    def _failed_query(self, db: Session, endpoint_id: int, since: Optional[datetime], until: Optional[datetime]):
+        query = db.query(WebhookEvent).filter(
+            WebhookEvent.endpoint_id == endpoint_id,
+            WebhookEvent.status == "failed",
+            WebhookEvent.lead_id == None,
+            (WebhookEvent.error_message == None) | (WebhookEvent.error_message != UNAUTHENTICATED_ERROR)
+        )
+        if since:
+            query = query.filter(WebhookEvent.created_at >= since)
+        if until:
+            query = query.filter(WebhookEvent.created_at < until)
+        return query
+
+    def _replay_batch(self, db: Session, endpoint, events: List[WebhookEvent]) -> int:
+        normalized = [webhook_normalizer.normalize(event.payload or {}, endpoint.field_mapping) for event in events]
+        lead_ids = db.execute(
+            insert(Lead).returning(Lead.id, sort_by_parameter_order=True),
+            [self._lead_row(endpoint, event, data) for event, data in zip(events, normalized)]
+        ).scalars().all()
+
+        db.execute(update(WebhookEvent), [
+            {
+                "id": event.id,
+                "status": "replayed",
+                "lead_id": lead_id,
+                "normalized_data": data,
+                "error_message": None
+            }
+            for event, data, lead_id in zip(events, normalized, lead_ids)
+        ])
+        bump_data_version(db, endpoint.campaign_id)
+        db.commit()
+        return len(events)
+
+    def _replay_single(self, db: Session, endpoint, event_id: int) -> bool:
+        event = db.query(WebhookEvent).filter(WebhookEvent.id == event_id).first()
+        try:
+            return bool(self._replay_batch(db, endpoint, [event]))
+        except Exception as e:
+            db.rollback()
+            event = db.query(WebhookEvent).filter(WebhookEvent.id == event_id).first()
+            event.error_message = f"Replay failed: {str(e)}"
+            db.commit()
+            return False
+
+    def _lead_row(self, endpoint, event: WebhookEvent, normalized: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "campaign_id": endpoint.campaign_id,
+            "email": normalized.get("email"),
+            "full_name": normalized.get("full_name"),
+            "phone": normalized.get("phone"),
+            "source": "webhook",
+            "status": "new",
+            "data": normalized.get("data"),
+            # Keep the original arrival time so reports place the lead correctly
+            "created_at": event.created_at or datetime.now()
+        }
+
+
+webhook_replay_service = WebhookReplayService()
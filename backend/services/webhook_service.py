@@ -1,58 +1,201 @@
+import os
+import threading
+import time
 from datetime import datetime, timedelta
-from typing import Dict, Any
-from ..models import Integration, IntegrationStatusEnum, WebhookEvent
+from typing import Dict, Any, List, Optional
+from ..models import Integration, IntegrationStatusEnum, WebhookEndpoint, WebhookEvent
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import func, case, select
+from .cache_bus import cache_bus
+
+WEBHOOK_HEALTH_WINDOW_HOURS = int(os.getenv("WEBHOOK_HEALTH_WINDOW_HOURS", "24"))
+WEBHOOK_HEALTH_CACHE_SECONDS = int(os.getenv("WEBHOOK_HEALTH_CACHE_SECONDS", "60"))
+# Failure rate above which an otherwise active endpoint is flagged
+WEBHOOK_FAILURE_RATE_WARNING = float(os.getenv("WEBHOOK_FAILURE_RATE_WARNING", "0.5"))
+# Don't judge the failure rate on a handful of events
+WEBHOOK_MIN_EVENTS_FOR_RATE = 5
+# Nothing older than this affects health, so aggregates never scan further back
+LOOKBACK_DAYS = 7
 
 class WebhookService:
-    def __init__(self):
-        pass
+    def __init__(self, cache_seconds: int = WEBHOOK_HEALTH_CACHE_SECONDS):
+        self.cache_seconds = cache_seconds
+        self._cache: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
 
     def check_health(self, db: Session, integration: Integration) -> Dict[str, Any]:
         """
         Checks if webhooks have been received recently.
+        Health comes from WebhookEvent aggregates for the integration's endpoints
+        (config "endpoint_id"/"endpoint_ids", else every endpoint of its campaign).
+
+        Logic:
+        - Green: Successful event < 24 hours ago and failure rate under threshold
+        - Yellow: Successful event < 7 days ago, high failure rate, or no data yet
+        - Red: No successful events in 7 days (none received, or all failed)
         """
-        # Get the last received event for this integration
-        # Note: We assume integration.id links to the campaign's webhook config
-        # For now, we'll look for events linked to this integration
-        
-        # This requires a WebhookEvent model which we defined in the plan but haven't created in models.py yet
-        # Let's assume we'll add it. For now, we'll mock the query or use a placeholder.
-        
-        # Logic:
-        # - Green: Event received < 24 hours ago
-        # - Yellow: Event received < 7 days ago
-        # - Red: No events or > 7 days
-        
-        # Placeholder logic until WebhookEvent model is fully hooked up
-        last_sync = integration.status.last_sync_time if integration.status else None
-        
-        if not last_sync:
-             return {
-                "status": IntegrationStatusEnum.WARNING,
-                "status_text": "No Data Yet",
-                "error": None
+        snapshot = self.get_health_snapshot(db)
+        endpoint_ids = self._endpoint_ids_for(integration, snapshot["endpoints"])
+
+        if not endpoint_ids:
+            return {
+                "status": IntegrationStatusEnum.DISCONNECTED,
+                "status_text": "No Endpoint",
+                "error": "No webhook endpoint is linked to this integration"
+            }
+
+        metrics = self._combine([snapshot["stats"].get(endpoint_id) for endpoint_id in endpoint_ids])
+        ever_received = any(snapshot["endpoints"][endpoint_id]["total_received"] for endpoint_id in endpoint_ids)
+        last_success = metrics["last_success_at"]
+
+        if not last_success:
+            if not ever_received:
+                return {
+                    "status": IntegrationStatusEnum.WARNING,
+                    "status_text": "No Data Yet",
+                    "error": None,
+                    "metrics": metrics
+                }
+            if metrics["last_event_at"]:
+                return {
+                    "status": IntegrationStatusEnum.DISCONNECTED,
+                    "status_text": "Failing",
+                    "error": f"Every event received in the last {LOOKBACK_DAYS} days failed",
+                    "metrics": metrics
+                }
+            return {
+                "status": IntegrationStatusEnum.DISCONNECTED,
+                "status_text": "Inactive",
+                "error": f"No events received in {LOOKBACK_DAYS} days",
+                "metrics": metrics
             }
-            
-        time_since_last = datetime.now() - last_sync
-        
-        if time_since_last < timedelta(hours=24):
+
+        time_since_last = snapshot["computed_at"] - last_success
+
+        if time_since_last < timedelta(hours=WEBHOOK_HEALTH_WINDOW_HOURS):
+            if (metrics["events_in_window"] >= WEBHOOK_MIN_EVENTS_FOR_RATE
+                    and metrics["failure_rate"] > WEBHOOK_FAILURE_RATE_WARNING):
+                return {
+                    "status": IntegrationStatusEnum.WARNING,
+                    "status_text": f"High Failure Rate ({round(metrics['failure_rate'] * 100)}%)",
+                    "error": None,
+                    "metrics": metrics
+                }
             return {
                 "status": IntegrationStatusEnum.CONNECTED,
                 "status_text": "Active",
-                "error": None
+                "error": None,
+                "metrics": metrics
             }
-        elif time_since_last < timedelta(days=7):
-            return {
-                "status": IntegrationStatusEnum.WARNING,
-                "status_text": "Idle (No events in 24h)",
-                "error": None
+        return {
+            "status": IntegrationStatusEnum.WARNING,
+            "status_text": f"Idle (No events in {WEBHOOK_HEALTH_WINDOW_HOURS}h)",
+            "error": None,
+            "metrics": metrics
+        }
+
+    def get_endpoint_metrics(self, db: Session, endpoint_id: int) -> Dict[str, Any]:
+        """Cached health metrics for a single endpoint"""
+        return self._combine([self.get_health_snapshot(db)["stats"].get(endpoint_id)])
+
+    def get_health_snapshot(self, db: Session) -> Dict[str, Any]:
+        """
+        Returns aggregates for every endpoint, recomputed at most once per
+        cache period no matter how many integrations are checked in a sweep.
+        """
+        with self._lock:
+            if self._cache and time.monotonic() - self._cache["cached_at"] < self.cache_seconds:
+                return self._cache
+            self._cache = self._compute_snapshot(db)
+            return self._cache
+
+    def invalidate(self):
+        with self._lock:
+            self._cache = None
+
+    def _compute_snapshot(self, db: Session) -> Dict[str, Any]:
+        now = datetime.now()
+        window_start = now - timedelta(hours=WEBHOOK_HEALTH_WINDOW_HOURS)
+
+        endpoints = {
+            row.id: {"campaign_id": row.campaign_id, "total_received": row.total_received or 0}
+            for row in db.query(WebhookEndpoint.id, WebhookEndpoint.campaign_id, WebhookEndpoint.total_received)
+        }
+
+        rows = []
+        if endpoints:
+            # One grouped pass; the endpoint list turns the lookback filter into a
+            # range seek per endpoint on (endpoint_id, created_at)
+            rows = db.execute(self.aggregate_statement(list(endpoints), now, window_start)).all()
+
+        return {
+            "cached_at": time.monotonic(),
+            "computed_at": now,
+            "endpoints": endpoints,
+            "stats": {
+                row.endpoint_id: {
+                    "last_success_at": self._as_datetime(row.last_success_at),
+                    "last_event_at": self._as_datetime(row.last_event_at),
+                    "events_in_window": int(row.events_in_window or 0),
+                    "failures_in_window": int(row.failures_in_window or 0)
+                }
+                for row in rows
             }
+        }
+
+    def aggregate_statement(self, endpoint_ids: List[int], now: datetime, window_start: datetime):
+        """(endpoint_id, last_success_at, last_event_at, events_in_window, failures_in_window) per endpoint"""
+        in_window = WebhookEvent.created_at >= window_start
+        return select(
+            WebhookEvent.endpoint_id,
+            func.max(case((WebhookEvent.status == "success", WebhookEvent.created_at))).label("last_success_at"),
+            func.max(WebhookEvent.created_at).label("last_event_at"),
+            func.sum(case((in_window, 1), else_=0)).label("events_in_window"),
+            func.sum(case((in_window & (WebhookEvent.status == "failed"), 1), else_=0)).label("failures_in_window")
+        ).where(
+            WebhookEvent.endpoint_id.in_(endpoint_ids),
+            WebhookEvent.created_at >= now - timedelta(days=LOOKBACK_DAYS)
+        ).group_by(WebhookEvent.endpoint_id)
+
+    def _endpoint_ids_for(self, integration: Integration, endpoints: Dict[int, Dict[str, Any]]) -> List[int]:
+        config = integration.config or {}
+        if config.get("endpoint_ids"):
+            ids = [int(endpoint_id) for endpoint_id in config["endpoint_ids"]]
+        elif config.get("endpoint_id"):
+            ids = [int(config["endpoint_id"])]
         else:
-            return {
-                "status": IntegrationStatusEnum.DISCONNECTED,
-                "status_text": "Inactive",
-                "error": "No events received in 7 days"
-            }
+            ids = [
+                endpoint_id for endpoint_id, endpoint in endpoints.items()
+                if integration.campaign_id and endpoint["campaign_id"] == integration.campaign_id
+            ]
+        return [endpoint_id for endpoint_id in ids if endpoint_id in endpoints]
+
+    def _combine(self, stats: List[Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+        stats = [s for s in stats if s]
+        last_success = max((s["last_success_at"] for s in stats if s["last_success_at"]), default=None)
+        last_event = max((s["last_event_at"] for s in stats if s["last_event_at"]), default=None)
+        events = sum(s["events_in_window"] for s in stats)
+        failures = sum(s["failures_in_window"] for s in stats)
+        return {
+            "last_success_at": last_success,
+            "last_event_at": last_event,
+            "events_in_window": events,
+            "failures_in_window": failures,
+            "failure_rate": (failures / events) if events else 0.0,
+            "events_per_hour": round(events / WEBHOOK_HEALTH_WINDOW_HOURS, 2)
+        }
+
+    def _as_datetime(self, value) -> Optional[datetime]:
+        # SQLite returns aggregates over DateTime columns as strings
+        if value is None:
+            return None
+        if not isinstance(value, datetime):
+            value = datetime.fromisoformat(str(value))
+        if value.tzinfo is not None:
+            # Compare in naive local time, like the rest of the service
+            value = value.astimezone().replace(tzinfo=None)
+        return value
 
 webhook_service = WebhookService()
+cache_bus.subscribe("webhook_endpoint", lambda key: webhook_service.invalidate())
+cache_bus.subscribe("integration", lambda integration_id: webhook_service.invalidate())
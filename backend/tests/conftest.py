@@ -0,0 +1,37 @@
+import os
+import tempfile
+import pytest
+
+# Tests run against their own SQLite file (or TEST_DATABASE_URL), never the configured database,
+# since every test starts by dropping all tables
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL") or (
+    f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='campaign-tests-'), 'test.db')}"
+)
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ.pop("DATABASE_READ_URL", None)
+os.environ.setdefault("ENVIRONMENT", "test")
+
+from ..database import Base, SessionLocal, engine
+from ..rate_limit import webhook_rate_limiter
+from ..services.audit_log import audit_log
+from ..services.cache_bus import TOPICS, cache_bus
+from ..services.lead_analytics import lead_analytics_service
+
+
+@pytest.fixture
+def db():
+    """A session on freshly created, empty tables, with every in-process cache dropped"""
+    audit_log.flush()
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    for topic in TOPICS:
+        cache_bus.dispatch(topic)
+    lead_analytics_service.invalidate()
+    webhook_rate_limiter.keys.clear()
+    webhook_rate_limiter.ips.clear()
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
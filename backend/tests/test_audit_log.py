@@ -0,0 +1,21 @@
+from ..models import ActivityLog
+from ..services.audit_log import AuditLogWriter
+
+def test_entries_are_buffered_and_written_in_one_flush(db):
+    writer = AuditLogWriter(flush_size=3)
+
+    writer.log_activity("create", "audit_test", 1)
+    writer.log_activity("update", "audit_test", 1, {"fields": ["name"]})
+    assert writer.pending() == 2
+    assert db.query(ActivityLog).count() == 0
+
+    # Without a flusher thread, reaching flush_size writes inline
+    writer.log_activity("delete", "audit_test", 1)
+    assert writer.pending() == 0
+    rows = db.query(ActivityLog).order_by(ActivityLog.id).all()
+    assert [row.action for row in rows] == ["create", "update", "delete"]
+    assert rows[-1].resource_id == "1" and rows[-1].created_at is not None
+
+    writer.log_activity("create", "audit_test", 2)
+    writer.stop()
+    assert writer.pending() == 0
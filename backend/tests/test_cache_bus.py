@@ -0,0 +1,31 @@
+from ..services.cache_bus import CacheBus, cache_bus
+
+def test_publish_dispatches_after_commit_only(db):
+    cache_bus._ensure_topics()
+    received = []
+    cache_bus.subscribe("public_link", received.append)
+
+    try:
+        cache_bus.publish(db, "public_link", "rolled-back")
+        db.rollback()
+        cache_bus.publish(db, "public_link", "committed")
+        assert received == []
+        db.commit()
+    finally:
+        cache_bus._subscribers["public_link"].remove(received.append)
+
+    assert received == ["committed"]
+
+def test_other_workers_see_version_changes(db):
+    cache_bus._ensure_topics()
+    other_worker = CacheBus()
+    received = []
+    other_worker.subscribe("automation", received.append)
+    other_worker._poll_versions()
+
+    cache_bus.publish(db, "automation", 7)
+    db.commit()
+    other_worker._poll_versions()
+
+    # Polling can't tell which key changed, so the whole topic is dropped
+    assert received == [None]
@@ -0,0 +1,24 @@
+from ..models import Campaign, CampaignDataChange
+from ..services.data_version import (
+    bump_data_version, bump_data_versions, compact_data_versions, get_data_version, get_data_versions
+)
+
+def test_versions_count_bumps_and_survive_compaction(db):
+    first, second = Campaign(name="First"), Campaign(name="Second")
+    db.add_all([first, second])
+    db.commit()
+    assert get_data_version(db, first.id) == 0
+
+    bump_data_version(db, first.id)
+    bump_data_versions(db, [first.id, second.id])
+    bump_data_version(db, first.id)
+    db.commit()
+    assert get_data_versions(db) == {first.id: 3, second.id: 1}
+
+    assert compact_data_versions(db) == 2
+    assert db.query(CampaignDataChange).count() == 2
+    assert get_data_versions(db) == {first.id: 3, second.id: 1}
+    bump_data_version(db, first.id)
+    db.commit()
+    assert get_data_version(db, first.id) == 4
+    assert get_data_version(db, 999) is None
@@ -0,0 +1,98 @@
+import gzip
+import json
+import os
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import pytest
+from ..models import WebhookEndpoint, WebhookEvent
+from ..services.event_retention import WebhookEventRetention, main
+
+def _endpoint(db):
+    endpoint = WebhookEndpoint(key="retention", secret="s", name="Retention")
+    db.add(endpoint)
+    db.commit()
+    return endpoint
+
+def _archived(archive_dir):
+    records = []
+    for name in sorted(os.listdir(archive_dir)):
+        with gzip.open(os.path.join(archive_dir, name), "rt", encoding="utf-8") as f:
+            records.extend((name, json.loads(line)) for line in f)
+    return records
+
+def test_expired_events_are_archived_then_deleted_in_batches(db, tmp_path):
+    endpoint = _endpoint(db)
+    old = datetime.now() - timedelta(days=60)
+    older = old - timedelta(days=31)
+    for created_at in [older] * 2 + [old] * 3:
+        db.add(WebhookEvent(endpoint_id=endpoint.id, payload={"n": 1}, status="success", created_at=created_at))
+    db.add(WebhookEvent(endpoint_id=endpoint.id, payload={"n": 2}, status="success"))
+    db.commit()
+
+    class Job:
+        advanced = []
+        def advance(self, count):
+            self.advanced.append(count)
+
+    job = Job()
+    retention = WebhookEventRetention(retention_days=30, archive_dir=str(tmp_path), batch_size=2)
+    result = retention.run_once(job)
+
+    assert result == {"mode": "batched", "deleted": 5, "archived": 5}
+    # Two full batches and the remainder
+    assert job.advanced == [2, 2, 1]
+    assert [event.payload for event in db.query(WebhookEvent)] == [{"n": 2}]
+
+    archived = _archived(str(tmp_path))
+    assert len(archived) == 5
+    months = {name for name, _ in archived}
+    assert months == {f"webhook_events_{older:%Y-%m}.jsonl.gz", f"webhook_events_{old:%Y-%m}.jsonl.gz"}
+
+    # Nothing left to expire
+    assert retention.run_once()["deleted"] == 0
+
+def test_events_stay_when_archiving_fails(db, tmp_path, monkeypatch):
+    endpoint = _endpoint(db)
+    db.add(WebhookEvent(endpoint_id=endpoint.id, payload={}, status="failed",
+                        created_at=datetime.now() - timedelta(days=60)))
+    db.commit()
+
+    retention = WebhookEventRetention(retention_days=30, archive_dir=str(tmp_path))
+
+    def fail(month, records):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(retention, "_write_archive", fail)
+    with pytest.raises(OSError):
+        retention.run_once()
+    assert db.query(WebhookEvent).count() == 1
+
+def test_main_purges_with_the_given_window(db, tmp_path, monkeypatch):
+    # The default archive directory is relative
+    monkeypatch.chdir(tmp_path)
+    endpoint = _endpoint(db)
+    db.add(WebhookEvent(endpoint_id=endpoint.id, payload={}, status="success",
+                        created_at=datetime.now() - timedelta(days=10)))
+    db.commit()
+
+    assert main(["--days", "30"]) == 0
+    assert db.query(WebhookEvent).count() == 1
+    assert main(["--days", "7", "--batch-size", "10"]) == 0
+    assert db.query(WebhookEvent).count() == 0
+    assert len(_archived(str(tmp_path / "archives" / "webhook_events"))) == 1
+
+def test_run_is_skipped_while_another_worker_holds_the_lock(db, tmp_path, monkeypatch):
+    endpoint = _endpoint(db)
+    db.add(WebhookEvent(endpoint_id=endpoint.id, payload={}, status="success",
+                        created_at=datetime.now() - timedelta(days=60)))
+    db.commit()
+
+    @contextmanager
+    def held_elsewhere():
+        yield False
+
+    retention = WebhookEventRetention(retention_days=30, archive_dir=str(tmp_path))
+    monkeypatch.setattr(retention, "_exclusive", held_elsewhere)
+    assert retention.run_once() == {"mode": "skipped"}
+    assert db.query(WebhookEvent).count() == 1
+    assert not os.listdir(tmp_path)
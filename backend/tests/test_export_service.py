@@ -0,0 +1,43 @@
+import os
+import pytest
+from ..models import Campaign, Lead
+from ..services import export_service as export_module
+from ..services.export_service import ExportService
+
+def test_build_writes_artifacts_and_failed_builds_leave_no_temp_files(db, tmp_path, monkeypatch):
+    campaign = Campaign(name="Exports")
+    db.add(campaign)
+    db.commit()
+    db.add_all([Lead(campaign_id=campaign.id, email=f"e{i}@example.com", status="new") for i in range(3)])
+    db.commit()
+
+    service = ExportService(export_dir=str(tmp_path), batch_size=2)
+    manifest = service.build(campaign.id)
+    assert manifest["rows"] == 3
+    campaign_dir = tmp_path / str(campaign.id)
+    assert service.read_manifest(campaign.id) == manifest
+    assert not [name for name in os.listdir(campaign_dir) if name.endswith(".tmp")]
+
+    def fail(db, campaign_id):
+        raise RuntimeError("database went away")
+    monkeypatch.setattr(export_module, "get_data_version", fail)
+    with pytest.raises(RuntimeError):
+        service.build(campaign.id)
+    # The previous artifacts stay in place and the failed build's temp files are gone
+    assert service.read_manifest(campaign.id) == manifest
+    assert not [name for name in os.listdir(campaign_dir) if name.endswith(".tmp")]
+
+def test_export_status_treats_newer_builds_as_fresh(db, monkeypatch):
+    from ..routes.exports import get_export_status
+    campaign = Campaign(name="Status")
+    db.add(campaign)
+    db.commit()
+
+    service = export_module.export_service
+    monkeypatch.setattr(service, "read_manifest", lambda campaign_id: {
+        "data_version": 10 ** 6, "built_at": None, "rows": 0, "formats": {}
+    })
+    # A build from data newer than this session saw (e.g. on a lagging replica) is still fresh
+    assert get_export_status(campaign.id, db)["is_fresh"] is True
+    monkeypatch.setattr(service, "read_manifest", lambda campaign_id: None)
+    assert get_export_status(campaign.id, db)["is_fresh"] is False
@@ -0,0 +1,61 @@
+import asyncio
+from datetime import datetime, timedelta
+from ..models import Integration, IntegrationStatus, IntegrationStatusEnum
+from ..services import integration_monitor
+from ..services.integration_monitor import (
+    CHECK_INTERVALS, JITTER_RATIO, MAX_BACKOFF_SECONDS, IntegrationMonitor
+)
+
+def test_backoff_doubles_and_stays_capped_after_jitter(monkeypatch):
+    monitor = IntegrationMonitor(concurrency=1)
+    monkeypatch.setattr(integration_monitor.random, "uniform", lambda low, high: high)
+
+    healthy = monitor._next_check_delay("smtp", 0)
+    assert healthy == CHECK_INTERVALS["smtp"] * (1 + JITTER_RATIO)
+    assert monitor._next_check_delay("meta", 2) == 2 * monitor._next_check_delay("meta", 1)
+    assert monitor._next_check_delay("meta", 50) == MAX_BACKOFF_SECONDS
+    assert monitor._next_check_delay("unknown", 0) == integration_monitor.DEFAULT_CHECK_INTERVAL * (1 + JITTER_RATIO)
+
+def test_only_due_integrations_are_checked_and_rescheduled(db):
+    due = Integration(type="webhook", name="Due", config={})
+    never_checked = Integration(type="webhook", name="New", config={})
+    not_due = Integration(type="webhook", name="Later", config={})
+    db.add_all([due, never_checked, not_due])
+    db.commit()
+    later = datetime.now() + timedelta(hours=1)
+    db.add_all([
+        IntegrationStatus(integration_id=due.id, error_count=2,
+                          next_sync_time=datetime.now() - timedelta(minutes=1)),
+        IntegrationStatus(integration_id=not_due.id, error_count=0, next_sync_time=later),
+    ])
+    db.commit()
+
+    started = datetime.now()
+    assert asyncio.run(IntegrationMonitor(concurrency=2).check_due_integrations()) == 2
+
+    db.expire_all()
+    statuses = {status.integration_id: status for status in db.query(IntegrationStatus)}
+    # No endpoint is linked, so both checks fail and back off from their error counts
+    assert statuses[due.id].status == IntegrationStatusEnum.DISCONNECTED
+    assert statuses[due.id].error_count == 3
+    assert statuses[never_checked.id].error_count == 1
+    for integration_id, errors in ((due.id, 3), (never_checked.id, 1)):
+        delay = (statuses[integration_id].next_sync_time - started).total_seconds()
+        base = CHECK_INTERVALS["webhook"] * 2 ** (errors - 1)
+        assert base * (1 - JITTER_RATIO) - 1 <= delay <= min(base * (1 + JITTER_RATIO), MAX_BACKOFF_SECONDS) + 1
+    assert statuses[not_due.id].next_sync_time == later
+    assert statuses[not_due.id].error_count == 0
+
+def test_due_integrations_are_claimed_by_one_sweep(db):
+    integration = Integration(type="webhook", name="Claimed", config={})
+    db.add(integration)
+    db.commit()
+
+    first, second = IntegrationMonitor(concurrency=1), IntegrationMonitor(concurrency=1)
+    assert [i.id for i in first._load_integrations(True)] == [integration.id]
+    # Another worker's sweep skips it until the first one saves its result
+    assert second._load_integrations(True) == []
+    status = db.query(IntegrationStatus).filter(IntegrationStatus.integration_id == integration.id).one()
+    assert status.next_sync_time > datetime.now() + timedelta(
+        seconds=integration_monitor.MONITOR_CLAIM_SECONDS - 60
+    )
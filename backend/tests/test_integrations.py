@@ -0,0 +1,37 @@
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from ..main import app
+from ..models import Integration
+from ..routes import integrations
+from ..services.audit_log import audit_log
+
+client = TestClient(app)
+
+def test_status_poll_gets_304_until_something_changes(db):
+    db.add(Integration(type="meta", name="Lead Ads", config={}))
+    db.commit()
+
+    first = client.get("/api/integrations/status")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    unchanged = client.get("/api/integrations/status", headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304
+    assert unchanged.headers["etag"] == etag
+
+    audit_log.log_sync(first.json()[0]["id"], "success", "Synced 0 new leads")
+    audit_log.flush()
+    changed = client.get("/api/integrations/status", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()[0]["recent_sync"]["runs_24h"] == 1
+
+def test_status_etag_moves_with_the_run_count_window(db):
+    now = datetime(2026, 10, 19, 14, 30)
+    same_hour = integrations._status_window_start(now + timedelta(minutes=20))
+    next_hour = integrations._status_window_start(now + timedelta(minutes=40))
+    assert same_hour == datetime(2026, 10, 18, 14, 0)
+
+    etag = integrations._status_etag(db, integrations._status_window_start(now))
+    assert integrations._status_etag(db, same_hour) == etag
+    # A run can leave the window without any row changing
+    assert integrations._status_etag(db, next_hour) != etag
@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from ..main import app
+from ..models import Campaign, Lead
+from ..query_inspector import query_budget
+from ..schemas import LeadStatusBulkUpdate
+from ..services.lead_analytics import LeadAnalyticsService
+from ..services.lead_status import LeadStatusService
+
+client = TestClient(app)
+
+def test_funnel_counts_reached_statuses_per_weekly_cohort_and_is_cached(db):
+    campaign = Campaign(name="Funnel")
+    db.add(campaign)
+    db.commit()
+    now = datetime.now()
+    leads = [Lead(campaign_id=campaign.id, email=f"f{i}@example.com", status="new", created_at=now) for i in range(4)]
+    leads.append(Lead(campaign_id=campaign.id, email="old@example.com", status="new", created_at=now - timedelta(weeks=1)))
+    db.add_all(leads)
+    db.commit()
+
+    campaign_id = campaign.id
+    service = LeadStatusService()
+    service.bulk_update(db, LeadStatusBulkUpdate(status="contacted", lead_ids=[lead.id for lead in leads[:2]]))
+    service.bulk_update(db, LeadStatusBulkUpdate(status="qualified", lead_ids=[leads[0].id]))
+
+    response = client.get(f"/api/campaigns/{campaign_id}/funnel?weeks=2")
+    assert response.status_code == 200
+    funnel = response.json()
+    assert funnel["statuses"] == ["contacted", "new", "qualified"]
+    previous, current = funnel["cohorts"]
+    assert previous["leads"] == 1 and previous["statuses"] == {
+        "new": {"leads": 1, "share": 1.0, "avg_hours_to_reach": 0.0}
+    }
+    assert current["leads"] == 4
+    # Leads that moved on still count as having reached their creation status, at creation
+    assert current["statuses"]["new"] == {"leads": 4, "share": 1.0, "avg_hours_to_reach": 0.0}
+    # and the statuses they passed through
+    assert current["statuses"]["contacted"]["leads"] == 2
+    assert current["statuses"]["contacted"]["share"] == 0.5
+    assert current["statuses"]["qualified"]["leads"] == 1
+    assert current["statuses"]["contacted"]["avg_hours_to_reach"] is not None
+
+    # Campaign check plus the data version lookup
+    with query_budget(2):
+        assert client.get(f"/api/campaigns/{campaign_id}/funnel?weeks=2").json() == funnel
+
+def test_cached_funnel_rolls_over_with_the_week(db):
+    campaign = Campaign(name="Rollover")
+    db.add(campaign)
+    db.commit()
+    service = LeadAnalyticsService()
+    this_week = service.get_funnel(db, campaign.id, weeks=1)
+
+    next_monday = service.window_start(1) + timedelta(weeks=1)
+    service.window_start = lambda weeks, now=None: next_monday
+    assert service.get_funnel(db, campaign.id, weeks=1)["since"] == next_monday.date().isoformat() != this_week["since"]
@@ -0,0 +1,48 @@
+from ..models import Automation, Campaign, Lead
+from ..services.lead_import import LeadImportService
+
+def test_import_maps_columns_and_dedups_by_email(tmp_path, db):
+    campaign = Campaign(name="Import")
+    db.add(campaign)
+    db.commit()
+    db.add(Lead(campaign_id=campaign.id, email="existing@example.com", source="manual"))
+    db.commit()
+
+    path = tmp_path / "leads.csv"
+    path.write_text(
+        "\ufeffE-mail Address,Name,Mobile\n"
+        "a@example.com,Ann,111\n"
+        "EXISTING@example.com,Old,222\n"
+        "a@example.com,Ann again,333\n"
+        ",,\n"
+        "b@example.com,Bob,444\n",
+        encoding="utf-8"
+    )
+
+    service = LeadImportService(chunk_size=2)
+    stats = service.run(None, str(path), campaign.id, field_mapping={"E-mail Address": "email", "Mobile": "phone"},
+                        dedup="email", delete_file=False)
+
+    assert stats == {"imported": 2, "duplicates": 2, "skipped": 1}
+    leads = db.query(Lead).filter(Lead.campaign_id == campaign.id, Lead.source == "import").order_by(Lead.id).all()
+    assert [(lead.email, lead.phone) for lead in leads] == [("a@example.com", "111"), ("b@example.com", "444")]
+    assert leads[0].data["Name"] == "Ann"
+
+def test_import_runs_new_lead_automations_per_chunk(tmp_path, db):
+    campaign = Campaign(name="Import")
+    db.add(campaign)
+    db.commit()
+    db.add(Automation(
+        campaign_id=campaign.id, name="Tag", trigger_type="new_lead",
+        trigger_config={"conditions": [{"field": "email", "operator": "contains", "value": "vip"}]},
+        actions=[{"type": "update_lead", "updates": {"full_name": "VIP"}}]
+    ))
+    db.commit()
+
+    path = tmp_path / "leads.csv"
+    path.write_text("email\nvip1@example.com\nplain@example.com\nvip2@example.com\n", encoding="utf-8")
+
+    LeadImportService(chunk_size=2).run(None, str(path), campaign.id, trigger_automations=True, delete_file=False)
+
+    leads = db.query(Lead).filter(Lead.campaign_id == campaign.id).order_by(Lead.id).all()
+    assert [lead.full_name for lead in leads] == ["VIP", None, "VIP"]
@@ -0,0 +1,102 @@
+import asyncio
+from datetime import datetime, timedelta
+from ..models import Automation, Campaign, Lead, LeadArchive, LeadStatusChange
+from ..schemas import LeadStatusBulkUpdate
+from ..services.config_cache import automation_cache
+from ..services.lead_status import LeadStatusService
+from ..services.lead_tiering import LeadTieringService
+
+def test_bulk_status_update_records_changes_and_runs_automations_in_batch(db):
+    campaign = Campaign(name="Bulk status")
+    db.add(campaign)
+    db.commit()
+    db.add_all([Lead(campaign_id=campaign.id, email=f"s{i}@example.com", status="new") for i in range(4)])
+    db.add(Lead(campaign_id=campaign.id, email="done@example.com", status="contacted"))
+    db.add(Automation(
+        campaign_id=campaign.id, name="Qualify", trigger_type="status_change",
+        trigger_config={"from_status": "new", "to_status": "contacted"},
+        actions=[{"type": "update_lead", "updates": {"source": "sales"}}]
+    ))
+    db.commit()
+    automation_cache.invalidate()
+
+    service = LeadStatusService()
+    result = service.bulk_update(db, LeadStatusBulkUpdate(status="contacted", campaign_id=campaign.id))
+    assert result["updated"] == 4
+
+    changes = db.query(LeadStatusChange).filter(LeadStatusChange.batch_id == result["batch_id"]).all()
+    assert {(c.from_status, c.to_status) for c in changes} == {("new", "contacted")}
+    assert len(changes) == 4
+
+    stats = service.run_automations(None, result["batch_id"])
+    assert stats == {"leads": 4, "actions": 4}
+    leads = db.query(Lead).filter(Lead.campaign_id == campaign.id).order_by(Lead.id).all()
+    assert [lead.status for lead in leads] == ["contacted"] * 5
+    assert [lead.source for lead in leads] == ["sales"] * 4 + [None]
+
+def test_automation_status_updates_are_recorded(db):
+    campaign = Campaign(name="Automated status")
+    db.add(campaign)
+    db.commit()
+    db.add_all([Lead(campaign_id=campaign.id, email=f"a{i}@example.com", status="new") for i in range(3)])
+    db.add(Lead(campaign_id=campaign.id, email="won@example.com", status="won"))
+    db.add(Automation(
+        campaign_id=campaign.id, name="Auto-win", trigger_type="new_lead",
+        actions=[{"type": "update_lead", "updates": {"status": "won"}}]
+    ))
+    db.commit()
+    automation_cache.invalidate()
+
+    from ..services.automation_engine import automation_engine
+    leads = db.query(Lead).filter(Lead.campaign_id == campaign.id).all()
+    assert asyncio.run(automation_engine.evaluate_new_leads(db, leads)) == 4
+
+    changes = db.query(LeadStatusChange).filter(LeadStatusChange.campaign_id == campaign.id).all()
+    # The lead that was already won has no change to record
+    assert sorted((c.from_status, c.to_status) for c in changes) == [("new", "won")] * 3
+    db.expire_all()
+    assert {lead.status for lead in db.query(Lead).filter(Lead.campaign_id == campaign.id)} == {"won"}
+
+def test_failed_automation_update_keeps_no_status_changes(db):
+    campaign = Campaign(name="Failing automation")
+    db.add(campaign)
+    db.commit()
+    db.add_all([Lead(campaign_id=campaign.id, email=f"f{i}@example.com", status="new") for i in range(2)])
+    db.add(Automation(
+        campaign_id=campaign.id, name="Broken", trigger_type="new_lead",
+        actions=[{"type": "update_lead", "updates": {"status": "won", "created_at": "not a date"}}]
+    ))
+    db.commit()
+    automation_cache.invalidate()
+
+    from ..services.automation_engine import automation_engine
+    leads = db.query(Lead).filter(Lead.campaign_id == campaign.id).all()
+    assert asyncio.run(automation_engine.evaluate_new_leads(db, leads)) == 0
+
+    # The batch's savepoint was rolled back, so nothing is left to commit
+    db.commit()
+    assert db.query(LeadStatusChange).filter(LeadStatusChange.campaign_id == campaign.id).count() == 0
+    db.expire_all()
+    assert {lead.status for lead in db.query(Lead).filter(Lead.campaign_id == campaign.id)} == {"new"}
+
+def test_bulk_status_update_reports_archived_and_unknown_ids(db):
+    campaign = Campaign(name="Partly archived")
+    db.add(campaign)
+    db.commit()
+    old = Lead(campaign_id=campaign.id, email="old@example.com", status="new",
+               created_at=datetime.now() - timedelta(days=400))
+    recent = Lead(campaign_id=campaign.id, email="recent@example.com", status="new")
+    db.add_all([old, recent])
+    db.commit()
+    old_id, recent_id = old.id, recent.id
+    assert LeadTieringService(archive_after_days=365, campaign_statuses=[]).run_once() == {"archived": 1}
+
+    result = LeadStatusService().bulk_update(
+        db, LeadStatusBulkUpdate(status="contacted", lead_ids=[recent_id, old_id, 999])
+    )
+    assert result["updated"] == 1
+    assert result["archived"] == [old_id]
+    assert result["not_found"] == [999]
+    db.expire_all()
+    assert db.get(LeadArchive, old_id).status == "new"
+    assert db.get(Lead, recent_id).status == "contacted"
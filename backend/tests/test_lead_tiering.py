@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+from ..models import Campaign, Lead, LeadArchive
+from ..routes.campaign_detail import get_campaign_leads, get_campaign_stats
+from ..services.lead_tiering import LeadTieringService
+
+def test_archived_leads_keep_totals_and_stay_listed(db):
+    campaign = Campaign(name="Tiering")
+    other = Campaign(name="Other")
+    db.add_all([campaign, other])
+    db.commit()
+    old = datetime.now() - timedelta(days=400)
+    db.add(Lead(campaign_id=other.id, email="other@example.com", status="new", created_at=old))
+    db.add_all([
+        Lead(campaign_id=campaign.id, email=f"old{i}@example.com", status="contacted", created_at=old)
+        for i in range(3)
+    ])
+    db.add(Lead(campaign_id=campaign.id, email="recent@example.com", status="new"))
+    db.commit()
+    before = get_campaign_stats(campaign.id, db)["stats"]
+
+    result = LeadTieringService(archive_after_days=365, campaign_statuses=[], batch_size=2).run_once()
+    assert result == {"archived": 4}
+    assert db.query(Lead).filter(Lead.campaign_id == campaign.id).count() == 1
+    assert db.query(LeadArchive).filter(LeadArchive.campaign_id == campaign.id).count() == 3
+    assert db.query(LeadArchive).filter(LeadArchive.campaign_id == other.id).count() == 1
+
+    assert get_campaign_stats(campaign.id, db)["stats"] == before
+    page = get_campaign_leads(campaign.id, db=db)
+    assert b'"total":4' in page.body
+
+def test_archived_lead_ids_are_not_reused(db):
+    campaign = Campaign(name="Reuse")
+    db.add(campaign)
+    db.commit()
+    old = datetime.now() - timedelta(days=400)
+    db.add_all([Lead(campaign_id=campaign.id, email=f"old{i}@example.com", created_at=old) for i in range(3)])
+    db.commit()
+
+    service = LeadTieringService(archive_after_days=365, campaign_statuses=[])
+    assert service.run_once() == {"archived": 3}
+    archived_ids = {lead.id for lead in db.query(LeadArchive)}
+
+    fresh = Lead(campaign_id=campaign.id, email="fresh@example.com")
+    db.add(fresh)
+    db.commit()
+    assert fresh.id > max(archived_ids)
+
+    # Age the new lead too: a reused id would collide with the archive's primary key
+    fresh.created_at = old
+    db.commit()
+    assert service.run_once() == {"archived": 1}
+    assert db.query(LeadArchive).count() == 4
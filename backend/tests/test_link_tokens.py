@@ -0,0 +1,28 @@
+import pytest
+from datetime import datetime, timedelta
+from ..services.link_token_service import LinkTokenService
+
+LINK = {"uuid": "link-1", "password_hash": "$2b$12$hash", "expires_at": None}
+
+def test_token_round_trip():
+    service = LinkTokenService(secret_key="test-secret")
+    token = service.issue(LINK)["access_token"]
+    assert service.verify(token, LINK)
+
+def test_token_bound_to_link_and_password():
+    service = LinkTokenService(secret_key="test-secret")
+    token = service.issue(LINK)["access_token"]
+    assert not service.verify(token, {**LINK, "uuid": "link-2"})
+    assert not service.verify(token, {**LINK, "password_hash": "$2b$12$other"})
+    assert not LinkTokenService(secret_key="other-secret").verify(token, LINK)
+
+def test_token_never_outlives_link():
+    service = LinkTokenService(secret_key="test-secret")
+    expired_link = {**LINK, "expires_at": datetime.now() - timedelta(minutes=1)}
+    token = service.issue(expired_link)["access_token"]
+    assert not service.verify(token, expired_link)
+
+def test_secret_key_required_outside_development():
+    with pytest.raises(RuntimeError):
+        LinkTokenService(secret_key=None, environment="production")
+    assert LinkTokenService(secret_key=None, environment="development").secret_key
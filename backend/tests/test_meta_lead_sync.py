@@ -0,0 +1,122 @@
+import asyncio
+import json
+import httpx
+from ..models import Campaign, Integration, Lead, SyncLog
+from ..services.audit_log import audit_log
+from ..services.meta_lead_sync import MetaLeadSync
+from ..services.meta_service import MetaService
+
+class LeadFormStandIn:
+    """Local stand-in for GET /{form_id}/leads with cursor paging and time filtering"""
+
+    def __init__(self, leads, page_size=2):
+        self.leads = leads
+        self.page_size = page_size
+        self.requests = 0
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        params = request.url.params
+        leads = self.leads
+        if "filtering" in params:
+            after = json.loads(params["filtering"])[0]["value"]
+            leads = [lead for lead in leads if lead["_ts"] > after]
+
+        offset = int(params.get("after", 0))
+        page = leads[offset:offset + self.page_size]
+        body = {"data": [{k: v for k, v in lead.items() if k != "_ts"} for lead in page]}
+        if offset + self.page_size < len(leads):
+            next_url = request.url.copy_set_param("after", str(offset + self.page_size))
+            body["paging"] = {"cursors": {"after": str(offset + self.page_size)}, "next": str(next_url)}
+        return httpx.Response(200, json=body)
+
+def _meta_lead(lead_id, ts):
+    from datetime import datetime, timezone
+    return {
+        "id": str(lead_id),
+        "_ts": ts,
+        "created_time": datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S+0000"),
+        "field_data": [
+            {"name": "email", "values": [f"lead{lead_id}@example.com"]},
+            {"name": "full_name", "values": [f"Lead {lead_id}"]}
+        ]
+    }
+
+def test_incremental_sync_pages_and_deduplicates(db):
+    campaign = Campaign(name="Meta sync")
+    db.add(campaign)
+    db.commit()
+    integration = Integration(
+        campaign_id=campaign.id, type="meta", name="Lead Ads",
+        config={"access_token": "token", "form_ids": ["form-1"]}
+    )
+    db.add(integration)
+    db.commit()
+
+    stand_in = LeadFormStandIn([_meta_lead(i, 1700000000 + i) for i in range(1, 6)])
+    service = MetaService(base_url="http://graph.test/v18.0", transport=httpx.MockTransport(stand_in))
+    sync = MetaLeadSync(service=service, chunk_size=2)
+
+    first = asyncio.run(sync.sync_integration(integration.id))
+    assert first["inserted"] == 5
+    assert stand_in.requests == 3
+
+    stand_in.leads.append(_meta_lead(6, 1700000006))
+    second = asyncio.run(sync.sync_integration(integration.id))
+    assert second["inserted"] == 1
+    # The lead at the previous high-water mark is re-read but not duplicated
+    assert second["skipped"] == 1
+
+    leads = db.query(Lead).filter(Lead.campaign_id == campaign.id).all()
+    assert sorted(lead.external_id for lead in leads) == [str(i) for i in range(1, 7)]
+    assert all(lead.source == "meta" and lead.email for lead in leads)
+    audit_log.flush()
+    assert db.query(SyncLog).filter(SyncLog.integration_id == integration.id).count() == 2
+
+def test_one_sync_per_integration_at_a_time(db):
+    campaign = Campaign(name="Meta sync")
+    db.add(campaign)
+    db.commit()
+    integration = Integration(
+        campaign_id=campaign.id, type="meta", name="Lead Ads",
+        config={"access_token": "token", "form_ids": ["form-1"]}
+    )
+    db.add(integration)
+    db.commit()
+
+    stand_in = LeadFormStandIn([_meta_lead(i, 1700000000 + i) for i in range(1, 4)])
+    service = MetaService(base_url="http://graph.test/v18.0", transport=httpx.MockTransport(stand_in))
+    sync = MetaLeadSync(service=service)
+
+    async def overlap():
+        task = sync.start_sync(integration.id)
+        assert sync.is_running(integration.id)
+        try:
+            await sync.sync_integration(integration.id)
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("second sync was allowed to start")
+        return await task
+
+    assert asyncio.run(overlap())["inserted"] == 3
+    assert not sync.is_running(integration.id)
+    assert db.query(Lead).filter(Lead.campaign_id == campaign.id).count() == 3
+
+def test_insert_skips_leads_stored_since_the_lookup(db):
+    campaign = Campaign(name="Meta sync")
+    db.add(campaign)
+    db.commit()
+    db.add(Lead(campaign_id=campaign.id, source="meta", external_id="1"))
+    db.commit()
+
+    sync = MetaLeadSync()
+    rows = [
+        {"campaign_id": campaign.id, "source": "meta", "external_id": external_id, "status": "new"}
+        for external_id in ("1", "2")
+    ]
+    inserted = db.execute(sync._insert_new_leads(db), rows).all()
+    db.commit()
+
+    assert len(inserted) == 1
+    assert db.query(Lead).filter(Lead.external_id == "1").count() == 1
@@ -0,0 +1,85 @@
+import asyncio
+import json
+from urllib.parse import parse_qs, urlparse
+import httpx
+from ..models import Integration, IntegrationStatusEnum
+from ..services.meta_service import MetaService
+
+VALID_TOKENS = {"good-1", "good+/2"}
+APP_TOKEN = "app-id|app-secret"
+
+class GraphStandIn:
+    """Local stand-in for the Graph API /me and batch endpoints"""
+
+    def __init__(self):
+        self.requests = 0
+
+    def me(self, token):
+        if token in VALID_TOKENS:
+            return 200, json.dumps({"id": "1", "name": "Page"})
+        return 400, json.dumps({"error": {"type": "OAuthException", "code": 190}})
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        if request.method == "GET":
+            code, body = self.me(request.url.params.get("access_token"))
+            return httpx.Response(code, text=body)
+
+        form = parse_qs(request.content.decode())
+        # Graph authenticates the batch request itself with the top-level token
+        if form["access_token"][0] not in VALID_TOKENS | {APP_TOKEN}:
+            code, body = self.me(form["access_token"][0])
+            return httpx.Response(code, text=body)
+        batch = json.loads(form["batch"][0])
+        results = []
+        for operation in batch:
+            token = parse_qs(urlparse(operation["relative_url"]).query)["access_token"][0]
+            code, body = self.me(token)
+            results.append({"code": code, "body": body})
+        return httpx.Response(200, json=results)
+
+def _integration(id, token=None):
+    return Integration(id=id, type="meta", name=f"meta-{id}", config={"access_token": token} if token else {})
+
+def test_batch_check_uses_one_round_trip_per_chunk():
+    graph = GraphStandIn()
+    service = MetaService(base_url="http://graph.test/v18.0", transport=httpx.MockTransport(graph),
+                          app_access_token=APP_TOKEN)
+    service.BATCH_SIZE = 2
+    # The expired token comes first, where it used to authenticate the whole batch
+    integrations = [_integration(1, "bad"), _integration(2, "good-1"), _integration(3, "good+/2"), _integration(4)]
+
+    results = asyncio.run(service.check_connection_statuses(integrations))
+
+    assert graph.requests == 2
+    assert results[1]["status_text"] == "Token Expired"
+    assert results[2]["status"] == IntegrationStatusEnum.CONNECTED
+    # Tokens are URL-encoded inside relative_url
+    assert results[3]["status"] == IntegrationStatusEnum.CONNECTED
+    assert results[4]["status"] == IntegrationStatusEnum.DISCONNECTED
+
+def test_without_app_token_each_token_is_checked_on_its_own():
+    graph = GraphStandIn()
+    service = MetaService(base_url="http://graph.test/v18.0", transport=httpx.MockTransport(graph),
+                          app_access_token=None)
+    results = asyncio.run(service.check_connection_statuses([_integration(1, "bad"), _integration(2, "good-1")]))
+
+    assert graph.requests == 2
+    assert results[1]["status_text"] == "Token Expired"
+    assert results[2]["status"] == IntegrationStatusEnum.CONNECTED
+
+def test_single_check_reuses_client():
+    graph = GraphStandIn()
+    service = MetaService(base_url="http://graph.test/v18.0", transport=httpx.MockTransport(graph))
+
+    async def run():
+        first = await service.check_connection_status(_integration(1, "good-1"))
+        client = service.get_client()
+        second = await service.check_connection_status(_integration(2, "bad"))
+        assert service.get_client() is client
+        await service.close()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first["status"] == IntegrationStatusEnum.CONNECTED
+    assert second["status_text"] == "Token Expired"
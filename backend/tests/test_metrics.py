@@ -0,0 +1,23 @@
+from fastapi.testclient import TestClient
+from ..main import app
+from ..metrics import MetricsRegistry
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    latency.observe(0.05, route="/a")
+    latency.observe(0.5, route="/a")
+    latency.observe(5, route="/a")
+
+    lines = registry.render().splitlines()
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/a",le="1.0"} 2' in lines
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'latency_seconds_count{route="/a"} 3' in lines
+
+def test_metrics_endpoint_labels_requests_by_route_template():
+    client = TestClient(app)
+    client.get("/api/jobs/does-not-exist")
+    body = client.get("/metrics").text
+    assert 'http_requests_total{method="GET",route="/api/jobs/{job_id}",status="404"}' in body
+    assert "# TYPE http_request_db_statements histogram" in body
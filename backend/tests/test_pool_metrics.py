@@ -0,0 +1,49 @@
+import pytest
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.pool import QueuePool
+from ..metrics import registry
+from ..pool_metrics import PoolMetrics, instrumented_pool_class, track_connection_hold
+
+def _engine(tmp_path, metrics):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=instrumented_pool_class(QueuePool, metrics), pool_size=1, max_overflow=0, pool_timeout=0.1
+    )
+    track_connection_hold(engine, metrics)
+    return engine
+
+def test_checkouts_record_wait_and_hold_in_the_registry(tmp_path):
+    metrics = PoolMetrics("test-checkouts")
+    engine = _engine(tmp_path, metrics)
+    for _ in range(2):
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+    snapshot = metrics.snapshot(engine.pool)
+    assert snapshot["checkouts"] == 2 and snapshot["timeouts"] == 0
+    assert snapshot["waiting"] == 0 and snapshot["checked_out"] == 0
+    assert snapshot["checkout_wait"]["count"] == 2
+    assert snapshot["checkout_wait"]["buckets"]["+Inf"] == 2
+    assert snapshot["connection_hold"]["count"] == 2
+    assert "1" in snapshot["checkout_wait"]["buckets"]
+
+    lines = registry.render().splitlines()
+    assert 'db_pool_checkout_wait_seconds_count{pool="test-checkouts"} 2' in lines
+    assert 'db_pool_connection_hold_seconds_count{pool="test-checkouts"} 2' in lines
+    engine.dispose()
+
+def test_timed_out_checkouts_are_counted_separately(tmp_path):
+    metrics = PoolMetrics("test-timeouts")
+    engine = _engine(tmp_path, metrics)
+    held = engine.connect()
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    held.close()
+
+    snapshot = metrics.snapshot(engine.pool)
+    assert (snapshot["checkouts"], snapshot["timeouts"], snapshot["waiting"]) == (1, 1, 0)
+    # The timed-out wait is still observed, at least as long as pool_timeout
+    assert snapshot["checkout_wait"]["count"] == 2
+    assert snapshot["checkout_wait"]["max_ms"] >= 100
+    assert snapshot["slow_checkouts"] >= 1
+    engine.dispose()
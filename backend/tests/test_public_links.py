@@ -0,0 +1,129 @@
+import gzip
+import uuid
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from ..main import app
+from ..models import Campaign, Lead, PublicLink
+from ..routes.public_links import pwd_context
+from ..services.data_version import bump_data_version
+from ..services.export_service import export_service
+from ..services.public_snapshot import public_snapshot_service
+
+client = TestClient(app)
+
+def _link(db, **fields):
+    campaign = Campaign(name="Public")
+    db.add(campaign)
+    db.commit()
+    link = PublicLink(campaign_id=campaign.id, uuid=str(uuid.uuid4()), type="dashboard", **fields)
+    db.add(link)
+    db.commit()
+    return campaign.id, link.uuid
+
+def test_csv_is_plain_by_default_and_gzip_on_request(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(export_service, "export_dir", str(tmp_path))
+    campaign_id, link_uuid = _link(db)
+    db.add(Lead(campaign_id=campaign_id, email="csv@example.com", status="new"))
+    db.commit()
+    url = f"/api/public-links/{link_uuid}/csv"
+
+    plain = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert plain.status_code == 200
+    assert plain.headers["content-type"].startswith("text/csv")
+    assert "content-encoding" not in plain.headers
+    assert f"leads_{campaign_id}.csv" in plain.headers["content-disposition"]
+    assert plain.text.splitlines()[0] == "ID,Email,Name,Status,Created"
+    assert "csv@example.com" in plain.text
+
+    # Read the raw bytes to see what went over the wire
+    with client.stream("GET", url, headers={"Accept-Encoding": "gzip"}) as encoded:
+        raw = b"".join(encoded.iter_raw())
+    assert encoded.headers["content-encoding"] == "gzip"
+    assert encoded.headers["content-type"].startswith("text/csv")
+    assert encoded.headers["etag"] != plain.headers["etag"]
+    assert gzip.decompress(raw).decode() == plain.text
+
+    archive = client.get(f"{url}?format=csv.gz", headers={"Accept-Encoding": "identity"})
+    assert archive.headers["content-type"] == "application/gzip"
+    assert f"leads_{campaign_id}.csv.gz" in archive.headers["content-disposition"]
+    assert gzip.decompress(archive.content).decode() == plain.text
+
+def test_leads_page_through_with_a_keyset_cursor(db):
+    campaign_id, link_uuid = _link(db)
+    db.add_all([Lead(campaign_id=campaign_id, email=f"p{i}@example.com") for i in range(5)])
+    db.commit()
+
+    seen, cursor = [], None
+    for _ in range(3):
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = client.get(f"/api/public-links/{link_uuid}/leads", params=params).json()
+        seen.extend(lead["id"] for lead in page["leads"])
+        cursor = page["next_cursor"]
+    assert cursor is None
+    # Newest first, every lead exactly once
+    assert seen == sorted(seen, reverse=True) and len(set(seen)) == 5
+
+def test_snapshot_is_rebuilt_when_the_data_version_changes(db, monkeypatch):
+    monkeypatch.setattr(public_snapshot_service, "recheck_seconds", 0)
+    campaign_id, link_uuid = _link(db)
+    db.add(Lead(campaign_id=campaign_id, email="first@example.com", status="new"))
+    bump_data_version(db, campaign_id)
+    db.commit()
+    url = f"/api/public-links/{link_uuid}"
+    assert client.get(url).json()["stats"]["total_leads"] == 1
+
+    # Unversioned writes aren't seen: the snapshot is served as is
+    db.add(Lead(campaign_id=campaign_id, email="quiet@example.com", status="new"))
+    db.commit()
+    assert client.get(url).json()["stats"]["total_leads"] == 1
+
+    db.add(Lead(campaign_id=campaign_id, email="second@example.com", status="new"))
+    bump_data_version(db, campaign_id)
+    db.commit()
+    snapshot = client.get(url).json()
+    assert snapshot["stats"]["total_leads"] == 3
+    assert snapshot["leads"][0]["email"] == "second@example.com"
+
+def test_password_and_expiry_are_enforced_and_follow_updates(db):
+    _, link_uuid = _link(db, password_hash=pwd_context.hash("secret"))
+    url = f"/api/public-links/{link_uuid}"
+
+    assert client.get(url).status_code == 401
+    assert client.get(url, params={"password": "wrong"}).status_code == 401
+    assert client.get(url, params={"password": "secret"}).status_code == 200
+    token = client.post(f"{url}/session", json={"password": "secret"}).json()["access_token"]
+    assert client.get(url, headers={"Authorization": f"Bearer {token}"}).status_code == 200
+
+    # The cached link must not keep serving the old password or its tokens
+    assert client.patch(url, json={"password": "changed"}).status_code == 200
+    assert client.get(url, params={"password": "secret"}).status_code == 401
+    assert client.get(url, headers={"Authorization": f"Bearer {token}"}).status_code == 401
+    assert client.get(url, params={"password": "changed"}).status_code == 200
+
+    client.patch(url, json={"expires_at": (datetime.now() - timedelta(minutes=1)).isoformat()})
+    assert client.get(url, params={"password": "changed"}).status_code == 410
+    client.patch(url, json={"expires_at": None, "password": None})
+    assert client.get(url).status_code == 200
+
+def test_new_link_is_found_on_the_primary_when_the_replica_lags(db, tmp_path, monkeypatch):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+    from ..database import Base, get_read_db
+    from ..routes import public_links
+
+    # A "replica" that hasn't received the link yet
+    replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    Base.metadata.create_all(bind=replica)
+    monkeypatch.setattr(public_links, "is_replica", lambda session: True)
+    campaign_id, link_uuid = _link(db)
+
+    with Session(replica) as stale:
+        stale.add(Campaign(id=campaign_id, name="Public"))
+        stale.commit()
+        app.dependency_overrides[get_read_db] = lambda: stale
+        try:
+            response = client.get(f"/api/public-links/{link_uuid}")
+        finally:
+            app.dependency_overrides.pop(get_read_db, None)
+    assert response.status_code == 200
+    assert response.json()["campaign"]["id"] == campaign_id
@@ -0,0 +1,82 @@
+import uuid
+import pytest
+from fastapi.testclient import TestClient
+from ..database import SessionLocal
+from ..main import app
+from ..models import Campaign, Integration, IntegrationStatus, Lead, PublicLink
+from ..query_inspector import QueryCounter, query_budget, statement_shape
+
+client = TestClient(app)
+pytestmark = pytest.mark.usefixtures("db")
+
+def _add_campaigns(count):
+    db = SessionLocal()
+    ids = []
+    for i in range(count):
+        campaign = Campaign(name=f"Budget {uuid.uuid4()}")
+        db.add(campaign)
+        db.flush()
+        db.add_all([Lead(campaign_id=campaign.id, email=f"{i}-{n}@example.com", status="new") for n in range(3)])
+        integration = Integration(campaign_id=campaign.id, type="webhook", name="Hook", config={})
+        db.add(integration)
+        db.flush()
+        db.add(IntegrationStatus(integration_id=integration.id, status="connected", status_text="Active"))
+        ids.append(campaign.id)
+    db.commit()
+    db.close()
+    return ids
+
+def _count(path):
+    with QueryCounter() as counter:
+        response = client.get(path)
+    assert response.status_code == 200, response.text
+    return counter.count
+
+@pytest.mark.parametrize("path", [
+    "/api/dashboard/campaigns-overview",
+    "/api/dashboard/leads-by-campaign",
+    "/api/integrations/",
+    "/api/integrations/status",
+])
+def test_list_endpoints_do_not_query_per_row(path):
+    _add_campaigns(2)
+    before = _count(path)
+    _add_campaigns(5)
+    assert _count(path) == before
+
+@pytest.mark.parametrize("path, budget", [
+    ("/api/dashboard/stats", 4),
+    ("/api/dashboard/campaigns-overview", 2),
+    ("/api/dashboard/leads-by-campaign", 1),
+    ("/api/integrations/", 2),
+    ("/api/integrations/status", 5),
+])
+def test_dashboard_query_budgets(path, budget):
+    _add_campaigns(3)
+    with query_budget(budget):
+        assert client.get(path).status_code == 200
+
+def test_campaign_detail_query_budgets():
+    campaign_id = _add_campaigns(1)[0]
+    with query_budget(5):
+        assert client.get(f"/api/campaigns/{campaign_id}/stats").status_code == 200
+    with query_budget(3):
+        assert client.get(f"/api/campaigns/{campaign_id}/leads").status_code == 200
+
+def test_public_leads_page_query_budget():
+    campaign_id = _add_campaigns(1)[0]
+    db = SessionLocal()
+    link = PublicLink(campaign_id=campaign_id, uuid=str(uuid.uuid4()), type="dashboard")
+    db.add(link)
+    db.commit()
+    link_uuid = link.uuid
+    db.close()
+
+    client.get(f"/api/public-links/{link_uuid}")
+    with query_budget(2):
+        assert client.get(f"/api/public-links/{link_uuid}/leads").status_code == 200
+
+def test_statement_shape_collapses_in_lists():
+    assert statement_shape("SELECT *\n FROM leads WHERE id IN (?, ?, ?)") == statement_shape(
+        "SELECT * FROM leads WHERE id IN (?)"
+    )
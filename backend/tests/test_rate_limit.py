@@ -0,0 +1,45 @@
+import uuid
+from fastapi.testclient import TestClient
+from ..main import app
+from ..models import Campaign, WebhookEndpoint
+from ..query_inspector import QueryCounter
+from ..rate_limit import TokenBuckets, webhook_rate_limiter
+
+def test_token_bucket_allows_burst_then_refills():
+    buckets = TokenBuckets()
+    assert [buckets.take("k", 60, 2, now=0.0) for _ in range(2)] == [0.0, 0.0]
+    assert buckets.take("k", 60, 2, now=0.0) == 1.0
+    assert buckets.take("k", 60, 2, now=1.0) == 0.0
+    # A limit of 0 means unlimited
+    assert buckets.take("k", 0, 1, now=1.0) == 0.0
+
+def test_over_limit_deliveries_get_429_without_database_work(db):
+    campaign = Campaign(name="Rate limited")
+    db.add(campaign)
+    db.flush()
+    endpoint = WebhookEndpoint(
+        campaign_id=campaign.id, key=str(uuid.uuid4()), secret="s3cret", name="Vendor",
+        is_active=True, total_received=0, rate_limit_per_minute=1, rate_limit_burst=2
+    )
+    db.add(endpoint)
+    db.commit()
+    key = endpoint.key
+    db.close()
+
+    client = TestClient(app)
+    url = f"/api/webhooks/incoming/{key}?secret=s3cret"
+    # The endpoint's own limits apply from its first delivery, which loads it into the cache
+    assert [client.post(url, json={"email": f"r{i}@example.com"}).status_code for i in range(2)] == [200, 200]
+
+    with QueryCounter() as counter:
+        response = client.post(url, json={"email": "over@example.com"})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert counter.count == 0
+
+def test_unknown_keys_get_404_without_a_bucket(db):
+    client = TestClient(app)
+    for _ in range(3):
+        response = client.post(f"/api/webhooks/incoming/{uuid.uuid4()}?secret=x", json={})
+        assert response.status_code == 404
+    assert len(webhook_rate_limiter.keys._buckets) == 0
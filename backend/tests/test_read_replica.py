@@ -0,0 +1,68 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+from .. import database
+from ..database import ReplicaGuard, get_read_db
+
+class FakeGuard(ReplicaGuard):
+    """A guard whose replica reports scripted lag values (or errors)"""
+
+    def __init__(self, lags, **kwargs):
+        super().__init__(engine=None, **kwargs)
+        self.lags = list(lags)
+        self.checks = 0
+
+    def _measure_lag(self):
+        self.checks += 1
+        lag = self.lags.pop(0)
+        if isinstance(lag, Exception):
+            raise lag
+        return lag
+
+def test_guard_follows_replica_lag(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(database.time, "monotonic", lambda: clock[0])
+    guard = FakeGuard([2.0, 30.0, ConnectionError("replica down"), 1.0], max_lag=10, check_interval=5)
+
+    assert guard.is_usable()
+    # Within the check interval the last result is reused
+    clock[0] += 4
+    assert guard.is_usable() and guard.checks == 1
+
+    clock[0] += 1
+    assert not guard.is_usable()
+    assert guard.status()["lag_seconds"] == 30.0
+
+    clock[0] += 5
+    assert not guard.is_usable()
+    assert guard.status()["error"] == "replica down"
+
+    clock[0] += 5
+    assert guard.is_usable() and guard.status()["error"] is None
+
+def test_failed_replica_query_marks_it_down_until_the_next_check(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(database.time, "monotonic", lambda: clock[0])
+    guard = FakeGuard([0.0, 0.0], check_interval=5)
+    opened = []
+
+    class Session:
+        def __init__(self, name):
+            self.name = name
+            opened.append(name)
+        def close(self):
+            pass
+
+    monkeypatch.setattr(database, "replica_guard", guard)
+    monkeypatch.setattr(database, "ReadSessionLocal", lambda: Session("replica"))
+    monkeypatch.setattr(database, "SessionLocal", lambda: Session("primary"))
+
+    reads = get_read_db()
+    assert next(reads).name == "replica"
+    with pytest.raises(OperationalError):
+        reads.throw(OperationalError("SELECT 1", {}, Exception("connection reset")))
+    assert not guard.healthy
+
+    next(get_read_db())
+    clock[0] += 5
+    next(get_read_db())
+    assert opened == ["replica", "primary", "replica"]
@@ -0,0 +1,35 @@
+import json
+from datetime import datetime
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from starlette.requests import Request
+from ..responses import FastJSONResponse, _parse_range, accepts_gzip
+
+def test_parse_range_variants():
+    assert _parse_range("bytes=0-9", 100) == (0, 9)
+    assert _parse_range("bytes=90-", 100) == (90, 99)
+    assert _parse_range("bytes=-10", 100) == (90, 99)
+    assert _parse_range("bytes=50-500", 100) == (50, 99)
+
+def test_parse_range_unsupported_falls_back_to_full_file():
+    assert _parse_range("bytes=0-1,5-6", 100) is None
+    assert _parse_range("items=0-1", 100) is None
+
+def test_parse_range_unsatisfiable():
+    with pytest.raises(ValueError):
+        _parse_range("bytes=100-", 100)
+    with pytest.raises(ValueError):
+        _parse_range("bytes=9-3", 100)
+
+def test_fast_json_matches_default_encoding():
+    content = {"leads": [{"id": 1, "created_at": datetime(2024, 5, 1, 12, 30, 15, 250), "phone": None}], "total": 1}
+    assert json.loads(FastJSONResponse(content).body) == json.loads(JSONResponse(jsonable_encoder(content)).body)
+
+def test_accepts_gzip():
+    def request(accept_encoding):
+        return Request({"type": "http", "headers": [(b"accept-encoding", accept_encoding.encode())]})
+    assert accepts_gzip(request("gzip, deflate, br"))
+    assert accepts_gzip(request("br;q=1.0, *;q=0.5"))
+    assert not accepts_gzip(request("gzip;q=0, identity"))
+    assert not accepts_gzip(request("identity"))
@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta
+from ..models import Campaign, Lead, WebhookEndpoint, WebhookEvent
+from ..services.webhook_replay import WebhookReplayService
+
+def test_replay_creates_leads_once_and_skips_unauthenticated(db):
+    campaign = Campaign(name="Replay")
+    db.add(campaign)
+    db.commit()
+    endpoint = WebhookEndpoint(
+        campaign_id=campaign.id, key=f"replay-{datetime.now().timestamp()}", secret="s",
+        name="Replay", field_mapping={"mail": "email"}
+    )
+    db.add(endpoint)
+    db.commit()
+
+    old = datetime.now() - timedelta(days=2)
+    for i in range(5):
+        db.add(WebhookEvent(endpoint_id=endpoint.id, payload={"mail": f"r{i}@example.com"},
+                            status="failed", error_message="database is locked", created_at=old))
+    db.add(WebhookEvent(endpoint_id=endpoint.id, payload={"mail": "spoof@example.com"},
+                        status="failed", error_message="Invalid secret", created_at=old))
+    db.commit()
+
+    service = WebhookReplayService(batch_size=2)
+    first = service.replay(None, endpoint.id, since=old - timedelta(hours=1))
+    second = service.replay(None, endpoint.id)
+
+    assert first == {"replayed": 5, "failed": 0}
+    assert second == {"replayed": 0, "failed": 0}
+
+    leads = db.query(Lead).filter(Lead.campaign_id == campaign.id).order_by(Lead.id).all()
+    assert [lead.email for lead in leads] == [f"r{i}@example.com" for i in range(5)]
+    events = db.query(WebhookEvent).filter(WebhookEvent.endpoint_id == endpoint.id).order_by(WebhookEvent.id).all()
+    assert [event.status for event in events] == ["replayed"] * 5 + ["failed"]
+    assert [event.lead_id for event in events[:5]] == [lead.id for lead in leads]
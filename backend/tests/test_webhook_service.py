@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+from ..models import Campaign, Integration, IntegrationStatusEnum, WebhookEndpoint, WebhookEvent
+from ..services.webhook_service import WebhookService
+
+def _endpoint(db, campaign, name, total_received):
+    endpoint = WebhookEndpoint(campaign_id=campaign.id, key=name, secret="s", name=name,
+                               total_received=total_received)
+    db.add(endpoint)
+    db.commit()
+    return endpoint
+
+def _events(db, endpoint, status, count, age):
+    for _ in range(count):
+        db.add(WebhookEvent(endpoint_id=endpoint.id, payload={}, status=status,
+                            created_at=datetime.now() - age))
+    db.commit()
+
+def test_snapshot_aggregates_per_endpoint(db):
+    campaign = Campaign(name="Health")
+    db.add(campaign)
+    db.commit()
+    busy = _endpoint(db, campaign, "busy", 10)
+    quiet = _endpoint(db, campaign, "quiet", 0)
+    _events(db, busy, "success", 3, timedelta(hours=1))
+    _events(db, busy, "failed", 2, timedelta(hours=2))
+    # Counted for last success but outside the 24h window
+    _events(db, busy, "success", 1, timedelta(days=2))
+    # Beyond the lookback entirely
+    _events(db, busy, "failed", 4, timedelta(days=30))
+
+    snapshot = WebhookService(cache_seconds=0).get_health_snapshot(db)
+
+    assert set(snapshot["endpoints"]) == {busy.id, quiet.id}
+    assert quiet.id not in snapshot["stats"]
+    stats = snapshot["stats"][busy.id]
+    assert stats["events_in_window"] == 5
+    assert stats["failures_in_window"] == 2
+    assert snapshot["computed_at"] - stats["last_success_at"] < timedelta(hours=1, minutes=1)
+
+def test_health_tells_all_failed_from_no_events(db):
+    campaign = Campaign(name="Health")
+    db.add(campaign)
+    db.commit()
+    failing = _endpoint(db, campaign, "failing", 3)
+    stale = _endpoint(db, campaign, "stale", 3)
+    _events(db, failing, "failed", 3, timedelta(hours=1))
+    _events(db, stale, "success", 3, timedelta(days=30))
+    service = WebhookService(cache_seconds=0)
+
+    def check(endpoint):
+        return service.check_health(db, Integration(type="webhook", config={"endpoint_id": endpoint.id}))
+
+    assert check(failing)["status"] == IntegrationStatusEnum.DISCONNECTED
+    assert check(failing)["status_text"] == "Failing"
+    assert check(stale)["status_text"] == "Inactive"
+    assert "No events received" in check(stale)["error"]
@@ -46,6 +46,11 @@ export const webhookApi = {
 export const integrationApi = {
     list: () => api.get('/api/integrations/'),
     getStatus: (id: number) => api.get(`/api/integrations/${id}/status`),
+    // Bulk status for every integration; pass the last ETag to get a 304 when nothing changed
+    getAllStatuses: (etag?: string | null) => api.get('/api/integrations/status', {
+        headers: etag ? { 'If-None-Match': etag } : {},
+        validateStatus: (status) => status === 200 || status === 304,
+    }),
 };
 
 // Automation APIs
@@ -1,5 +1,5 @@
-import { useState, useEffect } from 'react';
-import axios from 'axios';
+import { useState, useEffect, useRef } from 'react';
+import { integrationApi } from '../api/client';
 
 export type StatusType = "connected" | "disconnected" | "warning";
 
@@ -12,48 +12,35 @@ export interface IntegrationStatus {
     lastSync: string;
 }
 
+const formatLastSync = (value?: string | null): string => {
+    if (!value) return "Never";
+    return new Date(value).toLocaleString();
+};
+
 export const useIntegrationStatus = () => {
     const [integrations, setIntegrations] = useState<IntegrationStatus[]>([]);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState<string | null>(null);
+    const etagRef = useRef<string | null>(null);
 
     const fetchStatus = async () => {
         try {
-            // In a real app, this would be your actual API endpoint
-            // const response = await axios.get('http://localhost:8000/api/integrations');
-            // For now, we'll simulate the API response based on the backend logic we just wrote
-
-            // Simulating API delay
-            await new Promise(resolve => setTimeout(resolve, 500));
-
-            const mockData: IntegrationStatus[] = [
-                {
-                    id: 1,
-                    name: "Meta Lead Ads",
-                    type: "meta",
-                    status: "connected",
-                    statusText: "Active",
-                    lastSync: "Just now"
-                },
-                {
-                    id: 2,
-                    name: "Incoming Webhook",
-                    type: "webhook",
-                    status: "warning",
-                    statusText: "Idle (No events in 24h)",
-                    lastSync: "2 days ago"
-                },
-                {
-                    id: 3,
-                    name: "SMTP Email",
-                    type: "smtp",
-                    status: "disconnected",
-                    statusText: "Not Configured",
-                    lastSync: "Never"
-                }
-            ];
-
-            setIntegrations(mockData);
+            // One request for every integration; unchanged polls come back as an empty 304
+            const response = await integrationApi.getAllStatuses(etagRef.current);
+            if (response.status === 304) {
+                setError(null);
+                return;
+            }
+
+            etagRef.current = response.headers['etag'] ?? null;
+            setIntegrations(response.data.map((integration: any) => ({
+                id: integration.id,
+                name: integration.name,
+                type: integration.type,
+                status: integration.status?.status ?? "disconnected",
+                statusText: integration.status?.status_text ?? "Unknown",
+                lastSync: formatLastSync(integration.status?.last_sync_time),
+            })));
             setError(null);
         } catch (err) {
             setError('Failed to fetch integration status');